@@ -4,9 +4,13 @@ import sys
 
 from reggy.cli import Cli
 
-# Customize tracer.
+# Customize tracer. Alternatively use the `REGGY_TRACE` environment variable – "0" removes tracing overhead completely, "1" enables logging
+# and "stats" enables statistics.
 # from reggy.tracer import Tracer
 # Tracer.skip = True
 # Tracer.quiet = False
+# Tracer.stats = False
+# from reggy.sink import QueueSink
+# Tracer.sink = QueueSink(is_json=True)
 
 exit(Cli().run(sys.argv, sys.stdin, sys.stdout, sys.stderr))
@@ -0,0 +1,133 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AnyStr, AsyncIterable, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from reggy.cache import LruCache
+from reggy.matcher import Matcher, PatternSet
+
+# Match result – the matched line, the index of the matching pattern and tokens organized by rule index.
+AsyncMatch = Tuple[str, int, Dict[int, List[str]]]
+
+# Pattern sets compiled once per worker process of a process pool, keyed by patterns and the engine.
+_pattern_sets: LruCache = LruCache(16)
+
+
+def _match_batch(patterns: Tuple[str, ...], engine: str, lines: List[str]) -> List[AsyncMatch]:
+    pattern_set: Optional[PatternSet] = _pattern_sets.get((patterns, engine))
+
+    if pattern_set is None:
+        pattern_set = PatternSet(patterns, Matcher(engine=engine))
+        _pattern_sets.put((patterns, engine), pattern_set)
+
+    return AsyncMatcher.collect(pattern_set, lines)
+
+
+class AsyncMatcher:
+    """
+    Matches lines coming from an `asyncio.StreamReader` or any other async iterable of lines without blocking the event loop. Lines are
+    collected into batches, which are matched in the executor, at most `concurrency` batches are in flight at once – when the limit is
+    reached the source isn't read until the oldest batch is done, so a slow consumer slows down reading instead of piling up lines in memory.
+
+    A batch is submitted when it's full, when the source is exhausted or when no new line arrives within `delay` seconds, so matches from
+    a quiet stream don't get stuck in a half-full batch.
+
+    Thread executors share the pattern set, but matching holds the GIL, so only a process pool actually runs batches in parallel. With
+    a process pool every batch is sent along with patterns and each worker compiles them once, which suits pattern lists that are small
+    compared to batches.
+    """
+
+    def __init__(self, patterns: [str], matcher: Optional[Matcher] = None, executor: Optional[Executor] = None, batch_size: int = 1024,
+                 concurrency: int = 4, delay: float = 0.05):
+        """
+        :param patterns: Patterns to match, see `PatternSet`.
+        :param matcher: Matcher used for compiling patterns, a new one is created if not provided.
+        :param executor: Executor for matching batches, either a thread or a process pool, the default one of the event loop is used if not
+            provided.
+        :param batch_size: Maximum number of lines matched at once.
+        :param concurrency: Maximum number of batches being matched at once.
+        :param delay: Maximum time in seconds to wait for the next line before submitting an incomplete batch.
+        """
+
+        self.pattern_set: PatternSet = PatternSet(patterns, matcher)
+        self.engine: str = matcher.engine if matcher is not None else 'regex'
+        self.executor: Optional[Executor] = executor
+        self.batch_size: int = max(batch_size, 1)
+        self.concurrency: int = max(concurrency, 1)
+        self.delay: float = delay
+
+    async def match(self, source: AsyncIterable[AnyStr]) -> AsyncIterator[AsyncMatch]:
+        """
+        Yields matched lines in the input order along with the index of the matching pattern and tokens. Lines can be strings or bytes, which
+        are decoded as UTF-8, the trailing line break is removed.
+        """
+
+        # Within the coroutine this is the running loop, `get_running_loop` is available only since Python 3.7.
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        iterator: AsyncIterator[AnyStr] = source.__aiter__()
+        pending: Deque[asyncio.Future] = deque()
+        reading: Optional[asyncio.Future] = None
+        batch: List[str] = []
+        is_exhausted: bool = False
+
+        try:
+            while not is_exhausted or pending:
+                # Collect the batch until it's full, the source is exhausted or the source goes quiet while something is waiting to be done.
+                while not is_exhausted and len(batch) < self.batch_size:
+                    if reading is None:
+                        reading = asyncio.ensure_future(iterator.__anext__())
+
+                    (done, _) = await asyncio.wait({reading}, timeout=self.delay if batch or pending else None)
+
+                    if not done:
+                        break
+
+                    try:
+                        batch.append(self.decode(reading.result()))
+                    except StopAsyncIteration:
+                        is_exhausted = True
+
+                    reading = None
+
+                if batch:
+                    if isinstance(self.executor, ProcessPoolExecutor):
+                        matching: asyncio.Future = loop.run_in_executor(self.executor, _match_batch, self.pattern_set.patterns, self.engine, batch)
+                    else:
+                        matching = loop.run_in_executor(self.executor, self.match_batch, batch)
+
+                    pending.append(matching)
+                    batch = []
+
+                # Yield finished batches in order, wait for the oldest one when the limit is reached or there's nothing else to do.
+                while pending and (pending[0].done() or len(pending) >= self.concurrency or is_exhausted):
+                    for result in await pending.popleft():
+                        yield result
+        finally:
+            if reading is not None:
+                reading.cancel()
+
+    def match_batch(self, lines: List[str]) -> List[AsyncMatch]:
+        """
+        Matches the batch of lines and returns results for matched ones.
+        """
+
+        return self.collect(self.pattern_set, lines)
+
+    @staticmethod
+    def collect(pattern_set: PatternSet, lines: List[str]) -> List[AsyncMatch]:
+        results: List[AsyncMatch] = []
+
+        for line in lines:
+            result: Optional[Tuple[int, Dict[int, List[str]]]] = pattern_set.match(line)
+
+            if result is not None:
+                results.append((line, result[0], result[1]))
+
+        return results
+
+    @staticmethod
+    def decode(line: AnyStr) -> str:
+        if isinstance(line, bytes):
+            line = line.decode(errors='replace')
+
+        return line[:-1] if line[-1:] == '\n' else line
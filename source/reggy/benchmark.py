@@ -0,0 +1,274 @@
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, IO, Optional
+
+from reggy.cli import Cli
+from reggy.matcher import Matcher, PatternSet
+
+# Metrics collected for every benchmark and whether their bigger values are better. Every line is matched once, so the time per match is
+# the time per line, matched or not.
+METRICS: Dict[str, bool] = {
+    'lines_per_second': True,
+    'ns_per_match': False,
+    'peak_memory': False,
+    'startup': False,
+}
+
+Results = Dict[str, Dict[str, float]]
+
+
+class Corpus:
+    """
+    Generates synthetic log lines and templates matching them. Generation is seeded, so the corpus is the same between runs.
+    """
+
+    actions: [str] = ['logged in', 'logged out', 'uploaded a file', 'failed to authenticate', 'changed the password', 'was throttled']
+    names: [str] = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi']
+
+    def __init__(self, seed: int = 0):
+        self.random: random.Random = random.Random(seed)
+
+    def templates(self, count: int) -> [str]:
+        """
+        Returns templates of the kind `service42: user %{0} logged in from %{1} in %{2} ms`, every one with a unique service name.
+        """
+
+        return [f'service{index}: user %{{0}} {self.actions[index % len(self.actions)]} from %{{1}} in %{{2}} ms' for index in range(count)]
+
+    def lines(self, count: int, services: int, hit_rate: float = 0.5) -> [str]:
+        """
+        Returns lines, roughly `hit_rate` of which match one of the templates for the given number of services.
+        """
+
+        lines: [str] = []
+
+        for _ in range(count):
+            index: int = self.random.randrange(services)
+            action: str = self.actions[index % len(self.actions)] if self.random.random() < hit_rate else 'did something else'
+            address: str = '.'.join(str(self.random.randrange(256)) for _ in range(4))
+            lines.append(f'service{index}: user {self.random.choice(self.names)} {action} from {address} in {self.random.randrange(1000)} ms')
+
+        return lines
+
+
+class Benchmark:
+    """
+    Single benchmark – the set of patterns matched against the set of lines with `PatternSet`, with `Cli` and, for a single pattern, with
+    `Matcher.match`, the public per-call path including the cache lookup and tracing.
+    """
+
+    def __init__(self, name: str, patterns: [str], lines: [str], engine: str = 'regex'):
+        self.name: str = name
+        self.patterns: [str] = patterns
+        self.lines: [str] = lines
+        self.engine: str = engine
+
+    def run(self, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+        """
+        Runs the benchmark with the pattern set, the command-line interface and the matcher, if there's a single pattern, and returns metrics
+        of each, the best of repeated runs.
+        """
+
+        results: Dict[str, Dict[str, float]] = {f'{self.name}/matcher': self.measure(self.setup_matcher, repeat),
+                                                f'{self.name}/cli': self.measure(self.setup_cli, repeat)}
+
+        if len(self.patterns) == 1:
+            results[f'{self.name}/match'] = self.measure(self.setup_match, repeat)
+
+        return results
+
+    def measure(self, setup: Callable[[], Callable[[[str]], None]], repeat: int) -> Dict[str, float]:
+        """
+        Measures the run produced by the setup – the setup time is the startup time, the run is timed over all lines.
+        """
+
+        timings: [float] = []
+        startups: [float] = []
+
+        for _ in range(repeat):
+            gc.collect()
+            start: float = time.perf_counter()
+            run: Callable[[[str]], None] = setup()
+            startups.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            run(self.lines)
+            timings.append(time.perf_counter() - start)
+
+        # Memory tracing slows everything down, so it's measured with a separate run.
+        tracemalloc.start()
+        setup()(self.lines)
+        (_, peak_memory) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timing: float = max(min(timings), sys.float_info.epsilon)
+
+        return {
+            'lines_per_second': len(self.lines) / timing,
+            'ns_per_match': timing * 1e9 / max(len(self.lines), 1),
+            'peak_memory': float(peak_memory),
+            'startup': min(startups),
+        }
+
+    def setup_matcher(self) -> Callable[[[str]], None]:
+        """
+        Compiles patterns, which makes the startup time, and returns the function matching lines one by one.
+        """
+
+        pattern_set: PatternSet = PatternSet(self.patterns, Matcher(engine=self.engine))
+
+        def run(lines: [str]) -> None:
+            for line in lines:
+                pattern_set.match(line)
+
+        return run
+
+    def setup_match(self) -> Callable[[[str]], None]:
+        """
+        Compiles the pattern into the matcher cache, which makes the startup time, and returns the function matching lines one by one with
+        `Matcher.match`.
+        """
+
+        matcher: Matcher = Matcher(engine=self.engine)
+        pattern: str = self.patterns[0]
+        matcher.compile(pattern)
+
+        def run(lines: [str]) -> None:
+            for line in lines:
+                matcher.match(pattern, line)
+
+        return run
+
+    def setup_cli(self) -> Callable[[[str]], None]:
+        """
+        Runs the command-line interface with empty input, which makes the startup time, and returns the function running it with lines.
+        """
+
+        argv: [str] = ['reggy', '--engine', self.engine, '--'] + self.patterns
+
+        def run(lines: [str]) -> None:
+            (in_stream, out_stream, err_stream) = (io.StringIO('\n'.join(lines) + '\n' if lines else ''), io.StringIO(), io.StringIO())
+            (in_stream.isatty, out_stream.isatty) = (lambda: False, lambda: False)
+            Cli().run(argv, in_stream, out_stream, err_stream)
+
+        run([])
+        return run
+
+
+def benchmarks(scale: float = 1.0) -> [Benchmark]:
+    """
+    Returns the benchmark suite, the scale multiplies the number of lines and patterns in each benchmark.
+    """
+
+    corpus: Corpus = Corpus()
+    count: int = max(int(10000 * scale), 1)
+
+    def lines(services: int) -> [str]:
+        return corpus.lines(count, services)
+
+    suite: [Benchmark] = [
+        Benchmark('plain', ['service0: user %{0} logged in from %{1} in %{2} ms'], lines(1)),
+        Benchmark('greedy', ['service0: user %{0G} logged in from %{1} in %{2G} ms'], lines(1)),
+        Benchmark('space-limited', ['service0: user %{0S0} logged in from %{1S0} in %{2} ms'], lines(1)),
+        Benchmark('plain-literal', ['service0: user %{0} logged in from %{1} in %{2} ms'], lines(1), engine='literal'),
+    ]
+
+    for catalog in [1, 10, 100, 1000, 10000]:
+        catalog = max(int(catalog * scale), 1)
+        suite.append(Benchmark(f'catalog-{catalog}', corpus.templates(catalog), lines(catalog)))
+
+    # Lines with lots of repeated literals make the regex try every possible split between captures.
+    repeats: int = max(int(60 * scale), 1)
+    adversarial: [str] = ['a ' + ' b' * repeats + ' c' * repeats + ' x'] * max(int(10 * scale), 1)
+
+    suite.append(Benchmark('adversarial', ['a %{0} b %{1} c %{2} d'], adversarial))
+    suite.append(Benchmark('adversarial-literal', ['a %{0} b %{1} c %{2} d'], adversarial, engine='literal'))
+
+    return suite
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> [str]:
+    """
+    Compares results with the baseline and returns descriptions of metrics that regressed beyond the threshold, relative to the baseline.
+    Benchmarks and metrics missing from the baseline are ignored.
+    """
+
+    regressions: [str] = []
+
+    for (name, metrics) in results.items():
+        for (metric, value) in metrics.items():
+            reference: Optional[float] = baseline.get(name, {}).get(metric)
+
+            if not reference or metric not in METRICS:
+                continue
+
+            change: float = (value - reference) / reference
+
+            if -change > threshold if METRICS[metric] else change > threshold:
+                regressions.append(f'{name} {metric}: {value:.6g} against baseline {reference:.6g} ({change:+.1%})')
+
+    return regressions
+
+
+def report(results: Results, stream: IO) -> None:
+    """
+    Writes results as a table into the stream.
+    """
+
+    lines: [str] = [f'{"benchmark":<32} {"lines/s":>12} {"ns/match":>12} {"peak KiB":>10} {"startup ms":>10}']
+
+    for (name, metrics) in results.items():
+        lines.append(f'{name:<32} {metrics["lines_per_second"]:>12.0f} {metrics["ns_per_match"]:>12.0f} {metrics["peak_memory"] / 1024:>10.1f} '
+                     f'{metrics["startup"] * 1000:>10.2f}')
+
+    stream.write('\n'.join(lines) + '\n')
+
+
+def main(argv: [str], out_stream: IO, err_stream: IO) -> int:
+    """
+    Runs the benchmark suite, compares results with the baseline and returns a non-zero status if any of metrics regressed. The baseline is
+    created when it doesn't exist yet and can be updated explicitly.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog='python -m reggy.benchmark', description='Runs reggy benchmarks.')
+    parser.add_argument('--baseline', default='benchmark.json', metavar='PATH', help='baseline results file, defaults to "benchmark.json"')
+    parser.add_argument('--update', action='store_true', help='overwrite the baseline with the new results')
+    parser.add_argument('--threshold', type=float, default=0.2, metavar='RATIO', help='allowed regression relative to the baseline, defaults to 0.2')
+    parser.add_argument('--scale', type=float, default=1.0, metavar='RATIO', help='multiplier for the corpus and catalog sizes, defaults to 1')
+    parser.add_argument('--repeat', type=int, default=3, metavar='N', help='number of timed runs, the best one counts, defaults to 3')
+    parser.add_argument('--filter', default='', metavar='TEXT', help='run only benchmarks with names containing the text')
+    arguments: argparse.Namespace = parser.parse_args(argv[1:])
+
+    results: Results = {}
+
+    for benchmark in benchmarks(arguments.scale):
+        if arguments.filter in benchmark.name:
+            results.update(benchmark.run(max(arguments.repeat, 1)))
+
+    report(results, out_stream)
+
+    if arguments.update or not os.path.exists(arguments.baseline):
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+        out_stream.write(f'Baseline saved into {arguments.baseline}.\n')
+        return 0
+
+    with open(arguments.baseline) as file:
+        regressions: [str] = compare(results, json.load(file), arguments.threshold)
+
+    for regression in regressions:
+        err_stream.write(f'Regression: {regression}\n')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    exit(main(sys.argv, sys.stdout, sys.stderr))
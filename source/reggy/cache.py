@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LruCache:
+    """
+    Size-bounded cache, which keeps track of its hits and misses. When the cache is full it evicts items according to the policy:
+
+        lru  – the least recently used item, reads keep items in the cache;
+        fifo – the oldest stored item regardless of reads, which makes reads cheaper.
+    """
+
+    policies: [str] = ['lru', 'fifo']
+
+    # Marker object used to distinguish missing keys from stored `None` values.
+    __missing: object = object()
+
+    def __init__(self, size: int = 256, policy: str = 'lru'):
+        """
+        :param size: Maximum number of items kept in the cache, zero disables caching entirely.
+        :param policy: Eviction policy, see above.
+        """
+
+        if policy not in self.policies:
+            raise ValueError(f'Unknown eviction policy {policy!r}, expected one of: {", ".join(self.policies)}.')
+
+        self.size: int = size
+        self.policy: str = policy
+        self.hits: int = 0
+        self.misses: int = 0
+        self.__items: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__items
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of reads that found the key in the cache, zero before the first read.
+        """
+
+        return self.hits / (self.hits + self.misses) if self.hits or self.misses else 0.0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Optional[Any]:
+        """
+        Returns the cached value and marks it as the most recently used one with the LRU policy, or the default if the key isn't cached.
+        """
+
+        value: Any = self.__items.get(key, self.__missing)
+
+        if value is self.__missing:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+
+        if self.policy == 'lru':
+            self.__items.move_to_end(key)
+
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores the value evicting an item according to the policy when the cache is full. Replacing the value of a cached key counts as
+        its use with the LRU policy.
+        """
+
+        if self.size <= 0:
+            return
+
+        self.__items[key] = value
+
+        if self.policy == 'lru':
+            self.__items.move_to_end(key)
+
+        if len(self.__items) > self.size:
+            self.__items.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes all cached items and resets counters.
+        """
+
+        self.__items.clear()
+        self.hits = 0
+        self.misses = 0
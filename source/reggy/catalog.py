@@ -0,0 +1,100 @@
+import gc
+import hashlib
+import pickle
+from typing import Dict, Optional, Tuple
+
+from reggy import __version__
+from reggy.index import LiteralIndex
+from reggy.matcher import Matcher, ParsedPattern
+from reggy.output import replaced_file
+
+# Parsed patterns of the catalog along with the prefilter index over their literals.
+CompiledCatalog = Tuple[Tuple[ParsedPattern, ...], LiteralIndex]
+
+
+class PatternCatalog:
+    """
+    Patterns loaded from a text file, one per line, empty lines are ignored. Parsing and indexing large catalogs takes a while, so parsed
+    patterns and the prefilter index can be saved into the compiled catalog, if its path is given, and later runs load them instead. The
+    compiled catalog is ignored and rebuilt when the content of the source file or the reggy version changes.
+
+    The compiled catalog is a pickle, which is as trusted as the code itself – never use compiled catalogs from untrusted sources.
+    """
+
+    def __init__(self, path: str, compiled_path: Optional[str] = None):
+        """
+        :param path: Path to the source file with patterns in UTF-8.
+        :param compiled_path: Path to the compiled catalog, patterns are parsed every time without one.
+        """
+
+        with open(path, 'rb') as file:
+            data: bytes = file.read()
+
+        self.path: str = path
+        self.compiled_path: Optional[str] = compiled_path
+        self.patterns: [str] = [line.rstrip('\r') for line in data.decode().split('\n') if line.rstrip('\r')]
+        self.is_modified: bool = False
+
+        self.__digest: str = hashlib.sha256(data).hexdigest()
+        self.__compiled: Optional[Dict[bool, CompiledCatalog]] = None
+
+    def compile(self, matcher: Matcher, binary: bool = False) -> LiteralIndex:
+        """
+        Compiles patterns into the matcher cache using parsed patterns from the compiled catalog, if available, and returns the prefilter
+        index for `PatternSet`. Patterns are parsed and the catalog is marked modified otherwise. Bytes patterns are compiled in binary mode,
+        same as with `PatternSet`.
+        """
+
+        # The compiled catalog gets loaded only when needed, callers keeping compiled patterns around don't pay for it.
+        if self.__compiled is None:
+            self.__compiled = self.__load() if self.compiled_path is not None else {}
+
+        patterns: [str] = [pattern.encode() for pattern in self.patterns] if binary else self.patterns
+        compiled: Optional[CompiledCatalog] = self.__compiled.get(binary)
+
+        if compiled is None:
+            parsed: Tuple[ParsedPattern, ...] = tuple(matcher.parse(pattern) for pattern in patterns)
+            compiled = self.__compiled[binary] = (parsed, LiteralIndex([literals for (_, _, literals, _) in parsed]))
+            self.is_modified = True
+
+        for (pattern, parsed_pattern) in zip(patterns, compiled[0]):
+            matcher.compile(pattern, parsed_pattern)
+
+        return compiled[1]
+
+    def save(self) -> None:
+        """
+        Saves the compiled catalog if it was modified and its path is given, see `replaced_file`.
+        """
+
+        if not self.is_modified or self.compiled_path is None:
+            return
+
+        with replaced_file(self.compiled_path, 'wb') as file:
+            pickle.dump({'version': __version__, 'digest': self.__digest, 'compiled': self.__compiled}, file, pickle.HIGHEST_PROTOCOL)
+
+        self.is_modified = False
+
+    def __load(self) -> Dict[bool, CompiledCatalog]:
+        """
+        Loads the compiled catalog if it exists and matches the source and the version, otherwise returns an empty one.
+        """
+
+        # Unpickling creates lots of small trie nodes, which would trigger the cyclic garbage collector over and over for nothing.
+        is_gc_enabled: bool = gc.isenabled()
+        gc.disable()
+
+        try:
+            with open(self.compiled_path, 'rb') as file:
+                catalog: dict = pickle.load(file)
+        except Exception:
+            # Broken compiled catalog is no different from a missing one, it gets rebuilt.
+            return {}
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+        if not isinstance(catalog, dict) or catalog.get('version') != __version__ or catalog.get('digest') != self.__digest:
+            return {}
+
+        return catalog['compiled']
@@ -1,6 +1,64 @@
-from typing import IO
+import argparse
+import lzma
+import time
+import zlib
+from collections import Counter
+from itertools import islice
+from typing import IO, Iterator, Optional, Tuple, Union
 
-from reggy.matcher import Matcher
+from reggy.cache import LruCache
+from reggy.catalog import PatternCatalog
+from reggy.follow import Checkpoint, FollowReader
+from reggy.index import LiteralIndex
+from reggy.input import LineReader, FileReader
+from reggy.matcher import Matcher, PatternSet
+from reggy.memo import MemoizingPatternSet
+from reggy.output import LineWriter, MatchFormatter
+from reggy.parallel import ParallelMatcher
+from reggy.profiler import ProfilingPatternSet
+
+
+class CliExit(Exception):
+    """
+    Raised by the argument parser instead of exiting the process.
+    """
+
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status: int = status
+
+
+class CliArgumentParser(argparse.ArgumentParser):
+    """
+    Argument parser writing messages into the given stream and raising `CliExit` instead of terminating the process.
+    """
+
+    def __init__(self, err_stream: IO, **kwargs):
+        super().__init__(**kwargs)
+        self.err_stream: IO = err_stream
+
+    def _print_message(self, message: str, file: Optional[IO] = None):
+        if message:
+            self.err_stream.write(message)
+
+    def exit(self, status: int = 0, message: Optional[str] = None):
+        if message:
+            self._print_message(message)
+
+        raise CliExit(status)
+
+
+class CliSummary:
+    """
+    Counters collected while matching and reported at the end of the run.
+    """
+
+    def __init__(self):
+        self.match_count: int = 0
+        self.skip_count: int = 0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.profile: Optional[ProfilingPatternSet] = None
 
 
 class Cli:
@@ -13,46 +71,319 @@ class Cli:
         Parses and executes reggy commands and returns the status.
         """
 
-        # The program expects exactly one argument – the pattern. The default first one is always the executable path.
-        if len(argv) <= 1:
+        try:
+            arguments: argparse.Namespace = self.parse(argv, err_stream)
+        except CliExit as exception:
+            return exception.status
+
+        if (arguments.follow or arguments.checkpoint) and not arguments.inputs:
+            err_stream.write('reggy: error: following and checkpoints need input files\n')
+            return 2
+
+        # Followed files are written as they're read, the output can't wait for the end of the input.
+        if arguments.follow:
+            (arguments.stream, arguments.flush) = (True, 'line')
+
+        catalog: Optional[PatternCatalog] = None
+
+        if arguments.patterns_file:
+            try:
+                catalog = PatternCatalog(arguments.patterns_file, arguments.compiled_catalog)
+            except (OSError, UnicodeDecodeError) as exception:
+                err_stream.write(f'reggy: error: can\'t read patterns file {arguments.patterns_file!r}: {exception}\n')
+                return 1
+
+            arguments.patterns = arguments.patterns + catalog.patterns
+
+        # The program expects at least one pattern.
+        if not arguments.patterns:
             err_stream.write('Reggy expects one or more matching patterns:\n'
                              '  reggy \'foo %{0}\'\n'
                              '  reggy \'qux %{0S3} baz\'\n')
             return 1
 
-        matcher: Matcher = Matcher()
-        patterns: [str] = argv[1:]
+        (matcher, index) = self.prepare(arguments, catalog, err_stream)
 
+        writer: LineWriter = LineWriter(out_stream, batch_size=arguments.batch_size, flush=arguments.flush)
+        summary: CliSummary = CliSummary()
         matched_lines: [str] = []
-        line_count: int = 0
 
         is_in_tty: bool = in_stream.isatty()
         is_out_tty: bool = out_stream.isatty()
 
         # If output stream is a tty (not piped) let the user know how to correctly terminate it. Todo: Doesn't behave particularly well
         # todo: with PyCharm console – it appears to use piped streams with tty, not sure about the best way to handle this…
-        if is_in_tty:
+        if is_in_tty and not arguments.inputs:
             print('Enter the text to match and finish with entering an empty line or the EOF character, typically Ctrl-D in Unix and Ctrl-Z in Windows.\n', file=out_stream)
 
-        for line in in_stream:
-            line = line[:-1]
+        # Files are memory-mapped or decompressed and matched as bytes, the standard input is read line by line as text.
+        # Only data appended since the last run is read with the checkpoint.
+        checkpoint: Optional[Checkpoint] = Checkpoint(arguments.checkpoint) if arguments.checkpoint else None
+        reader: Union[LineReader, FileReader]
+
+        if arguments.follow or checkpoint is not None:
+            reader = FollowReader(arguments.inputs, checkpoint, arguments.follow, arguments.interval)
+        elif arguments.inputs:
+            reader = FileReader(arguments.inputs, prefetch=arguments.prefetch)
+        else:
+            reader = LineReader(in_stream, is_in_tty)
 
-            # In a tty mode allow to exit with an empty line.
-            if is_in_tty and line == '':
-                break
+        # Quiet mode needs only the first match to know the status. Matching stops as soon as the limit is reached, without reading further.
+        max_count: Optional[int] = 1 if arguments.quiet else arguments.max_count
+        start: float = time.perf_counter()
+        matches: Iterator[str] = self.match(arguments, matcher, reader, summary, index)
 
-            line_count += 1
+        try:
+            for line in islice(matches, max(max_count, 0) if max_count is not None else None):
+                summary.match_count += 1
 
-            # A line is considered matched if it gets matched least against one pattern – don't iterate beyond that point.
-            for pattern in patterns:
-                if matcher.match(pattern, line) is not None:
+                # In streaming mode matches are written as soon as they're found, otherwise they're kept until the summary is printed. Only
+                # the number of matches matters in quiet and count modes.
+                if arguments.quiet or arguments.count:
+                    continue
+                elif arguments.stream:
+                    writer.write(line)
+                else:
                     matched_lines.append(line)
-                    break
+        except (OSError, EOFError, lzma.LZMAError, zlib.error) as exception:
+            # Unreadable or corrupted input files, matches written so far in streaming mode are kept.
+            writer.close()
+            err_stream.write(f'reggy: error: {exception}\n')
+            return 2
+        except KeyboardInterrupt:
+            # Following goes on until interrupted, which is the normal way to finish it.
+            if not arguments.follow:
+                raise
+        finally:
+            matches.close()
+
+        if summary.profile is not None:
+            summary.profile.report(err_stream, arguments.stats_format, reader.count, time.perf_counter() - start)
+
+        if arguments.quiet:
+            self.save_checkpoint(checkpoint, err_stream)
+            return 0 if summary.match_count else 1
+
+        if arguments.stream:
+            writer.close()
 
-        if is_out_tty:
-            print(f'Matched {len(matched_lines)} lines out of total {line_count} provided.', file=out_stream)
+        notes: [str] = []
+
+        if summary.skip_count:
+            notes.append(f'Skipped {summary.skip_count} lines longer than {arguments.max_line_length}.')
+
+        if summary.cache_hits or summary.cache_misses:
+            hit_rate: float = summary.cache_hits / (summary.cache_hits + summary.cache_misses)
+            notes.append(f'Result cache hit rate {hit_rate:.1%}, {summary.cache_hits} hits and {summary.cache_misses} misses.')
+
+        if is_out_tty and not arguments.count:
+            print(' '.join([f'Matched {summary.match_count} lines out of total {reader.count} provided.'] + notes), file=out_stream)
+        elif notes:
+            err_stream.write(f'reggy: {" ".join(notes)}\n')
+
+        if arguments.count:
+            matched_lines.append(str(summary.match_count))
 
         for match in matched_lines:
-            print(match, file=out_stream)
+            writer.write(match)
+
+        writer.close()
+
+        # Positions are saved only once lines read up to them are written, a failed or interrupted run is read again by the next one.
+        self.save_checkpoint(checkpoint, err_stream)
 
         return 0
+
+    @staticmethod
+    def save_checkpoint(checkpoint: Optional[Checkpoint], err_stream: IO) -> None:
+        """
+        Saves the checkpoint, if any, failing to save it is only a warning, the output is already written.
+        """
+
+        if checkpoint is None:
+            return
+
+        try:
+            checkpoint.save()
+        except OSError as exception:
+            err_stream.write(f'reggy: warning: can\'t save checkpoint {checkpoint.path!r}: {exception}\n')
+
+    def prepare(self, arguments: argparse.Namespace, catalog: Optional[PatternCatalog], err_stream: IO) -> Tuple[Matcher, Optional[LiteralIndex]]:
+        """
+        Compiles patterns into the matcher cache, using the catalog if given, writes warnings about ambiguous patterns and returns the matcher
+        along with the prefilter index for the pattern set, if there's one.
+        """
+
+        # The cache fits all patterns, including bytes ones for memory-mapped files, so they get compiled only once.
+        matcher: Matcher = Matcher(cache_size=len(arguments.patterns) * (2 if arguments.inputs else 1), engine=arguments.engine)
+        index: Optional[LiteralIndex] = None
+
+        if catalog is not None:
+            index = catalog.compile(matcher)
+
+            # Memory-mapped files are matched with bytes patterns, string ones are still used for the analysis.
+            if arguments.inputs:
+                index = catalog.compile(matcher, binary=True)
+
+            # The catalog index covers only catalog patterns and can't be used when there are others.
+            if len(catalog.patterns) < len(arguments.patterns):
+                index = None
+
+            try:
+                catalog.save()
+            except OSError as exception:
+                err_stream.write(f'reggy: warning: can\'t save compiled catalog {catalog.compiled_path!r}: {exception}\n')
+
+        # Warn about ambiguous patterns before matching, they still get used as is. Large catalogs would flood the output with details on
+        # every run, so they're written only when patterns are checked explicitly.
+        ambiguous_count: int = 0
+
+        for pattern in arguments.patterns:
+            warnings: [str] = matcher.analyze(pattern, backtracking=arguments.check_patterns)
+            ambiguous_count += 1 if warnings else 0
+
+            for warning in warnings if arguments.check_patterns else []:
+                err_stream.write(f'reggy: warning: pattern {pattern!r}: {warning}\n')
+
+        if ambiguous_count and not arguments.check_patterns:
+            err_stream.write(f'reggy: warning: found {ambiguous_count} ambiguous patterns, use --check-patterns for details\n')
+
+        return (matcher, index)
+
+    def match(self, arguments: argparse.Namespace, matcher: Matcher, reader: Union[LineReader, FileReader], summary: CliSummary,
+              index: Optional[LiteralIndex] = None) -> Iterator[str]:
+        """
+        Yields lines matched at least against one pattern formatted according to the output format, all patterns are tried in a single pass.
+        Lines of memory-mapped files are matched as bytes and only matched ones get decoded. Lines over the length limit are skipped and
+        counted in the summary. The prefilter index, if given, must be built for patterns in the matching mode.
+        """
+
+        # Workers read chunks ahead, matching stopped early would leave positions in the checkpoint past lines never matched.
+        is_stopped_early: bool = bool(arguments.checkpoint) and (arguments.quiet or arguments.max_count is not None)
+
+        if arguments.jobs > 1 and not arguments.stats and not arguments.follow and not is_stopped_early:
+            parallel_matcher: ParallelMatcher = ParallelMatcher(arguments.patterns, arguments.jobs, arguments.chunk_size, not arguments.unordered,
+                                                                arguments.engine, arguments.max_line_length, arguments.format,
+                                                                arguments.with_filename, arguments.cache_size, arguments.cache_policy)
+
+            try:
+                yield from parallel_matcher.match_files(reader) if isinstance(reader, FileReader) else parallel_matcher.match(reader)
+            finally:
+                summary.skip_count = parallel_matcher.skipped
+                (summary.cache_hits, summary.cache_misses) = (parallel_matcher.cache_hits, parallel_matcher.cache_misses)
+
+            return
+
+        pattern_set: PatternSet = self.pattern_set(arguments, matcher, isinstance(reader, FileReader), index)
+
+        if isinstance(pattern_set, ProfilingPatternSet):
+            summary.profile = pattern_set
+
+        formatter: MatchFormatter = MatchFormatter(arguments.format)
+        output: Optional[str]
+
+        try:
+            if isinstance(reader, FileReader):
+                for (buffer, start, end) in reader:
+                    output = formatter.match(pattern_set, buffer, start, end, reader.path if arguments.with_filename else None)
+
+                    if output is not None:
+                        yield output
+            else:
+                path: Optional[str] = FileReader.stdin_name if arguments.with_filename else None
+
+                for line in reader:
+                    output = formatter.match(pattern_set, line, path=path)
+
+                    if output is not None:
+                        yield output
+        finally:
+            summary.skip_count = pattern_set.skipped
+
+            if isinstance(pattern_set, MemoizingPatternSet):
+                (summary.cache_hits, summary.cache_misses) = (pattern_set.cache.hits, pattern_set.cache.misses)
+
+    def pattern_set(self, arguments: argparse.Namespace, matcher: Matcher, binary: bool, index: Optional[LiteralIndex] = None) -> PatternSet:
+        """
+        Returns a new pattern set for matching strings, or bytes in binary mode.
+        """
+
+        # Profiling needs every pattern to be tried on its own, which is slower, so it's done only when statistics are requested. Cached
+        # results would hide the work from the profile.
+        if arguments.stats:
+            return ProfilingPatternSet(arguments.patterns, matcher, binary=binary, max_length=arguments.max_line_length, index=index)
+
+        if arguments.cache_size:
+            return MemoizingPatternSet(arguments.patterns, matcher, binary=binary, max_length=arguments.max_line_length, index=index,
+                                       cache_size=arguments.cache_size, cache_policy=arguments.cache_policy)
+
+        return PatternSet(arguments.patterns, matcher, binary=binary, max_length=arguments.max_line_length, index=index)
+
+    def parse(self, argv: [str], err_stream: IO) -> argparse.Namespace:
+        """
+        Parses command-line arguments, the first one is always the executable path and gets skipped.
+        """
+
+        parser: CliArgumentParser = CliArgumentParser(err_stream, prog='reggy', description='Matches input lines against reggy patterns.')
+        parser.add_argument('patterns', nargs='*', metavar='pattern', help='pattern to match lines against, use "--" before patterns starting with '
+                                                                          '"-" that look like options')
+
+        parser.add_argument('-f', '--patterns-file', metavar='PATH', help='file with patterns to match, one per line, in addition to pattern arguments')
+        parser.add_argument('--compiled-catalog', metavar='PATH', help='file with patterns of the patterns file compiled for fast startup, created '
+                                                                      'or rebuilt when missing or outdated, patterns are compiled on every run '
+                                                                      'without it')
+        parser.add_argument('-i', '--input', action='append', default=[], dest='inputs', metavar='PATH',
+                            help='file or glob pattern to read instead of the standard input, can be repeated, .gz, .bz2 and .xz files are decompressed')
+        parser.add_argument('--prefetch', action='store_true', help='decompress files ahead of matching on a background thread')
+        parser.add_argument('--follow', action='store_true', help='keep polling input files for appended lines until interrupted, implies --stream')
+        parser.add_argument('--interval', type=float, default=1.0, metavar='SECONDS', help='polling interval when following files, defaults to 1')
+        parser.add_argument('--checkpoint', metavar='PATH', help='file with read positions of input files, only lines appended since the last '
+                                                                 'run get matched, rotated and truncated files are read from the start, '
+                                                                 'rotated files among inputs are read from where they were left off')
+
+        matching: argparse._ArgumentGroup = parser.add_argument_group('matching')
+        matching.add_argument('--engine', choices=Matcher.engines, default='regex', help='matching engine, the literal one never backtracks, defaults to "regex"')
+        matching.add_argument('--check-patterns', action='store_true', help='write warnings about every ambiguous or backtracking-prone pattern, '
+                                                                            'otherwise only the number of ambiguous ones is reported')
+        matching.add_argument('--max-line-length', type=int, default=0, metavar='N', help='skip lines longer than this without matching, disabled by default')
+        matching.add_argument('--cache-size', type=int, default=0, metavar='N', help='remember results for up to N distinct lines and only '
+                                                                             'match repeated ones against the remembered pattern, '
+                                                                             'ignored with --stats, disabled by default')
+        matching.add_argument('--cache-policy', choices=LruCache.policies, default='lru', help='result cache eviction policy, defaults to "lru"')
+        matching.add_argument('-m', '--max-count', type=int, metavar='N', help='stop reading after N matched lines')
+        matching.add_argument('-j', '--jobs', type=int, default=1, metavar='N', help='number of worker processes, defaults to 1')
+        matching.add_argument('--chunk-size', type=int, default=4096, metavar='N', help='number of lines sent to a worker at once, defaults to 4096')
+        matching.add_argument('--unordered', action='store_true', help='allow matched lines from different workers to come out of the input order')
+        matching.add_argument('--stats', action='store_true', help='write per-pattern matching statistics into the standard error at exit, '
+                                                                   'every pattern gets tried on every line in a single process')
+        matching.add_argument('--stats-format', choices=ProfilingPatternSet.formats, default='table', help='statistics format, defaults to "table"')
+
+        output: argparse._ArgumentGroup = parser.add_argument_group('output')
+        output.add_argument('-H', '--with-filename', action='store_true', help='prefix matched lines with the name of their file')
+        output.add_argument('-c', '--count', action='store_true', help='write only the number of matched lines')
+        output.add_argument('-q', '--quiet', action='store_true', help='write nothing and stop at the first match, exit with 0 if any line matched and 1 otherwise')
+        output.add_argument('--format', choices=MatchFormatter.formats, default='line',
+                            help='output format – matched lines, or JSON lines and TSV with the matching pattern index and tokens, defaults to "line"')
+        output.add_argument('--stream', action='store_true', help='write matched lines as soon as they are found, the tty summary goes last')
+        output.add_argument('--flush', choices=LineWriter.policies, default='batch', help='output stream flush policy, defaults to "batch"')
+        output.add_argument('--batch-size', type=int, default=1024, metavar='N', help='number of lines written at once, defaults to 1024')
+
+        (arguments, unknown) = parser.parse_known_args(argv[1:])
+
+        # Patterns used to be plain arguments, those starting with a dash still are unless they look like long options. Patterns keep their
+        # order, the first matching one wins.
+        options: [str] = [argument for argument in unknown if argument.startswith('--')]
+
+        if options:
+            parser.error(f'unrecognized arguments: {" ".join(options)}')
+
+        if unknown:
+            remaining: Counter = Counter(arguments.patterns + unknown)
+            arguments.patterns = []
+
+            for argument in argv[1:]:
+                if remaining[argument] > 0:
+                    remaining[argument] -= 1
+                    arguments.patterns.append(argument)
+
+        return arguments
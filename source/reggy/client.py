@@ -0,0 +1,135 @@
+import errno
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+from typing import BinaryIO, IO, Optional, Tuple
+
+# Socket path of the matcher server, the `REGGY_SOCKET` environment variable overrides the per-user default, which is in the runtime
+# directory private to the user if there's one.
+DEFAULT_PATH: str = os.environ.get('REGGY_SOCKET') or os.path.join(os.environ.get('XDG_RUNTIME_DIR') or os.environ.get('TMPDIR', '/tmp'),
+                                                                   f'reggy-{os.getuid()}.sock')
+
+# The client sends a JSON header line with the command and then the raw standard input until it shuts down writing. The server responds
+# with frames – the channel, the payload size and the payload. Output and error frames carry UTF-8 text, the status frame carries the exit
+# status and ends the response.
+FRAME: struct.Struct = struct.Struct('>cI')
+OUT: bytes = b'o'
+ERR: bytes = b'e'
+STATUS: bytes = b's'
+
+
+def write_frame(connection: socket.socket, channel: bytes, payload: bytes) -> None:
+    connection.sendall(FRAME.pack(channel, len(payload)) + payload)
+
+
+def read_frame(stream: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Reads the next frame and returns its channel and payload, or `None` if the connection got closed.
+    """
+
+    header: bytes = stream.read(FRAME.size)
+
+    if len(header) < FRAME.size:
+        return None
+
+    (channel, size) = FRAME.unpack(header)
+    payload: bytes = stream.read(size)
+    return (channel, payload) if len(payload) == size else None
+
+
+class Client:
+    """
+    Thin client running reggy commands on the matcher server, see `reggy.server`. It imports nothing from reggy itself, so its startup
+    is only the interpreter startup, patterns get compiled once by the server and stay there between runs.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, buffer_size: int = 1 << 16):
+        """
+        :param path: Path to the server socket.
+        :param buffer_size: Maximum number of input bytes sent at once.
+        """
+
+        self.path: str = path
+        self.buffer_size: int = max(buffer_size, 1)
+
+    def run(self, argv: [str], in_stream: IO, out_stream: IO, err_stream: IO) -> int:
+        """
+        Runs the command on the server and returns its status, same as `Cli.run`. The input is forwarded on a background thread while the
+        output is being received. Raises `OSError` if the server can't be reached and `PermissionError` if the socket belongs to another
+        user, who would get the command and its input otherwise.
+        """
+
+        if os.stat(self.path).st_uid != os.getuid():
+            raise PermissionError(errno.EPERM, 'reggy server socket belongs to another user', self.path)
+
+        connection: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            connection.connect(self.path)
+
+            # Relative paths are resolved by the server against the client working directory.
+            header: dict = {'argv': list(argv), 'cwd': os.getcwd(), 'tty': [in_stream.isatty(), out_stream.isatty()]}
+            connection.sendall(json.dumps(header).encode() + b'\n')
+
+            # The input thread doesn't keep the process alive, the command can be done without reading all of it.
+            thread: threading.Thread = threading.Thread(target=self.__send, args=(connection, in_stream), name='reggy-client', daemon=True)
+            thread.start()
+
+            with connection.makefile('rb') as responses:
+                while True:
+                    frame: Optional[Tuple[bytes, bytes]] = read_frame(responses)
+
+                    if frame is None:
+                        raise ConnectionError('reggy server closed the connection before the command was done')
+
+                    (channel, payload) = frame
+
+                    if channel == STATUS:
+                        return int(payload)
+
+                    stream: IO = out_stream if channel == OUT else err_stream
+                    stream.write(payload.decode())
+                    stream.flush()
+        finally:
+            connection.close()
+
+    def __send(self, connection: socket.socket, in_stream: IO) -> None:
+        stream: IO = getattr(in_stream, 'buffer', in_stream)
+        read = getattr(stream, 'read1', stream.read)
+
+        try:
+            while True:
+                chunk: bytes = read(self.buffer_size)
+
+                if not chunk:
+                    break
+
+                connection.sendall(chunk.encode() if isinstance(chunk, str) else chunk)
+
+            connection.shutdown(socket.SHUT_WR)
+        except (OSError, ValueError):
+            # The server stops reading once the command is done, for example at the first match in quiet mode, and the connection gets closed.
+            pass
+
+
+def main(argv: [str], in_stream: IO, out_stream: IO, err_stream: IO) -> int:
+    """
+    Runs the reggy command on the server, or in this process when no server is listening, so scripts work the same either way.
+    """
+
+    try:
+        return Client(DEFAULT_PATH).run(argv, in_stream, out_stream, err_stream)
+    except (FileNotFoundError, ConnectionRefusedError, PermissionError) as exception:
+        if isinstance(exception, PermissionError):
+            err_stream.write(f'reggy: warning: not using the server: {exception}\n')
+
+        # Imported only when needed, this is exactly the startup cost the server saves.
+        from reggy.cli import Cli
+        return Cli().run(argv, in_stream, out_stream, err_stream)
+
+
+if __name__ == '__main__':
+    exit(main(sys.argv, sys.stdin, sys.stdout, sys.stderr))
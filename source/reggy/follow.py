@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import time
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from reggy.input import FileReader, line_spans
+from reggy.output import replaced_file
+
+# Position of the file – the device and inode identifying it, the offset of the first unread byte and the fingerprint of its content.
+Position = Tuple[int, int, int, str]
+
+
+class Checkpoint:
+    """
+    Read positions of files persisted between runs – a JSON object mapping absolute paths of files to their positions, see `Position`.
+    Positions of paths which no longer exist are dropped, their inodes can be reused by unrelated files. Missing or broken checkpoint file
+    is the same as an empty one.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.offsets: Dict[str, Position] = {}
+
+        try:
+            with open(path) as file:
+                self.offsets = {name: (int(device), int(inode), int(offset), str(fingerprint))
+                                for (name, (device, inode, offset, fingerprint)) in json.load(file).items() if os.path.exists(name)}
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def save(self) -> None:
+        """
+        Saves positions, see `replaced_file`.
+        """
+
+        with replaced_file(self.path) as file:
+            json.dump(self.offsets, file, indent=2, sort_keys=True)
+
+
+class FollowReader(FileReader):
+    """
+    Reads only data appended to files since they were last read. Positions are tracked by path along with the device and inode of the file
+    and the fingerprint of its first line – a file replaced with another one, which is what rotation does, truncated below the position or
+    rewritten is read again from the start. A path seen for the first time takes over the position of the file with the same device, inode
+    and fingerprint, so the rotated file is read from where it was left off as long as it's among the paths, for example through a glob
+    pattern, otherwise the rest of it is never read. Plain files are read up to the last complete line, the trailing one might still be
+    being written and is left for the next read. Positions advance with every line iterated over, so lines not iterated over are read by the
+    next run, even when iteration stops in the middle of a chunk. Compressed files can't be read partially and are considered read as long
+    as their device, inode and size stay the same.
+
+    Positions are kept in the checkpoint, if given, so they survive between runs. In follow mode files are polled every `interval` seconds
+    until iteration stops, glob patterns are expanded on every poll to pick up new files, files are kept open and the rest of a rotated file
+    is read before switching to the new one.
+    """
+
+    # Maximum number of bytes of the first line making the fingerprint of the file.
+    fingerprint_size: int = 1024
+
+    def __init__(self, paths: [str], checkpoint: Optional[Checkpoint] = None, follow: bool = False, interval: float = 1.0,
+                 buffer_size: int = 1 << 20):
+        super().__init__(paths, buffer_size)
+
+        self.patterns: [str] = list(paths)
+        self.checkpoint: Optional[Checkpoint] = checkpoint
+        self.follow: bool = follow
+        self.interval: float = interval
+        self.offsets: Dict[str, Position] = checkpoint.offsets if checkpoint is not None else {}
+
+        # Files kept open between polls in follow mode by their absolute paths.
+        self.__files: Dict[str, BinaryIO] = {}
+
+        # Positions of files replaced by other ones at their paths by devices and inodes, and the path and position of the chunk being read,
+        # unless it's a compressed one.
+        self.__rotated: Dict[Tuple[int, int], Position] = {}
+        self.__chunk: Optional[Tuple[str, Position]] = None
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int, int]]:
+        for (path, buffer) in self.buffers():
+            self.path = path
+            chunk: Optional[Tuple[str, Position]] = self.__chunk
+
+            for (start, end) in line_spans(buffer):
+                self.count += 1
+
+                # The line is read once handed out, matching can stop right after it, for example at the first match in quiet mode.
+                if chunk is not None:
+                    (key, (device, inode, offset, fingerprint)) = chunk
+                    self.offsets[key] = (device, inode, offset + min(end + 1, len(buffer)), fingerprint)
+
+                yield (buffer, start, end)
+
+    def buffers(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Yields paths of files along with chunks of appended complete lines, in follow mode polls files until iteration stops. Positions
+        advance past chunks once the next one is requested, the checkpoint is saved after every poll with new data.
+        """
+
+        try:
+            while True:
+                is_idle: bool = True
+
+                for item in self.poll():
+                    is_idle = False
+                    yield item
+
+                if not self.follow:
+                    return
+
+                if is_idle:
+                    time.sleep(self.interval)
+                elif self.checkpoint is not None:
+                    self.checkpoint.save()
+        finally:
+            for file in self.__files.values():
+                file.close()
+
+            self.__files.clear()
+
+    def poll(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Reads all files once and yields paths along with chunks of complete lines appended since the last read.
+        """
+
+        self.paths = self.expand(self.patterns)
+
+        for path in self.paths:
+            yield from self.__poll(path)
+
+    def __poll(self, path: str) -> Iterator[Tuple[str, bytes]]:
+        key: str = os.path.abspath(path)
+        file: Optional[BinaryIO] = self.__files.pop(key, None)
+        status: Optional[os.stat_result] = None
+
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            # Between rotation and creation of the new file there's nothing to read, which is expected when following.
+            if not self.follow:
+                raise
+
+        # The file got rotated, the rest of the old one is read to the very end, the writer is done with it.
+        if file is not None and (status is None or self.identity(os.fstat(file.fileno())) != self.identity(status)):
+            try:
+                yield from self.__read_appended(key, path, file, is_final=True)
+            finally:
+                file.close()
+
+            file = None
+
+        if status is None:
+            return
+
+        if self.is_compressed(path):
+            position: Position = (*self.identity(status), status.st_size, '')
+
+            if self.offsets.get(key) != position:
+                self.__chunk = None
+
+                with self.open_compressed(path) as stream:
+                    for buffer in self.read(stream):
+                        yield (path, buffer)
+
+                self.offsets[key] = position
+
+            return
+
+        file = file or open(path, 'rb')
+
+        try:
+            yield from self.__read_appended(key, path, file)
+        finally:
+            if self.follow:
+                self.__files[key] = file
+            else:
+                file.close()
+
+    def __read_appended(self, key: str, path: str, file: BinaryIO, is_final: bool = False) -> Iterator[Tuple[str, bytes]]:
+        status: os.stat_result = os.fstat(file.fileno())
+        identity: Tuple[int, int] = self.identity(status)
+        position: Optional[Position] = self.offsets.get(key)
+
+        # Another file had this path before, most likely the rotated one, which can still turn up at another path.
+        if position is not None and position[:2] != identity:
+            self.__rotated[position[:2]] = position
+            position = None
+
+        if position is None:
+            position = self.__rotated.get(identity) or next((other for (other_key, other) in self.offsets.items()
+                                                              if other[:2] == identity and other_key != key), None)
+
+        # Positions beyond the end of the truncated file and positions of files with different content, which got rewritten in place or
+        # reuse the inode of a deleted file, are void.
+        if position is not None and position[2] and (position[2] > status.st_size or
+                                                     self.fingerprint(os.pread(file.fileno(), self.fingerprint_size, 0)) != position[3]):
+            position = None
+
+        position = position or (*identity, 0, '')
+
+        (_, _, offset, fingerprint) = position
+        self.offsets[key] = position
+        file.seek(offset)
+
+        for buffer in self.read(file, is_final):
+            # The first line is complete once it's read, its fingerprint doesn't change as the file grows.
+            if not offset:
+                fingerprint = self.fingerprint(buffer[:self.fingerprint_size])
+
+            self.__chunk = (key, (*identity, offset, fingerprint))
+            yield (path, buffer)
+
+            offset += len(buffer)
+            self.offsets[key] = (*identity, offset, fingerprint)
+
+    @staticmethod
+    def identity(status: os.stat_result) -> Tuple[int, int]:
+        """
+        Returns the device and inode identifying the file.
+        """
+
+        return (status.st_dev, status.st_ino)
+
+    @staticmethod
+    def fingerprint(data: bytes) -> str:
+        """
+        Returns the fingerprint of the first line within the data read from the start of the file.
+        """
+
+        end: int = data.find(b'\n')
+        return hashlib.sha256(data[:end + 1] if end != -1 else data).hexdigest()
@@ -0,0 +1,109 @@
+import sys
+from typing import AnyStr, Dict, List, Optional, Sequence, Tuple
+
+
+class LiteralIndex:
+    """
+    Prefilter index over pattern literals. Pattern matches only when the string starts with its leading literal, ends with its trailing one
+    and contains all literals in between, so instead of trying every pattern against the string it's enough to try only those few candidates
+    that satisfy these requirements.
+
+    Patterns with a leading literal are indexed in a prefix trie, the rest with a trailing literal in a suffix trie – walking the trie along
+    the string gives candidates in time proportional to the literal length, not the number of patterns. Plain patterns without captures are
+    looked up by the whole string and patterns without leading and trailing literals are always considered candidates.
+
+    Both string and bytes literals are supported, bytes ones can be looked up in bytes, bytearrays and memory-mapped files, but not in
+    memory views, which have no `find` method. The string is never copied except for small slices compared with literals.
+    """
+
+    # Trie node key under which indices of patterns with literals ending at that node are stored.
+    __terminal: None = None
+
+    def __init__(self, literals: Sequence[Optional[Tuple[AnyStr, ...]]]):
+        """
+        :param literals: Literals of each indexed pattern, see `CompiledPattern.literals`, `None` values are never candidates.
+        """
+
+        self.__exact: Dict[AnyStr, List[int]] = {}
+        self.__prefixes: dict = {}
+        self.__suffixes: dict = {}
+        self.__unanchored: List[int] = []
+
+        # Literals still to be checked for each pattern after the trie lookup: trailing literal and non-empty inner literals.
+        self.__trailing: Dict[int, AnyStr] = {}
+        self.__inner: Dict[int, Tuple[AnyStr, ...]] = {}
+
+        for (index, pattern_literals) in enumerate(literals):
+            if pattern_literals is None:
+                continue
+
+            if len(pattern_literals) == 1:
+                self.__exact.setdefault(pattern_literals[0], []).append(index)
+                continue
+
+            (leading, trailing) = (pattern_literals[0], pattern_literals[-1])
+            self.__inner[index] = tuple(literal for literal in pattern_literals[1:-1] if literal)
+
+            if leading:
+                self.__insert(self.__prefixes, leading, index)
+                self.__trailing[index] = trailing
+            elif trailing:
+                self.__insert(self.__suffixes, trailing[::-1], index)
+            else:
+                self.__unanchored.append(index)
+
+    @classmethod
+    def __insert(cls, trie: dict, literal: AnyStr, index: int) -> None:
+        node: dict = trie
+
+        for character in literal:
+            node = node.setdefault(character, {})
+
+        node.setdefault(cls.__terminal, []).append(index)
+
+    @classmethod
+    def __walk(cls, trie: dict, string: AnyStr, positions: range, indices: List[int]) -> None:
+        node: Optional[dict] = trie
+
+        # Characters are accessed by index, which for bytes-like objects gives integers – same as iterating over bytes literals.
+        for position in positions:
+            node = node.get(string[position])
+
+            if node is None:
+                return
+
+            indices.extend(node.get(cls.__terminal, ()))
+
+    @staticmethod
+    def __key(string: AnyStr) -> AnyStr:
+        """
+        Returns the string as the key of exact literals, slices of mutable buffers like bytearrays are copied, they aren't hashable.
+        """
+
+        return string if isinstance(string, (str, bytes)) else bytes(string)
+
+    def candidates(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> List[int]:
+        """
+        Returns indices of patterns that can match the string in ascending order. Optional `pos` and `endpos` limit the matched part of
+        the string same as with `re.Pattern.fullmatch`.
+        """
+
+        endpos = min(endpos, len(string))
+
+        candidates: List[int] = list(self.__exact.get(self.__key(string[pos:endpos]), ())) if self.__exact else []
+        anchored: List[int] = []
+
+        self.__walk(self.__prefixes, string, range(pos, endpos), anchored)
+        self.__walk(self.__suffixes, string, range(endpos - 1, pos - 1, -1), anchored)
+
+        for index in anchored + self.__unanchored:
+            trailing: Optional[AnyStr] = self.__trailing.get(index)
+
+            if trailing and (endpos - pos < len(trailing) or string[endpos - len(trailing):endpos] != trailing):
+                continue
+
+            if all(string.find(literal, pos, endpos) != -1 for literal in self.__inner[index]):
+                candidates.append(index)
+
+        candidates.sort()
+        return candidates
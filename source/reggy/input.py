@@ -0,0 +1,254 @@
+import bz2
+import glob
+import gzip
+import lzma
+import mmap
+import os
+import queue
+import threading
+from typing import Callable, Dict, IO, Iterator, Optional, Tuple, Union
+
+
+def line_spans(buffer: Union[mmap.mmap, bytes], start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Yields start and end offsets of lines without line breaks within the given range of the buffer, which must be line-aligned.
+    """
+
+    end = len(buffer) if end is None else end
+
+    while start < end:
+        line_end: int = buffer.find(b'\n', start, end)
+
+        if line_end == -1:
+            line_end = end
+
+        yield (start, line_end)
+        start = line_end + 1
+
+
+class LineReader:
+    """
+    Iterates over lines of the text stream without line breaks and counts them. In a tty mode reading stops at the first empty line.
+    """
+
+    def __init__(self, stream: IO, is_tty: bool = False):
+        self.stream: IO = stream
+        self.is_tty: bool = is_tty
+        self.count: int = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self.stream:
+            # The last line might come without the line break.
+            if line[-1:] == '\n':
+                line = line[:-1]
+
+            # In a tty mode allow to exit with an empty line.
+            if self.is_tty and line == '':
+                break
+
+            self.count += 1
+            yield line
+
+
+class MappedFile:
+    """
+    Read-only memory-mapped file. Lines are accessed as spans of the mapped buffer, so they can be matched by bytes regexes without being
+    copied or decoded.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+        with open(path, 'rb') as file:
+            # Empty files can't be mapped, but there's nothing to map anyway.
+            self.buffer: Union[mmap.mmap, bytes] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b''
+
+    def __enter__(self) -> 'MappedFile':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def spans(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        Yields start and end offsets of lines without line breaks within the given range, which must be line-aligned.
+        """
+
+        return line_spans(self.buffer, start, end)
+
+    def chunks(self, size: int) -> Iterator[Tuple[int, int]]:
+        """
+        Yields line-aligned ranges of approximately the given size in bytes.
+        """
+
+        buffer: Union[mmap.mmap, bytes] = self.buffer
+        start: int = 0
+
+        while start < len(buffer):
+            end: int = buffer.find(b'\n', min(start + size, len(buffer)) - 1)
+            end = len(buffer) if end == -1 else end + 1
+
+            yield (start, end)
+            start = end
+
+
+class FileReader:
+    """
+    Iterates over lines of files and counts them. Lines are yielded as buffer and offsets of the line within it, see `MappedFile`. Paths can
+    be glob patterns, which are expanded in sorted order, patterns matching nothing are kept as is and fail when opened.
+
+    Plain files are memory-mapped. Compressed files, recognized by their extension, are decompressed as streams and read in chunks of
+    `buffer_size` bytes, every chunk being a buffer for all complete lines within it. Decompression can run on a background thread ahead
+    of matching – codecs release the GIL, so the next chunks, and the next file once the current one is done, are ready by the time they're
+    needed. Only a few chunks are read ahead, which bounds the memory usage.
+    """
+
+    # Openers of compressed files by extension.
+    codecs: Dict[str, Callable[[str], IO]] = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open, '.lzma': lzma.open}
+
+    # Number of chunks read ahead by the prefetching thread.
+    prefetch_size: int = 4
+
+    # Name attributed to lines of the standard input.
+    stdin_name: str = '(standard input)'
+
+    def __init__(self, paths: [str], buffer_size: int = 1 << 20, prefetch: bool = False):
+        self.paths: [str] = self.expand(paths)
+        self.buffer_size: int = max(buffer_size, 1)
+        self.prefetch: bool = prefetch
+        self.count: int = 0
+
+        # Path of the file currently being read.
+        self.path: Optional[str] = None
+
+    def __iter__(self) -> Iterator[Tuple[Union[mmap.mmap, bytes], int, int]]:
+        for (path, buffer) in self.buffers():
+            self.path = path
+
+            # Plain files come without the buffer and get mapped here, so they're only mapped while being read.
+            if buffer is None:
+                with MappedFile(path) as file:
+                    for (start, end) in file.spans():
+                        self.count += 1
+                        yield (file.buffer, start, end)
+            else:
+                for (start, end) in line_spans(buffer):
+                    self.count += 1
+                    yield (buffer, start, end)
+
+    @staticmethod
+    def expand(paths: [str]) -> [str]:
+        """
+        Expands glob patterns among paths, see the class description.
+        """
+
+        expanded_paths: [str] = []
+
+        for path in paths:
+            expanded: [str] = sorted(glob.glob(path)) if glob.has_magic(path) else []
+            expanded_paths.extend(expanded or [path])
+
+        return expanded_paths
+
+    @classmethod
+    def is_compressed(cls, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in cls.codecs
+
+    def buffers(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Yields paths of files along with chunks of their decompressed content containing only complete lines, plain files are yielded once
+        without the buffer. Chunks are read on the background thread when prefetching is enabled.
+        """
+
+        return self.__prefetch() if self.prefetch else self.__read()
+
+    def read(self, stream: IO, is_final: bool = True) -> Iterator[bytes]:
+        """
+        Reads the binary stream in chunks of about `buffer_size` bytes containing only complete lines, lines split between reads are carried
+        over into the next chunk. The trailing line without the line break is yielded last if the stream is final, otherwise it's left for
+        later – the stream might be still growing and the line incomplete.
+        """
+
+        remainder: bytes = b''
+
+        while True:
+            data: bytes = stream.read(self.buffer_size)
+
+            if not data:
+                break
+
+            data = remainder + data
+            end: int = data.rfind(b'\n')
+
+            if end == -1:
+                remainder = data
+                continue
+
+            (data, remainder) = (data[:end + 1], data[end + 1:])
+            yield data
+
+        if remainder and is_final:
+            yield remainder
+
+    def open_compressed(self, path: str) -> IO:
+        return self.codecs[os.path.splitext(path)[1].lower()](path)
+
+    def __read(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        for path in self.paths:
+            if not self.is_compressed(path):
+                yield (path, None)
+                continue
+
+            with self.open_compressed(path) as stream:
+                for buffer in self.read(stream):
+                    yield (path, buffer)
+
+    def __prefetch(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Yields buffers read on a background thread, reading stops when iteration does.
+        """
+
+        buffers: queue.Queue = queue.Queue(self.prefetch_size)
+        stopped: threading.Event = threading.Event()
+
+        def put(item: object) -> None:
+            while not stopped.is_set():
+                try:
+                    buffers.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def read() -> None:
+            try:
+                for item in self.__read():
+                    put(item)
+
+                    if stopped.is_set():
+                        return
+
+                put(None)
+            except Exception as exception:
+                put(exception)
+
+        thread: threading.Thread = threading.Thread(target=read, name='reggy-prefetch', daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item: object = buffers.get()
+
+                if item is None:
+                    return
+
+                if isinstance(item, Exception):
+                    raise item
+
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
@@ -1,12 +1,292 @@
 import re
-from typing import Dict, List, Match, Optional, Pattern
+import sys
+from typing import AnyStr, Dict, Iterable, Iterator, List, Match, Optional, Pattern, Sequence, Tuple, Union
 
+from reggy.cache import LruCache
+from reggy.index import LiteralIndex
 from reggy.tracer import Tracer
 
 
+# Parsed pattern – the regex source, rule indices of capture groups, literals and modifiers, see `Matcher.parse`.
+ParsedPattern = Tuple[AnyStr, Tuple[int, ...], Tuple[AnyStr, ...], Tuple[str, ...]]
+
+
+class MatchResult:
+    """
+    Compact match result – spans of captured tokens along with their rule indices, both in the order of captures in the pattern. Tokens are
+    sliced from the string only when accessed, so callers interested in offsets or a few tokens don't pay for copying all of them:
+
+        result = Matcher().match_result('foo %{0} baz %{1}', 'foo bar baz qux')
+        result.span(1)      # (12, 15)
+        result.token(0)     # 'bar'
+        result[1]           # ['qux']
+        result.dict()       # {0: ['bar'], 1: ['qux']}
+
+    The result references the matched string, which therefore must not change while the result is in use, same as with `re.Match`.
+    """
+
+    __slots__ = ('string', 'rule_indices', 'spans')
+
+    def __init__(self, string: AnyStr, rule_indices: Tuple[int, ...], spans: Tuple[Tuple[int, int], ...]):
+        self.string: AnyStr = string
+        self.rule_indices: Tuple[int, ...] = rule_indices
+        self.spans: Tuple[Tuple[int, int], ...] = spans
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.dict()!r})'
+
+    def __contains__(self, rule_index: int) -> bool:
+        return rule_index in self.rule_indices
+
+    def __getitem__(self, rule_index: int) -> List[AnyStr]:
+        """
+        Returns all tokens captured for the rule index, raises `KeyError` if there are none.
+        """
+
+        tokens: List[AnyStr] = [self.string[start:end] for (index, (start, end)) in zip(self.rule_indices, self.spans) if index == rule_index]
+
+        if not tokens:
+            raise KeyError(rule_index)
+
+        return tokens
+
+    def span(self, rule_index: int, occurrence: int = 0) -> Tuple[int, int]:
+        """
+        Returns start and end offsets of the token captured for the rule index, the occurrence selects one of multiple tokens with the same
+        rule index. Raises `KeyError` if there's no such token.
+        """
+
+        for (index, span) in zip(self.rule_indices, self.spans):
+            if index == rule_index:
+                if occurrence == 0:
+                    return span
+
+                occurrence -= 1
+
+        raise KeyError(rule_index)
+
+    def token(self, rule_index: int, occurrence: int = 0) -> AnyStr:
+        """
+        Returns the token captured for the rule index, see `span`.
+        """
+
+        (start, end) = self.span(rule_index, occurrence)
+        return self.string[start:end]
+
+    def dict(self) -> Dict[int, List[AnyStr]]:
+        """
+        Returns all tokens organized by rule index, same as `Matcher.match`.
+        """
+
+        tokens: {int: [AnyStr]} = {}
+
+        for (rule_index, (start, end)) in zip(self.rule_indices, self.spans):
+            tokens.setdefault(rule_index, []).append(self.string[start:end])
+
+        return tokens
+
+
+class CompiledPattern:
+    """
+    Reusable compiled pattern – the regex along with the mapping between its capture groups and rule indices, literals surrounding
+    the captures and capture modifiers. There's always one literal more than there are captures, leading and trailing ones can be empty.
+    Modifiers are 'G', 'S#' or empty strings for captures without them.
+
+    The regex is compiled from its source on first use – with the prefilter index most patterns of a large catalog are never tried and
+    compiling regexes for all of them would dominate the startup time.
+
+    Bytes patterns compile into bytes regexes, which match bytes, bytearrays and memory-mapped files, and produce bytes tokens.
+    Note that in bytes mode only ASCII characters are considered whitespace by the space limitation modifier.
+    """
+
+    __slots__ = ('pattern', 'source', 'rule_indices', 'literals', 'modifiers', '__regex')
+
+    def __init__(self, pattern: AnyStr, source: AnyStr, rule_indices: Tuple[int, ...], literals: Tuple[AnyStr, ...], modifiers: Tuple[str, ...]):
+        self.pattern: AnyStr = pattern
+        self.source: AnyStr = source
+        self.rule_indices: Tuple[int, ...] = rule_indices
+        self.literals: Tuple[AnyStr, ...] = literals
+        self.modifiers: Tuple[str, ...] = modifiers
+        self.__regex: Optional[Pattern] = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.pattern!r})'
+
+    @property
+    def regex(self) -> Pattern:
+        if self.__regex is None:
+            self.__regex = re.compile(self.source)
+
+        return self.__regex
+
+    def match(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Dict[int, List[AnyStr]]]:
+        """
+        Finds tokens in the string and returns them organized by rule index, see `Matcher.match` for details. Optional `pos` and `endpos`
+        limit the matched part of the string same as with `re.Pattern.fullmatch`.
+        """
+
+        match: Match = self.regex.fullmatch(string, pos, endpos)
+
+        # No match – no profit.
+        if match is None:
+            return None
+
+        return self.tokens(match)
+
+    def match_result(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[MatchResult]:
+        """
+        Same as `match`, but returns the lazily materialized result, see `MatchResult`.
+        """
+
+        match: Match = self.regex.fullmatch(string, pos, endpos)
+
+        if match is None:
+            return None
+
+        return self.result(match)
+
+    def matches(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> bool:
+        """
+        Checks whether the string matches the pattern without extracting tokens.
+        """
+
+        return self.regex.fullmatch(string, pos, endpos) is not None
+
+    def tokens(self, match: Match, offset: int = 1) -> Dict[int, List[AnyStr]]:
+        """
+        Collects tokens from the regex match organized by rule index. The offset is the number of the first capture group that belongs to
+        the pattern, which is not the first one when the pattern is a part of a bigger regex.
+        """
+
+        tokens: {int: [str]} = {}
+
+        # Capture groups go in the same order as rule indices, zero-group representing the full match isn't included.
+        for rule_index, group in zip(self.rule_indices, range(offset, offset + len(self.rule_indices))):
+            tokens.setdefault(rule_index, []).append(match[group])
+
+        return tokens
+
+    def result(self, match: Match, offset: int = 1) -> MatchResult:
+        """
+        Wraps spans of the regex match into the match result, see `tokens` for the offset.
+        """
+
+        return MatchResult(match.string, self.rule_indices, match.regs[offset:offset + len(self.rule_indices)])
+
+
+class LiteralPattern(CompiledPattern):
+    """
+    Compiled pattern evaluated by searching for literals with `find` and `rfind` instead of the regex. A non-greedy capture followed by
+    a literal is the same as searching forward for the next occurrence of that literal, a greedy one – as searching backward from the latest
+    occurrence after which the rest of the pattern can still match. Both take linear time and never backtrack.
+
+    Space limitation modifiers can't be expressed this way, patterns with them must stay with the regex. Strings containing line breaks,
+    which the regex doesn't capture, fall back to the regex too.
+    """
+
+    __slots__ = ('greedy', 'line_break')
+
+    def __init__(self, pattern: AnyStr, source: AnyStr, rule_indices: Tuple[int, ...], literals: Tuple[AnyStr, ...], modifiers: Tuple[str, ...]):
+        super().__init__(pattern, source, rule_indices, literals, modifiers)
+        self.greedy: Tuple[bool, ...] = tuple(modifier == 'G' for modifier in modifiers)
+        self.line_break: AnyStr = b'\n' if isinstance(pattern, bytes) else '\n'
+
+    def match(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Dict[int, List[AnyStr]]]:
+        if self.rule_indices and string.find(self.line_break, pos, endpos) != -1:
+            return super().match(string, pos, endpos)
+
+        spans: Optional[Tuple[Tuple[int, int], ...]] = self.__spans(string, pos, min(endpos, len(string)))
+
+        if spans is None:
+            return None
+
+        tokens: {int: [AnyStr]} = {}
+
+        for (rule_index, (start, end)) in zip(self.rule_indices, spans):
+            tokens.setdefault(rule_index, []).append(string[start:end])
+
+        return tokens
+
+    def match_result(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[MatchResult]:
+        if self.rule_indices and string.find(self.line_break, pos, endpos) != -1:
+            return super().match_result(string, pos, endpos)
+
+        spans: Optional[Tuple[Tuple[int, int], ...]] = self.__spans(string, pos, min(endpos, len(string)))
+        return MatchResult(string, self.rule_indices, spans) if spans is not None else None
+
+    def matches(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> bool:
+        if self.rule_indices and string.find(self.line_break, pos, endpos) != -1:
+            return super().matches(string, pos, endpos)
+
+        return self.__spans(string, pos, min(endpos, len(string))) is not None
+
+    def __spans(self, string: AnyStr, pos: int, endpos: int) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """
+        Finds spans of captures in the string without line breaks, see the class description.
+        """
+
+        literals: Tuple[AnyStr, ...] = self.literals
+        count: int = len(self.rule_indices)
+
+        if count == 0:
+            return () if string[pos:endpos] == literals[0] else None
+
+        # The leading literal must be the prefix, the trailing one – the suffix, and they can't overlap with the first and last captures.
+        start: int = pos + len(literals[0])
+        stop: int = endpos - len(literals[-1])
+
+        if stop <= start or string[pos:start] != literals[0] or string[stop:endpos] != literals[-1]:
+            return None
+
+        # Latest positions of literals after which the rest of the pattern can still match, every capture takes at least one character.
+        latest: List[int] = [0] * count + [stop]
+
+        for index in range(count - 1, 0, -1):
+            latest[index] = string.rfind(literals[index], start, latest[index + 1] - 1)
+
+            if latest[index] == -1:
+                return None
+
+        spans: List[Tuple[int, int]] = []
+        position: int = start
+
+        for index in range(1, count + 1):
+            literal: AnyStr = literals[index]
+
+            if index == count:
+                found: int = stop if stop > position else -1
+            elif self.greedy[index - 1]:
+                found = string.rfind(literal, position + 1, latest[index] + len(literal))
+            else:
+                found = string.find(literal, position + 1, latest[index] + len(literal))
+
+            if found == -1:
+                return None
+
+            spans.append((position, found))
+            position = found + len(literal)
+
+        return tuple(spans)
+
+
 class Matcher:
 
-    @Tracer.trace()
+    # Available matching engines, see `LiteralPattern` for details about the literal one.
+    engines: [str] = ['regex', 'literal']
+
+    def __init__(self, cache_size: int = 256, engine: str = 'regex'):
+        """
+        :param cache_size: Maximum number of compiled patterns kept in the cache, zero disables caching.
+        :param engine: Matching engine, the literal engine is used for patterns without space limitation modifiers and otherwise the regex.
+        """
+
+        if engine not in self.engines:
+            raise ValueError(f'Unknown engine {engine!r}, expected one of: {", ".join(self.engines)}.')
+
+        self.cache: LruCache = LruCache(cache_size)
+        self.engine: str = engine
+
+    @Tracer.trace(hot=True)
     def match(self, pattern: str, string: str) -> Optional[Dict[int, List[str]]]:
         """
         Finds tokens in the string matched with the given pattern and returns them organized by rule index. For example:
@@ -45,26 +325,142 @@ class Matcher:
         if not pattern:
             return None
 
-        (regex, rule_indices) = self.__parse_regex(pattern)
-        match: Match = regex.fullmatch(string)
+        return self.compile(pattern).match(string)
 
-        # No match – no profit.
-        if match is None:
+    def match_result(self, pattern: AnyStr, string: AnyStr) -> Optional[MatchResult]:
+        """
+        Same as `match`, but returns the lazily materialized result with token spans, see `MatchResult`.
+        """
+
+        if not pattern:
             return None
 
-        tokens: {int: [str]} = {}
+        return self.compile(pattern).match_result(string)
+
+    def match_many(self, patterns: Union[str, Sequence[str], 'PatternSet'], lines: Iterable[str]) -> Iterator[Tuple[int, Dict[int, List[str]]]]:
+        """
+        Lazily matches lines against the pattern or the set of patterns and yields indices of matched lines along with their tokens organized
+        by rule index. Patterns are compiled once and matched directly, bypassing the per-call overhead of `match`. For example:
+
+            match_many('foo %{0}', ['foo bar', 'baz', 'foo qux'])            # (0, {0: ['bar']}), (2, {0: ['qux']})
+            match_many(['foo %{0}', 'baz %{0}'], ['foo bar', 'baz qux'])     # (0, {0: ['bar']}), (1, {0: ['qux']})
+        """
 
-        # Make sure match contains groups.
-        if match.lastindex is not None:
-            for i in range(match.lastindex):
-                # Not forgetting that zero-group represents the full match and the one we're interested in would be +1…
-                tokens.setdefault(rule_indices.pop(0), []).append(match[i + 1])
+        if isinstance(patterns, str):
+            if not patterns:
+                return
 
-        return tokens
+            compiled: CompiledPattern = self.compile(patterns)
 
-    def __parse_regex(self, pattern: str) -> (Pattern, [int]):
+            for (index, line) in enumerate(lines):
+                tokens: Optional[Dict[int, List[str]]] = compiled.match(line)
+
+                if tokens is not None:
+                    yield (index, tokens)
+
+            return
+
+        pattern_set: PatternSet = patterns if isinstance(patterns, PatternSet) else PatternSet(patterns, self)
+
+        for (index, line) in enumerate(lines):
+            result: Optional[Tuple[int, Dict[int, List[str]]]] = pattern_set.match(line)
+
+            if result is not None:
+                yield (index, result[1])
+
+    def filter_lines(self, patterns: Union[str, Sequence[str], 'PatternSet'], lines: Iterable[str]) -> Iterator[int]:
         """
-        Parses the given pattern string into a compiled regex pattern object and a mapping between capture group and rule indices.
+        Lazily matches lines against the pattern or the set of patterns and yields indices of matched lines, tokens are never extracted.
+        """
+
+        if isinstance(patterns, str):
+            if not patterns:
+                return
+
+            matches = self.compile(patterns).matches
+            yield from (index for (index, line) in enumerate(lines) if matches(line))
+            return
+
+        pattern_set: PatternSet = patterns if isinstance(patterns, PatternSet) else PatternSet(patterns, self)
+        yield from (index for (index, line) in enumerate(lines) if pattern_set.matches(line))
+
+    def analyze(self, pattern: AnyStr, backtracking: bool = False) -> List[str]:
+        """
+        Statically checks the pattern for ambiguous shapes, which either make the split between captures depend on subtle matching rules or
+        make the regex backtrack super-linearly on long lines, and returns warnings describing them. For example:
+
+            analyze('foo %{0}%{1}')         # ['captures %{0} and %{1} are adjacent without a literal between them…']
+            analyze('foo %{0S1} %{1}')      # ['captures %{0} and %{1} are separated only by whitespace and…']
+
+        :param backtracking: Whether to also warn about regex patterns with three or more captures, which can backtrack polynomially on
+            adversarial lines with repeated literals, but are perfectly fine on typical input.
+        """
+
+        if not pattern:
+            return []
+
+        compiled: CompiledPattern = self.compile(pattern)
+        warnings: [str] = []
+
+        for index in range(1, len(compiled.rule_indices)):
+            captures: str = f'captures %{{{compiled.rule_indices[index - 1]}}} and %{{{compiled.rule_indices[index]}}}'
+            literal: AnyStr = compiled.literals[index]
+            is_space_limited: bool = compiled.modifiers[index - 1].startswith('S') or compiled.modifiers[index].startswith('S')
+
+            if not literal:
+                warnings.append(f'{captures} are adjacent without a literal between them, the split between them is ambiguous')
+            elif is_space_limited and not literal.strip():
+                warnings.append(f'{captures} are separated only by whitespace and one of them is space-limited, which can backtrack '
+                                f'super-linearly on whitespace-heavy lines')
+
+        # Every unbounded capture multiplies the number of splits the regex might try on lines with repeated literals.
+        if backtracking and not isinstance(compiled, LiteralPattern) and len(compiled.rule_indices) >= 3:
+            advice: str = 'consider the literal engine' if not any(compiled.modifiers) else 'consider fewer captures or longer literals'
+            warnings.append(f'{len(compiled.rule_indices)} captures can make the regex backtrack polynomially on long lines, {advice}')
+
+        return warnings
+
+    def compile(self, pattern: AnyStr, parsed: Optional[ParsedPattern] = None) -> CompiledPattern:
+        """
+        Compiles the pattern into a reusable object, see `match` for pattern syntax. Compiled patterns are kept in the size-bounded
+        least recently used cache, so repeated compilation of the same pattern is cheap. Bytes patterns produce bytes regexes.
+
+        :param parsed: Result of `parse` for this pattern saved earlier, for example in a compiled catalog, which is used instead of parsing
+            the pattern again.
+        """
+
+        compiled: Optional[CompiledPattern] = self.cache.get(pattern)
+
+        if compiled is None:
+            (source, rule_indices, literals, modifiers) = parsed or self.parse(pattern)
+
+            if self.engine == 'literal' and not any(modifier.startswith('S') for modifier in modifiers):
+                compiled = LiteralPattern(pattern, source, rule_indices, literals, modifiers)
+            else:
+                compiled = CompiledPattern(pattern, source, rule_indices, literals, modifiers)
+
+            self.cache.put(pattern, compiled)
+
+        return compiled
+
+    def parse(self, pattern: AnyStr) -> ParsedPattern:
+        """
+        Parses the pattern into the regex source, rule indices of its capture groups, literals and modifiers, see `CompiledPattern`.
+        The result consists only of plain values and doesn't depend on the engine, so it can be saved and passed to `compile` later.
+        """
+
+        if isinstance(pattern, bytes):
+            # Latin-1 maps every byte onto the character with the same code and back, so the pattern survives the round trip intact.
+            (source, rule_indices, literals, modifiers) = self.__parse_regex(pattern.decode('latin-1'))
+            return (source.encode('latin-1'), rule_indices, tuple(literal.encode('latin-1') for literal in literals), modifiers)
+
+        return self.__parse_regex(pattern)
+
+    def __parse_regex(self, pattern: str) -> (str, Tuple[int, ...], Tuple[str, ...], Tuple[str, ...]):
+        """
+        Parses the given pattern string into a regex string, a mapping between capture group and rule indices, literals between captures
+        and capture modifiers, which are empty strings for captures without them. The regex is meant to be used with `fullmatch` and
+        therefore isn't anchored.
         """
 
         # Find patterns. Pattern consists of a rule index and optional space limit or greediness flag.
@@ -72,14 +468,16 @@ class Matcher:
 
         # If didn't find any patterns convert the whole string into a plain regex.
         if not matches:
-            return (re.compile(re.escape(pattern)), [])
+            return (re.escape(pattern), (), (pattern,), ())
 
         raw_pattern: str = pattern
-        regex_pattern: str = '^'
+        regex_pattern: str = ''
         index: int = 0
 
         # Map between matched groups and pattern rule indices.
         match_group_rule_index_map: [int] = []
+        literals: [str] = []
+        modifiers: [str] = []
 
         # Iterate over all matches and construct regex patterns merging them with adjacent literals (on the left) into the final result.
         for match in matches:
@@ -87,7 +485,8 @@ class Matcher:
             space_limit = match['space_limit']
             is_greedy = match['is_greedy']
 
-            regex_pattern += re.escape(raw_pattern[index:match.start()])
+            literals.append(raw_pattern[index:match.start()])
+            regex_pattern += re.escape(literals[-1])
 
             if space_limit is None:
                 # Simple any non-empty text match.
@@ -103,10 +502,194 @@ class Matcher:
             # Finalize the regex group and map the match group index to the rule index.
             regex_pattern += ')'
             match_group_rule_index_map.append(int(rule))
+            modifiers.append('G' if is_greedy else f'S{space_limit}' if space_limit is not None else '')
 
             index = match.end()
 
         # Close the final pattern.
-        regex_pattern += re.escape(raw_pattern[index:]) + '$'
+        literals.append(raw_pattern[index:])
+        regex_pattern += re.escape(literals[-1])
+
+        return (regex_pattern, tuple(match_group_rule_index_map), tuple(literals), tuple(modifiers))
+
+
+class PatternSet:
+    """
+    Matches a string against multiple patterns in a single pass. All patterns are combined into one regex alternation with a named group per
+    pattern, which preserves the order of patterns and therefore the first matching pattern wins, same as trying them one by one.
+
+    Large catalogs are better served by the literal prefilter index instead – the combined regex still tries every alternative, while the
+    index narrows patterns down to a few candidates by their literals and only those are matched one by one. With the literal engine
+    patterns are always matched one by one through the index.
+    """
+
+    # Number of patterns starting from which the prefilter index is used by default.
+    prefilter_threshold: int = 32
+
+    def __init__(self, patterns: [str], matcher: Optional[Matcher] = None, prefilter: Optional[bool] = None, binary: bool = False,
+                 max_length: int = 0, index: Optional[LiteralIndex] = None):
+        """
+        :param patterns: Patterns to match, see `Matcher.match` for the syntax. Empty patterns never match anything.
+        :param matcher: Matcher used for compiling patterns, a new one is created if not provided.
+        :param prefilter: Whether to use the literal prefilter index, by default it's used when there are at least `prefilter_threshold`
+            patterns.
+        :param binary: Whether to match bytes, bytearrays and memory-mapped files instead of strings, string patterns get encoded as UTF-8.
+            Memory views aren't supported, the prefilter index and the literal engine search them with the `find` method they don't have.
+        :param max_length: Strings longer than this are skipped without matching and counted in `skipped`, which bounds the worst-case
+            matching time on untrusted input. Zero disables the limit.
+        :param index: Prefilter index built earlier over literals of the same patterns, for example loaded from a compiled catalog, which
+            is used instead of building a new one.
+        """
+
+        matcher = matcher or Matcher()
+
+        self.max_length: int = max_length
+        self.skipped: int = 0
+
+        if binary:
+            patterns = [pattern.encode() if isinstance(pattern, str) else pattern for pattern in patterns]
+
+        self.patterns: Tuple[AnyStr, ...] = tuple(patterns)
+        self.compiled: Tuple[Optional[CompiledPattern], ...] = tuple(matcher.compile(pattern) if pattern else None for pattern in self.patterns)
+        self.index: Optional[LiteralIndex] = None
+        self.regex: Optional[Pattern] = None
+
+        if prefilter or prefilter is None and len(self.patterns) >= self.prefilter_threshold or matcher.engine == 'literal':
+            self.index = index or LiteralIndex([compiled.literals if compiled is not None else None for compiled in self.compiled])
+            return
+
+        # Map between alternative group names and pattern indices with their first capture group number.
+        self.__groups: Dict[str, Tuple[int, int]] = {}
+
+        alternatives: [str] = []
+        group: int = 1
+
+        for index, compiled in enumerate(self.compiled):
+            if compiled is None:
+                continue
+
+            name: str = f'p{index}'
+            alternatives.append(f'(?P<{name}>{compiled.source.decode("latin-1") if binary else compiled.source})')
+            self.__groups[name] = (index, group + 1)
+            group += 1 + len(compiled.rule_indices)
+
+        if alternatives:
+            regex: str = '|'.join(alternatives)
+            self.regex = re.compile(regex.encode('latin-1') if binary else regex)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def candidates(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> List[int]:
+        """
+        Returns indices of patterns worth trying on the string one by one in ascending order – ones narrowed down by the prefilter index or
+        all non-empty patterns without it. Strings over the length limit have no candidates and are counted in `skipped`.
+        """
+
+        if self.max_length and self.__skip(string, pos, endpos):
+            return []
+
+        if self.index is not None:
+            return self.index.candidates(string, pos, endpos)
+
+        return [index for (index, compiled) in enumerate(self.compiled) if compiled is not None]
+
+    @Tracer.trace(hot=True)
+    def matches(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> bool:
+        """
+        Checks whether the string matches at least one pattern without extracting tokens.
+        """
+
+        if self.max_length and self.__skip(string, pos, endpos):
+            return False
+
+        if self.index is not None:
+            return any(self.compiled[index].matches(string, pos, endpos) for index in self.index.candidates(string, pos, endpos))
+
+        return self.regex is not None and self.regex.fullmatch(string, pos, endpos) is not None
+
+    def first(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[int]:
+        """
+        Returns the index of the first pattern matching the string without extracting tokens, or `None` if no pattern matches the string.
+        """
+
+        if self.max_length and self.__skip(string, pos, endpos):
+            return None
+
+        if self.index is not None:
+            for index in self.index.candidates(string, pos, endpos):
+                if self.compiled[index].matches(string, pos, endpos):
+                    return index
+
+            return None
+
+        match: Optional[Match] = self.regex.fullmatch(string, pos, endpos) if self.regex is not None else None
+        return self.__groups[match.lastgroup][0] if match is not None else None
+
+    @Tracer.trace(hot=True)
+    def match(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, Dict[int, List[AnyStr]]]]:
+        """
+        Finds the first pattern matching the string and returns its index along with the tokens organized by rule index, or `None` if no
+        pattern matches the string. Optional `pos` and `endpos` limit the matched part of the string same as with `re.Pattern.fullmatch`.
+        """
+
+        if self.max_length and self.__skip(string, pos, endpos):
+            return None
+
+        if self.index is not None:
+            for index in self.index.candidates(string, pos, endpos):
+                tokens: Optional[Dict[int, List[AnyStr]]] = self.compiled[index].match(string, pos, endpos)
+
+                if tokens is not None:
+                    return (index, tokens)
+
+            return None
+
+        if self.regex is None:
+            return None
+
+        match: Match = self.regex.fullmatch(string, pos, endpos)
+
+        if match is None:
+            return None
+
+        # The alternative group encloses all pattern groups and therefore is always the last one to get closed.
+        (index, offset) = self.__groups[match.lastgroup]
+        return (index, self.compiled[index].tokens(match, offset))
+
+    @Tracer.trace(hot=True)
+    def match_result(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, MatchResult]]:
+        """
+        Same as `match`, but returns the lazily materialized result with token spans, see `MatchResult`.
+        """
+
+        if self.max_length and self.__skip(string, pos, endpos):
+            return None
+
+        if self.index is not None:
+            for index in self.index.candidates(string, pos, endpos):
+                result: Optional[MatchResult] = self.compiled[index].match_result(string, pos, endpos)
+
+                if result is not None:
+                    return (index, result)
+
+            return None
+
+        match: Optional[Match] = self.regex.fullmatch(string, pos, endpos) if self.regex is not None else None
+
+        if match is None:
+            return None
+
+        (index, offset) = self.__groups[match.lastgroup]
+        return (index, self.compiled[index].result(match, offset))
+
+    def __skip(self, string: AnyStr, pos: int, endpos: int) -> bool:
+        """
+        Checks whether the string is over the length limit and counts it as skipped.
+        """
+
+        if min(endpos, len(string)) - pos <= self.max_length:
+            return False
 
-        return (re.compile(regex_pattern), match_group_rule_index_map)
+        self.skipped += 1
+        return True
@@ -0,0 +1,88 @@
+import sys
+from typing import AnyStr, Dict, List, Optional, Tuple
+
+from reggy.cache import LruCache
+from reggy.matcher import MatchResult, PatternSet
+
+# Marker object used to distinguish lines missing from the cache from cached non-matches.
+_missing: object = object()
+
+
+class MemoizingPatternSet(PatternSet):
+    """
+    Pattern set that remembers which pattern matched each distinct line, or that none did, in the bounded cache keyed on the line content.
+    Repeated lines, like heartbeats or recurring errors, are matched only against the remembered pattern to extract tokens, and repeated
+    non-matching lines aren't matched at all. Results are the same as with the plain pattern set. Every line costs a cache lookup and lines
+    matched within a larger buffer get copied for the key, so it pays off only on repetitive input, the cache hit rate tells how much.
+    Lines over the length limit are skipped before the lookup and never get cached.
+    """
+
+    def __init__(self, *args, cache_size: int = 65536, cache_policy: str = 'lru', **kwargs):
+        """
+        Takes the same arguments as `PatternSet` along with:
+
+        :param cache_size: Maximum number of distinct lines remembered.
+        :param cache_policy: Eviction policy of the cache, see `LruCache`.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.cache: LruCache = LruCache(cache_size, cache_policy)
+
+    def matches(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> bool:
+        key: Optional[AnyStr] = self.__key(string, pos, endpos)
+
+        if key is None:
+            return super().matches(string, pos, endpos)
+
+        index: Optional[int] = self.cache.get(key, _missing)
+
+        if index is _missing:
+            index = self.first(string, pos, endpos)
+            self.cache.put(key, index)
+
+        return index is not None
+
+    def match(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, Dict[int, List[AnyStr]]]]:
+        key: Optional[AnyStr] = self.__key(string, pos, endpos)
+
+        if key is None:
+            return super().match(string, pos, endpos)
+
+        index: Optional[int] = self.cache.get(key, _missing)
+
+        if index is _missing:
+            result: Optional[Tuple[int, Dict[int, List[AnyStr]]]] = super().match(string, pos, endpos)
+            self.cache.put(key, result[0] if result is not None else None)
+            return result
+
+        # The remembered pattern is the first one matching this content, matching it alone gives the same tokens as matching all of them.
+        return (index, self.compiled[index].match(string, pos, endpos)) if index is not None else None
+
+    def match_result(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, MatchResult]]:
+        key: Optional[AnyStr] = self.__key(string, pos, endpos)
+
+        if key is None:
+            return super().match_result(string, pos, endpos)
+
+        index: Optional[int] = self.cache.get(key, _missing)
+
+        if index is _missing:
+            result: Optional[Tuple[int, MatchResult]] = super().match_result(string, pos, endpos)
+            self.cache.put(key, result[0] if result is not None else None)
+            return result
+
+        return (index, self.compiled[index].match_result(string, pos, endpos)) if index is not None else None
+
+    def __key(self, string: AnyStr, pos: int, endpos: int) -> Optional[AnyStr]:
+        """
+        Returns the content of the line used as the cache key, or `None` if the line is over the length limit and must not be looked up.
+        Buffers, like memory maps, are always copied, they're compared by identity and the cache would keep them alive.
+        """
+
+        if self.max_length and min(endpos, len(string)) - pos > self.max_length:
+            return None
+
+        if not isinstance(string, (str, bytes)):
+            return bytes(string[pos:endpos])
+
+        return string[pos:endpos] if pos or endpos < len(string) else string
@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import AnyStr, Dict, IO, Iterator, List, Optional, Tuple
+
+from reggy.matcher import PatternSet
+
+
+@contextmanager
+def replaced_file(path: str, mode: str = 'w') -> Iterator[IO]:
+    """
+    Opens the temporary file next to the path for writing and replaces the file with it once written. The file is replaced atomically, so
+    interrupted or concurrent runs never see it half-written, and it stays as it was if writing fails.
+    """
+
+    temporary_path: str = f'{path}.{os.getpid()}.tmp'
+
+    try:
+        with open(temporary_path, mode) as file:
+            yield file
+
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+class LineWriter:
+    """
+    Buffered line writer. Lines are collected into batches and each batch is written into the stream with a single call, the stream gets
+    flushed according to the flush policy:
+
+        line  – every line is written and flushed immediately, useful for interactive use and low-latency pipelines;
+        batch – every full batch is written and flushed;
+        end   – full batches are written, but the stream is flushed only when the writer gets closed.
+    """
+
+    policies: [str] = ['line', 'batch', 'end']
+
+    def __init__(self, stream: IO, batch_size: int = 1024, flush: str = 'batch'):
+        if flush not in self.policies:
+            raise ValueError(f'Unknown flush policy {flush!r}, expected one of: {", ".join(self.policies)}.')
+
+        self.stream: IO = stream
+        self.batch_size: int = 1 if flush == 'line' else max(batch_size, 1)
+        self.flush_policy: str = flush
+        self.__lines: List[str] = []
+
+    def write(self, line: str) -> None:
+        """
+        Adds the line without the line break to the current batch and writes the batch if it's full.
+        """
+
+        self.__lines.append(line)
+
+        if len(self.__lines) >= self.batch_size:
+            self.flush(self.flush_policy != 'end')
+
+    def flush(self, flush_stream: bool = True) -> None:
+        """
+        Writes the current batch into the stream and optionally flushes it.
+        """
+
+        if self.__lines:
+            self.stream.write('\n'.join(self.__lines) + '\n')
+            self.__lines.clear()
+
+        if flush_stream:
+            self.stream.flush()
+
+    def close(self) -> None:
+        """
+        Writes the remaining lines and flushes the stream, the stream itself is left open.
+        """
+
+        self.flush()
+
+
+class MatchFormatter:
+    """
+    Matches lines and formats matched ones for the output:
+
+        line – the matched line as is;
+        json – JSON object with the index of the matching pattern, tokens organized by rule index and the line itself, for example:
+               `{"pattern": 0, "tokens": {"0": ["bar"], "1": ["qux"]}, "line": "foo bar baz qux"}`;
+        tsv  – the index of the matching pattern followed by tokens ordered by rule index and then by their position, separated with tabs.
+               Tabs, line breaks and backslashes within tokens are escaped with backslashes.
+
+    Tokens are extracted only when the format needs them. Lines can be attributed to the file they come from, the path is prepended
+    to the line followed by a colon, added as the first TSV column or as the "file" JSON field.
+    """
+
+    formats: [str] = ['line', 'json', 'tsv']
+
+    # Escape sequences of characters which would break TSV columns and rows.
+    __tsv_escapes: Dict[int, str] = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+    def __init__(self, format: str = 'line'):
+        if format not in self.formats:
+            raise ValueError(f'Unknown format {format!r}, expected one of: {", ".join(self.formats)}.')
+
+        self.format: str = format
+        self.__encoder: json.JSONEncoder = json.JSONEncoder(ensure_ascii=False)
+
+    def match(self, pattern_set: PatternSet, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize, path: Optional[str] = None) -> Optional[str]:
+        """
+        Matches the string against the pattern set and returns the formatted output, or `None` if the string doesn't match. Bytes strings are
+        decoded as UTF-8 only when they match.
+        """
+
+        if self.format == 'line':
+            if not pattern_set.matches(string, pos, endpos):
+                return None
+
+            return f'{path}:{self.decode(string, pos, endpos)}' if path is not None else self.decode(string, pos, endpos)
+
+        result: Optional[Tuple[int, Dict[int, List[AnyStr]]]] = pattern_set.match(string, pos, endpos)
+
+        if result is None:
+            return None
+
+        (index, tokens) = result
+
+        if self.format == 'json':
+            tokens = {rule: [self.decode(token) for token in rule_tokens] for (rule, rule_tokens) in tokens.items()}
+            output: dict = {'pattern': index, 'tokens': tokens, 'line': self.decode(string, pos, endpos)}
+
+            if path is not None:
+                output['file'] = path
+
+            return self.__encoder.encode(output)
+
+        columns: [str] = [path.translate(self.__tsv_escapes)] if path is not None else []
+        columns.append(str(index))
+        columns.extend(self.decode(token).translate(self.__tsv_escapes) for rule in sorted(tokens) for token in tokens[rule])
+        return '\t'.join(columns)
+
+    @staticmethod
+    def decode(string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> str:
+        """
+        Returns the part of the string limited by positions, bytes-like objects are decoded as UTF-8 with invalid sequences replaced.
+        """
+
+        # Buffers like memory maps are always sliced into bytes, even when the line takes the whole buffer.
+        if pos or endpos < len(string) or not isinstance(string, (str, bytes)):
+            string = string[pos:endpos]
+
+        return string.decode(errors='replace') if isinstance(string, bytes) else string
@@ -0,0 +1,223 @@
+import mmap
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from reggy.input import FileReader, MappedFile, line_spans
+from reggy.matcher import Matcher, PatternSet
+from reggy.memo import MemoizingPatternSet
+from reggy.output import MatchFormatter
+
+# Result of a chunk – the number of lines, counts of skipped lines and result cache hits and misses, and formatted matched lines.
+ChunkResult = Tuple[int, int, int, int, List[str]]
+
+# Pattern sets compiled once per worker process with the first chunk, the binary one is used for files, and options they were compiled with.
+_options: Optional[tuple] = None
+_pattern_set: Optional[PatternSet] = None
+_binary_pattern_set: Optional[PatternSet] = None
+_formatter: Optional[MatchFormatter] = None
+_with_filename: bool = False
+
+
+def _initialize(patterns: [str], engine: str, max_length: int, format: str, with_filename: bool, cache_size: int = 0,
+                cache_policy: str = 'lru') -> None:
+    global _pattern_set, _binary_pattern_set, _formatter, _with_filename
+    pattern_set_type: type = MemoizingPatternSet if cache_size else PatternSet
+    options: dict = {'max_length': max_length, **({'cache_size': cache_size, 'cache_policy': cache_policy} if cache_size else {})}
+    _pattern_set = pattern_set_type(patterns, Matcher(engine=engine), **options)
+    _binary_pattern_set = pattern_set_type(patterns, Matcher(engine=engine), binary=True, **options)
+    _formatter = MatchFormatter(format)
+    _with_filename = with_filename
+
+
+def _execute(options: tuple, function: Callable, *args) -> ChunkResult:
+    """
+    Compiles pattern sets with the options unless the worker process already has them and executes the function. Pool initializers, which
+    would do it once per process, are available only since Python 3.7.
+    """
+
+    global _options
+
+    if options != _options:
+        _initialize(*options)
+        _options = options
+
+    return function(*args)
+
+
+def _reset(pattern_set: PatternSet) -> None:
+    """
+    Resets counters of the pattern set, which are reported per chunk. Cached results are kept for later chunks.
+    """
+
+    pattern_set.skipped = 0
+
+    if isinstance(pattern_set, MemoizingPatternSet):
+        pattern_set.cache.hits = pattern_set.cache.misses = 0
+
+
+def _result(pattern_set: PatternSet, count: int, outputs: List[str]) -> ChunkResult:
+    (hits, misses) = (pattern_set.cache.hits, pattern_set.cache.misses) if isinstance(pattern_set, MemoizingPatternSet) else (0, 0)
+    return (count, pattern_set.skipped, hits, misses, outputs)
+
+
+def _match(lines: List[str]) -> ChunkResult:
+    _reset(_pattern_set)
+    outputs: List[str] = []
+
+    path: Optional[str] = FileReader.stdin_name if _with_filename else None
+
+    for line in lines:
+        output: Optional[str] = _formatter.match(_pattern_set, line, path=path)
+
+        if output is not None:
+            outputs.append(output)
+
+    return _result(_pattern_set, len(lines), outputs)
+
+
+def _match_range(path: str, start: int, end: int, buffer: Optional[bytes] = None) -> ChunkResult:
+    """
+    Matches lines within the range of the memory-mapped file or of the buffer with decompressed content of the file, if given.
+    """
+
+    if buffer is not None:
+        return _match_buffer(path, buffer, start, end)
+
+    with MappedFile(path) as file:
+        return _match_buffer(path, file.buffer, start, end)
+
+
+def _match_buffer(path: str, buffer: Union[mmap.mmap, bytes], start: int, end: int) -> ChunkResult:
+    _reset(_binary_pattern_set)
+    count: int = 0
+    outputs: List[str] = []
+
+    for (line_start, line_end) in line_spans(buffer, start, end):
+        count += 1
+        output: Optional[str] = _formatter.match(_binary_pattern_set, buffer, line_start, line_end, path if _with_filename else None)
+
+        if output is not None:
+            outputs.append(output)
+
+    return _result(_binary_pattern_set, count, outputs)
+
+
+class ParallelMatcher:
+    """
+    Matches lines on a pool of worker processes. Lines are split into chunks, each worker compiles patterns once and matches whole chunks,
+    the number of chunks in flight is bounded to keep memory usage flat regardless of the input size.
+    """
+
+    # Approximate number of bytes per line used for splitting memory-mapped files into chunks of `chunk_size` lines.
+    line_size: int = 128
+
+    def __init__(self, patterns: [str], jobs: int, chunk_size: int = 4096, ordered: bool = True, engine: str = 'regex', max_length: int = 0,
+                 format: str = 'line', with_filename: bool = False, cache_size: int = 0, cache_policy: str = 'lru'):
+        """
+        :param patterns: Patterns to match, see `PatternSet`.
+        :param engine: Matching engine, see `Matcher`.
+        :param max_length: Lines longer than this are skipped and counted in `skipped`, see `PatternSet`.
+        :param format: Output format of matched lines, see `MatchFormatter`.
+        :param with_filename: Whether to attribute matched lines to their files, see `MatchFormatter`.
+        :param cache_size: Number of distinct lines each worker remembers results for, see `MemoizingPatternSet`. Zero disables the cache,
+            hits and misses of all workers are counted in `cache_hits` and `cache_misses`.
+        :param cache_policy: Eviction policy of the cache, see `LruCache`.
+        :param jobs: Number of worker processes.
+        :param chunk_size: Number of lines sent to a worker at once.
+        :param ordered: Whether matched lines must come in the input order, unordered results are yielded as soon as chunks are done.
+        """
+
+        self.patterns: [str] = list(patterns)
+        self.jobs: int = max(jobs, 1)
+        self.chunk_size: int = max(chunk_size, 1)
+        self.ordered: bool = ordered
+        self.engine: str = engine
+        self.max_length: int = max_length
+        self.format: str = format
+        self.with_filename: bool = with_filename
+        self.cache_size: int = cache_size
+        self.cache_policy: str = cache_policy
+        self.skipped: int = 0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+    def match(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yields lines matched at least against one pattern, formatted according to the output format.
+        """
+
+        lines = iter(lines)
+        chunks: Iterator[List[str]] = iter(lambda: list(islice(lines, self.chunk_size)), [])
+
+        for (_, skipped, hits, misses, matched_lines) in self.__execute(_match, ((chunk,) for chunk in chunks)):
+            self.skipped += skipped
+            self.cache_hits += hits
+            self.cache_misses += misses
+            yield from matched_lines
+
+    def match_files(self, reader: FileReader) -> Iterator[str]:
+        """
+        Yields lines of files matched at least against one pattern. Workers map plain files on their own and receive only line-aligned
+        ranges, so the data is never copied between processes, compressed files are decompressed by the reader and sent to workers in chunks.
+        Lines processed by workers are added to the reader count.
+        """
+
+        def ranges() -> Iterator[Tuple[str, int, int, Optional[bytes]]]:
+            for (path, buffer) in reader.buffers():
+                if buffer is not None:
+                    yield (path, 0, len(buffer), buffer)
+                    continue
+
+                with MappedFile(path) as file:
+                    for (start, end) in file.chunks(self.chunk_size * self.line_size):
+                        yield (path, start, end, None)
+
+        for (count, skipped, hits, misses, matched_lines) in self.__execute(_match_range, ranges()):
+            reader.count += count
+            self.skipped += skipped
+            self.cache_hits += hits
+            self.cache_misses += misses
+            yield from matched_lines
+
+    def __execute(self, function: Callable, arguments: Iterator[tuple]) -> Iterator[ChunkResult]:
+        """
+        Executes the function with each of the arguments on the pool and yields results.
+        """
+
+        limit: int = self.jobs * 2
+        options: tuple = (self.patterns, self.engine, self.max_length, self.format, self.with_filename, self.cache_size, self.cache_policy)
+
+        with ProcessPoolExecutor(self.jobs) as executor:
+            pending: Deque[Future] = deque()
+            is_exhausted: bool = False
+
+            try:
+                while not is_exhausted or pending:
+                    # Keep the pool busy, but don't read ahead more than a couple of chunks per worker.
+                    while not is_exhausted and len(pending) < limit:
+                        chunk_arguments: Optional[tuple] = next(arguments, None)
+
+                        if chunk_arguments is not None:
+                            pending.append(executor.submit(_execute, options, function, *chunk_arguments))
+                        else:
+                            is_exhausted = True
+
+                    if not pending:
+                        break
+
+                    if self.ordered:
+                        yield pending.popleft().result()
+                        continue
+
+                    done: Set[Future]
+                    (done, _) = wait(pending, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+            finally:
+                # When the caller stops early chunks that haven't started yet are dropped instead of waiting for them on shutdown.
+                for future in pending:
+                    future.cancel()
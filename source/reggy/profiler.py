@@ -0,0 +1,108 @@
+import json
+import sys
+import time
+from typing import AnyStr, Dict, IO, List, Optional, Tuple, Union
+
+from reggy.matcher import CompiledPattern, MatchResult, PatternSet
+
+
+class PatternStatistics:
+    """
+    Matching statistics of a single pattern – how many times it was tried, how many times it matched and was the first matching pattern,
+    and the total and maximum matching time in nanoseconds.
+    """
+
+    __slots__ = ('index', 'pattern', 'tried', 'hits', 'first', 'total', 'maximum')
+
+    def __init__(self, index: int, pattern: AnyStr):
+        self.index: int = index
+        self.pattern: AnyStr = pattern
+        self.tried: int = 0
+        self.hits: int = 0
+        self.first: int = 0
+        self.total: int = 0
+        self.maximum: int = 0
+
+    def dict(self) -> dict:
+        pattern: str = self.pattern.decode(errors='replace') if isinstance(self.pattern, bytes) else self.pattern
+        return {'index': self.index, 'pattern': pattern, 'tried': self.tried, 'hits': self.hits, 'first': self.first, 'total_ns': self.total,
+                'max_ns': self.maximum}
+
+
+class ProfilingPatternSet(PatternSet):
+    """
+    Pattern set that records statistics of every pattern. Unlike the plain pattern set, which stops at the first match, every candidate
+    pattern is tried and timed on its own, so hits of patterns shadowed by earlier ones are counted too. Results are the same as with the plain
+    pattern set, but matching is considerably slower – it's a diagnostic tool for finding expensive patterns and patterns that never match.
+    """
+
+    formats: [str] = ['table', 'json']
+
+    def __init__(self, *args, **kwargs):
+        """
+        Takes the same arguments as `PatternSet`.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.statistics: List[PatternStatistics] = [PatternStatistics(index, pattern) for (index, pattern) in enumerate(self.patterns)]
+
+    def matches(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> bool:
+        return self.__profile(string, pos, endpos, False) is not None
+
+    def match(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, Dict[int, List[AnyStr]]]]:
+        return self.__profile(string, pos, endpos, False)
+
+    def match_result(self, string: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Tuple[int, MatchResult]]:
+        return self.__profile(string, pos, endpos, True)
+
+    def report(self, stream: IO, format: str = 'table', line_count: int = 0, wall_time: float = 0.0) -> None:
+        """
+        Writes collected statistics into the stream as a table or a JSON object along with the number of processed lines, the wall time
+        in seconds and the resulting throughput.
+        """
+
+        lines_per_second: float = line_count / wall_time if wall_time > 0 else 0.0
+
+        if format == 'json':
+            stream.write(json.dumps({'lines': line_count, 'wall_time': wall_time, 'lines_per_second': lines_per_second,
+                                     'patterns': [statistics.dict() for statistics in self.statistics]}) + '\n')
+            return
+
+        lines: [str] = [f'{"index":>6} {"tried":>10} {"hits":>10} {"first":>10} {"total ms":>10} {"mean ns":>10} {"max ns":>10}  pattern']
+
+        for statistics in self.statistics:
+            mean: int = statistics.total // statistics.tried if statistics.tried else 0
+            lines.append(f'{statistics.index:>6} {statistics.tried:>10} {statistics.hits:>10} {statistics.first:>10} {statistics.total / 1e6:>10.3f} '
+                         f'{mean:>10} {statistics.maximum:>10}  {statistics.dict()["pattern"]}')
+
+        lines.append(f'Processed {line_count} lines in {wall_time:.3f} s, {lines_per_second:.0f} lines per second.')
+        stream.write('\n'.join(lines) + '\n')
+
+    def __profile(self, string: AnyStr, pos: int, endpos: int, is_lazy: bool) -> Optional[Tuple[int, Union[Dict[int, List[AnyStr]], MatchResult]]]:
+        """
+        Tries all candidate patterns, records their statistics and returns the first match.
+        """
+
+        result: Optional[Tuple[int, Union[Dict[int, List[AnyStr]], MatchResult]]] = None
+
+        for index in self.candidates(string, pos, endpos):
+            compiled: CompiledPattern = self.compiled[index]
+            statistics: PatternStatistics = self.statistics[index]
+
+            # Nanosecond counter is available only since Python 3.7.
+            start: float = time.perf_counter()
+            match: Optional[Union[Dict[int, List[AnyStr]], MatchResult]] = (compiled.match_result if is_lazy else compiled.match)(string, pos, endpos)
+            elapsed: int = int((time.perf_counter() - start) * 1e9)
+
+            statistics.tried += 1
+            statistics.total += elapsed
+            statistics.maximum = max(statistics.maximum, elapsed)
+
+            if match is not None:
+                statistics.hits += 1
+
+                if result is None:
+                    statistics.first += 1
+                    result = (index, match)
+
+        return result
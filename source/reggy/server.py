@@ -0,0 +1,263 @@
+import argparse
+import copy
+import errno
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, IO, Optional, Tuple
+
+from reggy.cache import LruCache
+from reggy.catalog import PatternCatalog
+from reggy.cli import Cli, CliExit
+from reggy.client import DEFAULT_PATH, ERR, OUT, STATUS, write_frame
+from reggy.index import LiteralIndex
+from reggy.matcher import Matcher, PatternSet
+from reggy.memo import MemoizingPatternSet
+
+
+class ServerEntry:
+    """
+    Patterns compiled by the server and kept between runs – the matcher with every pattern in its cache, the prefilter index, warnings
+    about patterns and pattern sets built so far, keyed by the binary mode, the line length limit and result cache options.
+    """
+
+    def __init__(self, matcher: Matcher, index: Optional[LiteralIndex], warnings: str):
+        self.matcher: Matcher = matcher
+        self.index: Optional[LiteralIndex] = index
+        self.warnings: str = warnings
+        self.pattern_sets: Dict[tuple, PatternSet] = {}
+
+
+class ServerStream(io.TextIOBase):
+    """
+    Text stream sending everything written into it to the client as frames of the channel.
+    """
+
+    def __init__(self, connection: socket.socket, channel: bytes, is_tty: bool, lock: threading.Lock):
+        super().__init__()
+        self.connection: socket.socket = connection
+        self.channel: bytes = channel
+        self.is_tty: bool = is_tty
+        self.lock: threading.Lock = lock
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self.is_tty
+
+    def write(self, text: str) -> int:
+        if text:
+            with self.lock:
+                write_frame(self.connection, self.channel, text.encode())
+
+        return len(text)
+
+
+class ServerCli(Cli):
+    """
+    Command-line interface running on behalf of the client. Compiled patterns are taken from the server cache and added to it, relative
+    paths are resolved against the client working directory. Following isn't supported and matching always runs on the server thread,
+    worker processes would have to compile patterns from scratch anyway.
+    """
+
+    def __init__(self, server: 'Server', cwd: str):
+        self.server: Server = server
+        self.cwd: str = cwd
+        self.entry: Optional[ServerEntry] = None
+
+    def parse(self, argv: [str], err_stream: IO) -> argparse.Namespace:
+        arguments: argparse.Namespace = super().parse(argv, err_stream)
+
+        if arguments.follow:
+            err_stream.write('reggy: error: following isn\'t supported by the server, run reggy directly\n')
+            raise CliExit(2)
+
+        arguments.jobs = 1
+        arguments.inputs = [os.path.join(self.cwd, path) for path in arguments.inputs]
+
+        for name in ['patterns_file', 'compiled_catalog', 'checkpoint']:
+            if getattr(arguments, name):
+                setattr(arguments, name, os.path.join(self.cwd, getattr(arguments, name)))
+
+        return arguments
+
+    def prepare(self, arguments: argparse.Namespace, catalog: Optional[PatternCatalog], err_stream: IO) -> Tuple[Matcher, Optional[LiteralIndex]]:
+        # Catalogs are keyed on their patterns, not on paths, so an edited catalog gets compiled again. Warnings are either the summary or
+        # the details, depending on the option.
+        key: tuple = (tuple(arguments.patterns), arguments.engine, bool(arguments.inputs), arguments.check_patterns)
+
+        with self.server.lock:
+            self.entry = self.server.cache.get(key)
+
+        if self.entry is None:
+            warnings: io.StringIO = io.StringIO()
+            (matcher, index) = super().prepare(arguments, catalog, warnings)
+            self.entry = ServerEntry(matcher, index, warnings.getvalue())
+
+            with self.server.lock:
+                self.server.cache.put(key, self.entry)
+
+        err_stream.write(self.entry.warnings)
+        return (self.entry.matcher, self.entry.index)
+
+    def pattern_set(self, arguments: argparse.Namespace, matcher: Matcher, binary: bool, index: Optional[LiteralIndex] = None) -> PatternSet:
+        if arguments.stats:
+            return super().pattern_set(arguments, matcher, binary, index)
+
+        key: tuple = (binary, arguments.max_line_length, arguments.cache_size, arguments.cache_policy)
+
+        with self.server.lock:
+            pattern_set: Optional[PatternSet] = self.entry.pattern_sets.get(key)
+
+        if pattern_set is None:
+            pattern_set = super().pattern_set(arguments, matcher, binary, index)
+
+            with self.server.lock:
+                self.entry.pattern_sets[key] = pattern_set
+
+        # Concurrent runs share compiled patterns, but each one counts skipped lines and caches results on its own copy.
+        pattern_set = copy.copy(pattern_set)
+        pattern_set.skipped = 0
+
+        if isinstance(pattern_set, MemoizingPatternSet):
+            pattern_set.cache = LruCache(pattern_set.cache.size, pattern_set.cache.policy)
+
+        return pattern_set
+
+
+class ServerHandler(socketserver.StreamRequestHandler):
+    """
+    Runs the client command, see `reggy.client` for the protocol.
+    """
+
+    server: 'Server'
+
+    def handle(self) -> None:
+        header: dict = json.loads(self.rfile.readline().decode())
+        (is_in_tty, is_out_tty) = header.get('tty', [False, False])
+        lock: threading.Lock = threading.Lock()
+
+        in_stream: io.TextIOWrapper = io.TextIOWrapper(self.rfile, encoding='utf-8')
+        in_stream.isatty = lambda: is_in_tty
+        out_stream: ServerStream = ServerStream(self.connection, OUT, is_out_tty, lock)
+        err_stream: ServerStream = ServerStream(self.connection, ERR, False, lock)
+
+        try:
+            try:
+                status: int = ServerCli(self.server, header.get('cwd', os.getcwd())).run(header.get('argv', ['reggy']), in_stream, out_stream,
+                                                                                         err_stream)
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as exception:
+                # The command failed, but the server didn't – the client gets the error and the status like from the crashed process.
+                self.server.handle_error(self.request, self.client_address)
+                err_stream.write(f'reggy: error: {exception}\n')
+                status = 2
+
+            write_frame(self.connection, STATUS, str(status).encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away, there's nobody left to respond to.
+            pass
+
+
+class Server(socketserver.UnixStreamServer):
+    """
+    Resident matcher server listening on the Unix socket. Interpreter startup, imports and pattern compilation are paid once, commands run
+    by clients reuse patterns compiled for earlier ones, which are kept in the size-bounded cache. Clients are handled concurrently on the
+    thread pool. The socket is accessible only by the owner, commands read files with the server permissions.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, workers: int = 8, cache_size: int = 16):
+        """
+        :param path: Path to the socket, a stale socket left by a server that wasn't shut down cleanly gets replaced.
+        :param workers: Number of clients handled at once, others wait for their turn.
+        :param cache_size: Number of distinct pattern lists kept compiled.
+        """
+
+        self.cache: LruCache = LruCache(cache_size)
+        self.lock: threading.Lock = threading.Lock()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max(workers, 1), thread_name_prefix='reggy-server')
+        self.__is_bound: bool = False
+        super().__init__(path, ServerHandler)
+
+    def server_bind(self) -> None:
+        path: str = self.server_address
+
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            probe: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.remove(path)
+            else:
+                raise OSError(errno.EADDRINUSE, f'Reggy server is already listening on {path}')
+            finally:
+                probe.close()
+
+        super().server_bind()
+        self.__is_bound = True
+        os.chmod(path, 0o600)
+
+    def process_request(self, request: socket.socket, client_address: str) -> None:
+        self.executor.submit(self.__process, request, client_address)
+
+    def server_close(self) -> None:
+        """
+        Closes the socket, waits for running commands and removes the socket file, unless it belongs to another server.
+        """
+
+        super().server_close()
+        self.executor.shutdown()
+
+        if self.__is_bound and os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+    def __process(self, request: socket.socket, client_address: str) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def main(argv: [str], err_stream: IO) -> int:
+    """
+    Runs the server until interrupted.
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog='python -m reggy.server', description='Runs the resident reggy matcher server, '
+                                                                                                          'use "python -m reggy.client" to run commands on it.')
+    parser.add_argument('--socket', default=DEFAULT_PATH, metavar='PATH', help=f'socket path, defaults to "{DEFAULT_PATH}" or REGGY_SOCKET')
+    parser.add_argument('--workers', type=int, default=8, metavar='N', help='number of clients handled at once, defaults to 8')
+    parser.add_argument('--cache-size', type=int, default=16, metavar='N', help='number of distinct pattern lists kept compiled, defaults to 16')
+    arguments: argparse.Namespace = parser.parse_args(argv[1:])
+
+    try:
+        server: Server = Server(arguments.socket, arguments.workers, arguments.cache_size)
+    except OSError as exception:
+        err_stream.write(f'reggy: error: can\'t listen on {arguments.socket!r}: {exception}\n')
+        return 1
+
+    err_stream.write(f'Reggy server is listening on {arguments.socket}.\n')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main(sys.argv, sys.stderr))
@@ -0,0 +1,155 @@
+import atexit
+import datetime
+import json
+import queue
+import sys
+import threading
+from typing import IO, List, Optional
+
+
+class TraceRecord:
+    """
+    Single tracer event – a call, an exit or a failure of the traced function.
+    """
+
+    __slots__ = ('time', 'owner', 'operation', 'function', 'details')
+
+    def __init__(self, time: float, owner: Optional[str], operation: str, function: str, details: Optional[str]):
+        self.time: float = time
+        self.owner: Optional[str] = owner
+        self.operation: str = operation
+        self.function: str = function
+        self.details: Optional[str] = details
+
+    def text(self) -> str:
+        """
+        Formats the record as a human-readable line, for example: `2018.12.01-10:00:00.000000 Matcher CALL match with signature: (…)`.
+        """
+
+        timestamp: str = datetime.datetime.fromtimestamp(self.time).strftime('%Y.%m.%d-%H:%M:%S.%f')
+        return f'{timestamp} {f"{self.owner} " if self.owner else ""}{self.operation} {self.function}{f" {self.details}" if self.details else ""}'
+
+    def json(self) -> str:
+        """
+        Formats the record as a JSON object.
+        """
+
+        return json.dumps({'time': self.time, 'owner': self.owner, 'operation': self.operation, 'function': self.function, 'details': self.details})
+
+
+class TraceSink:
+    """
+    Destination of tracer records. The default implementation synchronously writes text lines into the stream, `sys.stderr` is used when
+    the stream is not provided.
+    """
+
+    def __init__(self, stream: Optional[IO] = None, is_json: bool = False):
+        self.stream: Optional[IO] = stream
+        self.is_json: bool = is_json
+
+    def format(self, record: TraceRecord) -> str:
+        return record.json() if self.is_json else record.text()
+
+    def write(self, record: TraceRecord) -> None:
+        print(self.format(record), file=self.stream or sys.stderr)
+
+    def flush(self) -> None:
+        (self.stream or sys.stderr).flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class QueueSink(TraceSink):
+    """
+    Asynchronous sink – records are put into the bounded queue and a background thread writes them into the stream in batches, so the traced
+    code isn't blocked on output. When the queue is full records are either dropped and counted in `dropped`, or the caller blocks until
+    there's space, depending on the policy. Records still queued when the process exits are written before it does, unless the sink was
+    closed earlier. Records which failed to be written and records written after the sink was closed are dropped and counted as well.
+    """
+
+    policies: [str] = ['block', 'drop']
+
+    # Marker put into the queue to stop the background thread.
+    __stop: object = object()
+
+    def __init__(self, stream: Optional[IO] = None, is_json: bool = False, size: int = 65536, batch_size: int = 256, policy: str = 'drop'):
+        if policy not in self.policies:
+            raise ValueError(f'Unknown queue policy {policy!r}, expected one of: {", ".join(self.policies)}.')
+
+        super().__init__(stream, is_json)
+
+        self.batch_size: int = max(batch_size, 1)
+        self.policy: str = policy
+        self.dropped: int = 0
+        self.__is_closed: bool = False
+        self.__queue: queue.Queue = queue.Queue(size)
+        self.__thread: threading.Thread = threading.Thread(target=self.__run, name='reggy-trace-sink', daemon=True)
+        self.__thread.start()
+
+        # The background thread is a daemon, which wouldn't hold the process until the queue is drained.
+        atexit.register(self.close)
+
+    def write(self, record: TraceRecord) -> None:
+        # Nothing takes records from the queue anymore, they'd pile up and eventually block the caller.
+        if self.__is_closed:
+            self.dropped += 1
+            return
+
+        if self.policy == 'block':
+            self.__queue.put(record)
+            return
+
+        try:
+            self.__queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """
+        Waits until all queued records are written, or the background thread is stopped.
+        """
+
+        with self.__queue.all_tasks_done:
+            while self.__queue.unfinished_tasks and self.__thread.is_alive():
+                self.__queue.all_tasks_done.wait(0.1)
+
+    def close(self) -> None:
+        """
+        Writes remaining records and stops the background thread.
+        """
+
+        atexit.unregister(self.close)
+        self.__is_closed = True
+
+        if self.__thread.is_alive():
+            self.__queue.put(self.__stop)
+            self.__thread.join()
+
+    def __run(self) -> None:
+        while True:
+            batch: List[object] = [self.__queue.get()]
+
+            # Take whatever else is already queued without waiting, up to the batch size.
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records: List[TraceRecord] = [record for record in batch if record is not self.__stop]
+
+            try:
+                if records:
+                    stream: IO = self.stream or sys.stderr
+                    stream.write('\n'.join(self.format(record) for record in records) + '\n')
+                    stream.flush()
+            except Exception:
+                # The thread must keep going, or flushing and blocking writers would wait for it forever.
+                self.dropped += len(records)
+            finally:
+                for _ in batch:
+                    self.__queue.task_done()
+
+            if len(records) < len(batch):
+                return
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable
+
+from pytest import mark
+
+from reggy.aio import AsyncMatcher
+from reggy.matcher import Matcher
+
+
+async def collect(matcher: AsyncMatcher, source) -> list:
+    return [result async for result in matcher.match(source)]
+
+
+def run_until_complete(awaitable: Awaitable) -> Any:
+    """
+    Runs the awaitable on a new event loop, same as `asyncio.run`, which is available only since Python 3.7.
+    """
+
+    loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+@mark.parametrize(['batch_size', 'concurrency'], [[1, 1], [3, 2], [1000, 4]])
+def test_async_matcher_stream_reader(batch_size: int, concurrency: int):
+    """
+    Async matcher must match lines from the stream reader in the input order.
+    """
+
+    lines: [str] = [f'foo {index}' if index % 3 else f'bar {index}' for index in range(20)]
+
+    async def run() -> list:
+        reader: asyncio.StreamReader = asyncio.StreamReader()
+        reader.feed_data(('\n'.join(lines) + '\n').encode())
+        reader.feed_eof()
+        return await collect(AsyncMatcher(['foo %{0}', 'bar %{1}'], batch_size=batch_size, concurrency=concurrency), reader)
+
+    assert run_until_complete(run()) == [(line, 0, {0: [line[4:]]}) if line.startswith('foo') else (line, 1, {1: [line[4:]]}) for line in lines]
+
+
+def test_async_matcher_quiet_source():
+    """
+    Async matcher must yield matches of an incomplete batch when the source goes quiet.
+    """
+
+    async def run() -> list:
+        results: list = []
+        resumed: asyncio.Event = asyncio.Event()
+
+        async def source() -> AsyncIterator[str]:
+            yield 'foo bar\n'
+            await resumed.wait()
+            yield 'foo baz'
+
+        async for result in AsyncMatcher(['foo %{0}'], batch_size=100, delay=0.01).match(source()):
+            results.append(result)
+            resumed.set()
+
+        return results
+
+    assert run_until_complete(run()) == [('foo bar', 0, {0: ['bar']}), ('foo baz', 0, {0: ['baz']})]
+
+
+@mark.parametrize('executor_type', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_async_matcher_executors(executor_type: type):
+    """
+    Async matcher must match batches on thread and process pools alike.
+    """
+
+    lines: [str] = [f'foo {index}' if index % 3 else f'bar {index}' for index in range(20)]
+
+    async def source() -> AsyncIterator[str]:
+        for line in lines:
+            yield line
+
+    with executor_type(2) as executor:
+        matcher: AsyncMatcher = AsyncMatcher(['foo %{0}'], Matcher(engine='literal'), executor, batch_size=3)
+        assert run_until_complete(collect(matcher, source())) == [(line, 0, {0: [line[4:]]}) for line in lines if line.startswith('foo')]
@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+
+from reggy.benchmark import Corpus, benchmarks, compare, main
+from reggy.cli import Cli
+from reggy.matcher import PatternSet
+
+
+def test_corpus():
+    """
+    Corpus must be reproducible and its lines must partially match its templates.
+    """
+
+    lines: [str] = Corpus().lines(100, 10)
+    pattern_set: PatternSet = PatternSet(Corpus().templates(10))
+
+    assert lines == Corpus().lines(100, 10)
+    assert 0 < sum(pattern_set.matches(line) for line in lines) < len(lines)
+
+
+def test_compare():
+    """
+    Comparison must report only metrics that regressed beyond the threshold in the right direction.
+    """
+
+    baseline = {'foo': {'lines_per_second': 100.0, 'ns_per_match': 100.0, 'peak_memory': 100.0}}
+    results = {'foo': {'lines_per_second': 70.0, 'ns_per_match': 70.0, 'peak_memory': 130.0}, 'bar': {'lines_per_second': 1.0}}
+
+    regressions: [str] = compare(results, baseline, 0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith('foo lines_per_second')
+    assert regressions[1].startswith('foo peak_memory')
+
+
+def test_main(tmp_path):
+    """
+    Benchmark must save the baseline on the first run and fail when results regress against it.
+    """
+
+    path: str = str(tmp_path / 'benchmark.json')
+    argv: [str] = ['…', '--baseline', path, '--scale', '0.01', '--repeat', '1', '--filter', 'plain']
+
+    assert main(argv, StringIO(), StringIO()) == 0
+
+    with open(path) as file:
+        baseline = json.load(file)
+
+    assert set(baseline) == {'plain/matcher', 'plain/cli', 'plain/match', 'plain-literal/matcher', 'plain-literal/cli', 'plain-literal/match'}
+
+    # Pretend the baseline was impossibly fast.
+    for metrics in baseline.values():
+        metrics['lines_per_second'] *= 1000
+
+    with open(path, 'w') as file:
+        json.dump(baseline, file)
+
+    err_stream: StringIO = StringIO()
+
+    assert main(argv, StringIO(), err_stream) == 1
+    assert 'Regression: plain/matcher lines_per_second' in err_stream.getvalue()
+
+
+def test_benchmarks():
+    """
+    Suite must cover all pattern kinds, catalog sizes and adversarial lines.
+    """
+
+    names: [str] = [benchmark.name for benchmark in benchmarks(0.001)]
+
+    assert {'plain', 'greedy', 'space-limited', 'adversarial', 'adversarial-literal'} <= set(names)
+    assert sum(name.startswith('catalog-') for name in names) == 5
+
+
+def test_benchmarks_cli_output():
+    """
+    Command-line benchmarks must not write warnings, which would be measured along with the startup.
+    """
+
+    for benchmark in benchmarks(0.1):
+        (in_stream, out_stream, err_stream) = (StringIO(''), StringIO(), StringIO())
+        (in_stream.isatty, out_stream.isatty) = (lambda: False, lambda: False)
+        Cli().run(['reggy', '--engine', benchmark.engine, '--'] + benchmark.patterns, in_stream, out_stream, err_stream)
+
+        assert err_stream.getvalue() == '', benchmark.name
@@ -0,0 +1,58 @@
+from pytest import raises
+
+from reggy.cache import LruCache
+
+
+def test_lru_cache():
+    """
+    Cache must evict the least recently used items and count hits and misses.
+    """
+
+    cache: LruCache = LruCache(2)
+    cache.put('foo', 1)
+    cache.put('bar', None)
+
+    assert cache.get('foo') == 1
+    assert cache.get('bar', 2) is None
+    assert cache.get('baz') is None
+
+    cache.put('baz', 3)
+
+    assert len(cache) == 2
+    assert 'bar' in cache and 'foo' not in cache
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_lru_cache_disabled():
+    """
+    Cache with zero size must not store anything.
+    """
+
+    cache: LruCache = LruCache(0)
+    cache.put('foo', 1)
+
+    assert len(cache) == 0
+    assert cache.get('foo') is None
+
+
+def test_lru_cache_fifo_policy():
+    """
+    Cache with the FIFO policy must evict the oldest stored items regardless of reads and report the hit rate.
+    """
+
+    cache: LruCache = LruCache(2, 'fifo')
+    assert cache.hit_rate == 0.0
+
+    cache.put('foo', 1)
+    cache.put('bar', 2)
+
+    assert cache.get('foo') == 1
+    assert cache.get('baz') is None
+
+    cache.put('baz', 3)
+
+    assert 'foo' not in cache and 'bar' in cache and 'baz' in cache
+    assert cache.hit_rate == 0.5
+
+    with raises(ValueError):
+        LruCache(2, 'random')
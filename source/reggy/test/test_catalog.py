@@ -0,0 +1,96 @@
+import os
+
+from pytest import mark
+
+from reggy.catalog import PatternCatalog
+from reggy.matcher import Matcher, PatternSet
+
+
+@mark.parametrize('binary', [False, True])
+def test_pattern_catalog(binary: bool, tmp_path):
+    """
+    Catalog must load patterns, save the compiled catalog and produce the same matches when loaded from it.
+    """
+
+    (path, compiled_path) = (str(tmp_path / 'patterns.txt'), str(tmp_path / 'patterns.bin'))
+    (tmp_path / 'patterns.txt').write_text('foo %{0}\n\nbar %{0} baz %{1}\r\n')
+    string = b'bar qux baz fex' if binary else 'bar qux baz fex'
+    results = []
+
+    for is_compiled in [False, True]:
+        catalog: PatternCatalog = PatternCatalog(path, compiled_path)
+        matcher: Matcher = Matcher()
+        pattern_set: PatternSet = PatternSet(catalog.patterns, matcher, binary=binary, index=catalog.compile(matcher, binary))
+
+        assert catalog.patterns == ['foo %{0}', 'bar %{0} baz %{1}']
+        assert catalog.is_modified is not is_compiled
+        assert len(matcher.cache) == 2
+
+        catalog.save()
+        results.append(pattern_set.match(string))
+
+    assert os.path.exists(compiled_path)
+    assert results[0] == results[1] == (1, {0: [string[4:7]], 1: [string[12:]]})
+
+
+@mark.parametrize('content', [b'foo %{1}\n', b'garbage'])
+def test_pattern_catalog_invalidation(content: bytes, tmp_path):
+    """
+    Catalog must ignore the compiled catalog when the source changes or the compiled catalog is broken.
+    """
+
+    path: str = str(tmp_path / 'patterns.txt')
+    compiled_path: str = str(tmp_path / 'patterns.bin')
+    (tmp_path / 'patterns.txt').write_text('foo %{0}\n')
+
+    catalog: PatternCatalog = PatternCatalog(path, compiled_path)
+    catalog.compile(Matcher())
+    catalog.save()
+
+    if content == b'garbage':
+        (tmp_path / 'patterns.bin').write_bytes(content)
+    else:
+        (tmp_path / 'patterns.txt').write_bytes(content)
+
+    catalog = PatternCatalog(path, compiled_path)
+    matcher: Matcher = Matcher()
+    catalog.compile(matcher)
+
+    assert catalog.is_modified
+    assert matcher.compile(catalog.patterns[0]).rule_indices == ((1,) if content != b'garbage' else (0,))
+
+
+def test_pattern_catalog_version(tmp_path, monkeypatch):
+    """
+    Catalog must ignore the compiled catalog saved by a different reggy version.
+    """
+
+    path: str = str(tmp_path / 'patterns.txt')
+    (tmp_path / 'patterns.txt').write_text('foo %{0}\n')
+
+    catalog: PatternCatalog = PatternCatalog(path, str(tmp_path / 'patterns.bin'))
+    catalog.compile(Matcher())
+    catalog.save()
+
+    monkeypatch.setattr('reggy.catalog.__version__', '0.0.0')
+    catalog = PatternCatalog(path, str(tmp_path / 'patterns.bin'))
+    catalog.compile(Matcher())
+
+    assert catalog.is_modified
+
+
+def test_pattern_catalog_without_compiled_path(tmp_path):
+    """
+    Catalog without the compiled catalog path must parse patterns every time and never write anything.
+    """
+
+    (tmp_path / 'patterns.txt').write_text('foo %{0}\n')
+
+    for _ in range(2):
+        catalog: PatternCatalog = PatternCatalog(str(tmp_path / 'patterns.txt'))
+        catalog.compile(Matcher())
+        catalog.save()
+
+        assert catalog.is_modified
+
+    assert os.listdir(tmp_path) == ['patterns.txt']
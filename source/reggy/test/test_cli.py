@@ -1,3 +1,7 @@
+import bz2
+import gzip
+import json
+import lzma
 from io import BytesIO, TextIOWrapper
 from typing import IO, Optional, Tuple
 
@@ -108,14 +112,15 @@ __cli_run_test_data = [
 ]
 
 
+@mark.parametrize('engine', [None, 'regex', 'literal'])
 @mark.parametrize('case', __cli_run_test_data)
-def test_cli_run(case: PatternTestCase):
+def test_cli_run(case: PatternTestCase, engine: Optional[str]):
     """
     Cli must process input and print all matched lines into the out stream.
     """
 
     (in_stream, out_stream, err_stream) = streams(case.input())
-    code: int = Cli().run(['…'] + case.patterns, in_stream, out_stream, err_stream)
+    code: int = Cli().run(['…'] + (['--engine', engine, '--'] if engine else []) + case.patterns, in_stream, out_stream, err_stream)
 
     assert code == 0
     assert StreamUtility.data(out_stream) == case.output()
@@ -155,3 +160,424 @@ def test_cli_run_check_input_arguments():
     string = 'Reggy expects one or more matching patterns'
 
     assert string in err_stream_data
+
+
+@mark.parametrize('flush', ['line', 'batch', 'end'])
+@mark.parametrize('case', __cli_run_test_data)
+def test_cli_run_stream(case: PatternTestCase, flush: str):
+    """
+    Cli must produce the same output in streaming mode regardless of the flush policy.
+    """
+
+    (in_stream, out_stream, err_stream) = streams(case.input())
+    code: int = Cli().run(['…', '--stream', '--flush', flush, '--batch-size', '2', '--'] + case.patterns, in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == case.output()
+
+
+def test_cli_run_stream_is_tty_friendly():
+    """
+    Cli must print the tty summary after matched lines in streaming mode.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('\n'.join(['foo', 'foo bar']), is_out_tty=True)
+    code: int = Cli().run(['…', '--stream', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == 'foo bar\nMatched 1 lines out of total 2 provided.\n'
+
+
+def test_cli_run_check_invalid_arguments():
+    """
+    Cli must fail with invalid arguments instead of exiting.
+    """
+
+    (in_stream, out_stream, err_stream) = streams()
+    code: int = Cli().run(['…', '--flush', 'never', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 2
+    assert 'invalid choice' in StreamUtility.data(err_stream)
+
+
+def test_cli_run_dash_patterns():
+    """
+    Cli must treat unrecognized arguments starting with a single dash as patterns in their order and still reject unknown long options.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('-bar\nfoo baz\n--qux')
+    code: int = Cli().run(['…', '--format', 'tsv', 'foo %{0}', '-%{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == '1\tbar\n0\tbaz\n1\t-qux\n'
+
+    (in_stream, out_stream, err_stream) = streams()
+    code = Cli().run(['…', '-%{0}', '--unknown'], in_stream, out_stream, err_stream)
+
+    assert code == 2
+    assert 'unrecognized arguments: --unknown' in StreamUtility.data(err_stream)
+
+
+@mark.parametrize('case', __cli_run_test_data)
+def test_cli_run_jobs(case: PatternTestCase):
+    """
+    Cli must produce the same output when matching on multiple processes.
+    """
+
+    (in_stream, out_stream, err_stream) = streams(case.input())
+    code: int = Cli().run(['…', '--jobs', '2', '--chunk-size', '1', '--'] + case.patterns, in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == case.output()
+
+
+def test_cli_run_jobs_unordered():
+    """
+    Cli must output all matched lines when the order is not preserved.
+    """
+
+    lines: [str] = [f'foo {i}' for i in range(100)] + ['bar']
+    (in_stream, out_stream, err_stream) = streams('\n'.join(lines), is_out_tty=True)
+    code: int = Cli().run(['…', '--jobs', '2', '--chunk-size', '7', '--unordered', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+
+    output: [str] = StreamUtility.data(out_stream).splitlines()
+
+    assert output[0] == 'Matched 100 lines out of total 101 provided.'
+    assert sorted(output[1:]) == sorted(lines[:-1])
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('case', __cli_run_test_data)
+def test_cli_run_inputs(case: PatternTestCase, jobs: int, tmp_path):
+    """
+    Cli must match lines of memory-mapped input files the same way as the standard input.
+    """
+
+    paths: [str] = [str(tmp_path / 'foo.log'), str(tmp_path / 'bar.log'), str(tmp_path / 'baz.log')]
+    (tmp_path / 'foo.log').write_text('\n'.join(case.matches) + '\n')
+    (tmp_path / 'bar.log').write_text('')
+    (tmp_path / 'baz.log').write_text('\n'.join(case.mismatches))
+
+    (in_stream, out_stream, err_stream) = streams(is_out_tty=True)
+    code: int = Cli().run(['…', '-i', paths[0], '-i', paths[1], '--input', paths[2], '--jobs', str(jobs), '--chunk-size', '1', '--'] + case.patterns, in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == f'Matched {len(case.matches)} lines out of total {len(case.input().splitlines())} provided.\n' + case.output()
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize(['format', 'output'], [
+    ['line', 'foo bar\n'],
+    ['json', '{"pattern": 0, "tokens": {"0": ["bar"]}, "line": "foo bar"}\n'],
+    ['tsv', '0\tbar\n'],
+])
+def test_cli_run_input_without_line_break(format: str, output: str, jobs: int, tmp_path):
+    """
+    Cli must match the single line of an input file without the trailing line break in every format.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar')
+
+    (in_stream, out_stream, err_stream) = streams()
+    code: int = Cli().run(['…', '-i', str(tmp_path / 'foo.log'), '--format', format, '--jobs', str(jobs), 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == output
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('is_out_tty', [False, True])
+def test_cli_run_max_line_length(jobs: int, is_out_tty: bool):
+    """
+    Cli must skip lines over the length limit and report them.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('\n'.join(['foo bar', 'foo barbaz', 'foo baz']), is_out_tty=is_out_tty)
+    code: int = Cli().run(['…', '--max-line-length', '7', '--jobs', str(jobs), 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+
+    string = 'Skipped 1 lines longer than 7.'
+    assert string in StreamUtility.data(out_stream if is_out_tty else err_stream)
+    assert StreamUtility.data(out_stream).endswith('foo bar\nfoo baz\n')
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('is_out_tty', [False, True])
+@mark.parametrize('cache_policy', ['lru', 'fifo'])
+def test_cli_run_cache(jobs: int, is_out_tty: bool, cache_policy: str):
+    """
+    Cli must produce the same output with the result cache and report its hit rate.
+    """
+
+    lines: [str] = ['foo bar', 'baz', 'foo bar', 'foo qux', 'baz', 'foo bar']
+    (in_stream, out_stream, err_stream) = streams('\n'.join(lines), is_out_tty=is_out_tty)
+    code: int = Cli().run(['…', '--cache-size', '8', '--cache-policy', cache_policy, '--jobs', str(jobs), '--chunk-size', '6', 'foo %{0}'],
+                          in_stream, out_stream, err_stream)
+
+    assert code == 0
+
+    string = 'Result cache hit rate 50.0%, 3 hits and 3 misses.'
+    assert string in StreamUtility.data(out_stream if is_out_tty else err_stream)
+    assert StreamUtility.data(out_stream).endswith('foo bar\nfoo bar\nfoo qux\nfoo bar\n')
+
+
+@mark.parametrize(['arguments', 'warnings'], [
+    [[], 'reggy: warning: found 2 ambiguous patterns, use --check-patterns for details\n'],
+    [['--check-patterns'], 'reggy: warning: pattern \'foo %{0}%{1}\': captures %{0} and %{1} are adjacent without a literal between them, the split '
+                           'between them is ambiguous\n'
+                           'reggy: warning: pattern \'the %{0S1} %{1} ran away\': captures %{0} and %{1} are separated only by whitespace and one '
+                           'of them is space-limited, which can backtrack super-linearly on whitespace-heavy lines\n'
+                           'reggy: warning: pattern \'foo %{1} baz %{2} fex %{0}\': 3 captures can make the regex backtrack polynomially on long '
+                           'lines, consider the literal engine\n'],
+])
+def test_cli_run_warns_about_ambiguous_patterns(arguments: [str], warnings: str):
+    """
+    Cli must summarize ambiguous patterns, warn about each one when checking patterns and still use them.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('foo barbaz')
+    code: int = Cli().run(['…'] + arguments + ['foo %{0}%{1}', 'the %{0S1} %{1} ran away', 'foo %{1} baz %{2} fex %{0}', 'foo %{0}'],
+                          in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(err_stream) == warnings
+    assert StreamUtility.data(out_stream) == 'foo barbaz\n'
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('is_file', [False, True])
+@mark.parametrize(['format', 'output'], [
+    ['json', '{"pattern": 1, "tokens": {"0": ["bar"], "1": ["qux"]}, "line": "foo bar baz qux"}\n{"pattern": 0, "tokens": {"0": ["naïve"]}, "line": "foo naïve"}\n'],
+    ['tsv', '1\tbar\tqux\n0\tnaïve\n'],
+])
+def test_cli_run_format(format: str, output: str, is_file: bool, jobs: int, tmp_path):
+    """
+    Cli must write the matching pattern index and tokens of matched lines in the requested format.
+    """
+
+    data: str = '\n'.join(['foo bar baz qux', 'bar', 'foo naïve'])
+    (tmp_path / 'foo.log').write_text(data, encoding='utf-8')
+
+    (in_stream, out_stream, err_stream) = streams(None if is_file else data)
+    arguments: [str] = ['-i', str(tmp_path / 'foo.log')] if is_file else []
+    code: int = Cli().run(['…', '--format', format, '--jobs', str(jobs)] + arguments + ['foo %{0S0}', 'foo %{0} baz %{1}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == output
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('is_file', [False, True])
+@mark.parametrize('is_compiled', [False, True])
+def test_cli_run_patterns_file(is_compiled: bool, is_file: bool, jobs: int, tmp_path):
+    """
+    Cli must match patterns from the patterns file along with pattern arguments and reuse the compiled catalog on later runs, if requested.
+    """
+
+    (tmp_path / 'patterns.txt').write_text('foo %{0}\nbar %{0}\n')
+    (tmp_path / 'foo.log').write_text('foo bar\nbaz qux\nbar baz\nqux\n')
+    arguments: [str] = ['…', '-f', str(tmp_path / 'patterns.txt'), '--jobs', str(jobs)] + (['-i', str(tmp_path / 'foo.log')] if is_file else [])
+    arguments += ['--compiled-catalog', str(tmp_path / 'patterns.compiled')] if is_compiled else []
+
+    for patterns in [[], [], ['baz %{0}']]:
+        (in_stream, out_stream, err_stream) = streams('foo bar\nbaz qux\nbar baz\nqux\n')
+        code: int = Cli().run(arguments + patterns, in_stream, out_stream, err_stream)
+
+        assert code == 0
+        assert StreamUtility.data(err_stream) == ''
+        assert StreamUtility.data(out_stream) == ('foo bar\nbaz qux\nbar baz\n' if patterns else 'foo bar\nbar baz\n')
+        assert (tmp_path / 'patterns.compiled').exists() is is_compiled
+
+
+def test_cli_run_patterns_file_missing(tmp_path):
+    """
+    Cli must report a missing patterns file.
+    """
+
+    (in_stream, out_stream, err_stream) = streams()
+    code: int = Cli().run(['…', '-f', str(tmp_path / 'patterns.txt')], in_stream, out_stream, err_stream)
+
+    assert code == 1
+    assert 'can\'t read patterns file' in StreamUtility.data(err_stream)
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize(['arguments', 'output', 'code'], [
+    [['-c'], '3\n', 0],
+    [['-c', '-m', '2'], '2\n', 0],
+    [['-m', '2'], 'foo bar\nfoo baz\n', 0],
+    [['-m', '0'], '', 0],
+    [['-q'], '', 0],
+    [['-q', 'qux %{0}'], '', 1],
+])
+def test_cli_run_count_quiet_max_count(arguments: [str], output: str, code: int, jobs: int):
+    """
+    Cli must count matches without writing them, stop after the maximum number of matches and report the match in the status quietly.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('foo bar\nbaz\nfoo baz\nfoo qux')
+    patterns: [str] = [] if arguments[-1].startswith('qux') else ['foo %{0}']
+    status: int = Cli().run(['…', '--jobs', str(jobs), '--chunk-size', '1'] + arguments + patterns, in_stream, out_stream, err_stream)
+
+    assert status == code
+    assert StreamUtility.data(out_stream) == output
+
+
+def test_cli_run_max_count_stops_reading():
+    """
+    Cli must stop reading the input once the maximum number of matches is reached.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('foo bar\nbaz\nfoo baz\nfoo qux', is_out_tty=True)
+    code: int = Cli().run(['…', '-m', '1', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == 'Matched 1 lines out of total 1 provided.\nfoo bar\n'
+    assert in_stream.readline() == 'baz\n'
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('format', ['table', 'json'])
+def test_cli_run_stats(format: str, jobs: int):
+    """
+    Cli must match lines as usual and write per-pattern statistics into the error stream.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('foo bar\nbaz\nfoo baz')
+    code: int = Cli().run(['…', '--stats', '--stats-format', format, '--jobs', str(jobs), 'foo %{0}', 'qux %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == 'foo bar\nfoo baz\n'
+
+    if format == 'json':
+        assert [pattern['first'] for pattern in json.loads(StreamUtility.data(err_stream))['patterns']] == [2, 0]
+    else:
+        assert 'Processed 3 lines in' in StreamUtility.data(err_stream)
+
+
+@mark.parametrize('jobs', [1, 2])
+@mark.parametrize('prefetch', [False, True])
+def test_cli_run_compressed_inputs(prefetch: bool, jobs: int, tmp_path):
+    """
+    Cli must read compressed files and globs, and prefix matched lines with file names.
+    """
+
+    (tmp_path / 'foo.log.gz').write_bytes(gzip.compress(b'foo bar\nbaz\n'))
+    (tmp_path / 'foo.log.1.bz2').write_bytes(bz2.compress(b'foo qux\n'))
+    (tmp_path / 'foo.log.2.xz').write_bytes(lzma.compress(b'baz\nfoo fex'))
+
+    (in_stream, out_stream, err_stream) = streams(is_out_tty=True)
+    arguments: [str] = ['-i', str(tmp_path / 'foo.log.?.*'), '-i', str(tmp_path / 'foo.log.gz'), '-H', '--jobs', str(jobs)] + (['--prefetch'] if prefetch else [])
+    code: int = Cli().run(['…'] + arguments + ['foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == (f'Matched 3 lines out of total 5 provided.\n'
+                                              f'{tmp_path / "foo.log.1.bz2"}:foo qux\n{tmp_path / "foo.log.2.xz"}:foo fex\n{tmp_path / "foo.log.gz"}:foo bar\n')
+
+
+def test_cli_run_with_filename_on_standard_input():
+    """
+    Cli must attribute lines of the standard input when prefixing matched lines with file names.
+    """
+
+    (in_stream, out_stream, err_stream) = streams('foo bar\nbaz')
+    code: int = Cli().run(['…', '-H', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == '(standard input):foo bar\n'
+
+
+@mark.parametrize('jobs', [1, 2])
+def test_cli_run_broken_inputs(jobs: int, tmp_path):
+    """
+    Cli must report missing and corrupted input files.
+    """
+
+    (tmp_path / 'foo.gz').write_bytes(b'garbage')
+
+    # Corrupted body of the otherwise valid file fails in the decompressor itself rather than in reading the header.
+    data: bytes = gzip.compress(b'foo bar\n' * 100)
+    (tmp_path / 'qux.gz').write_bytes(data[:10] + bytes(byte ^ 0xff for byte in data[10:30]) + data[30:])
+
+    for path in [tmp_path / 'foo.gz', tmp_path / 'qux.gz', tmp_path / 'bar.log']:
+        (in_stream, out_stream, err_stream) = streams()
+        code: int = Cli().run(['…', '-i', str(path), '--jobs', str(jobs), 'foo %{0}'], in_stream, out_stream, err_stream)
+
+        assert code == 2
+        assert StreamUtility.data(err_stream).startswith('reggy: error: ')
+
+
+@mark.parametrize('jobs', [1, 2])
+def test_cli_run_checkpoint(jobs: int, tmp_path):
+    """
+    Cli must match only lines appended since the last run with the checkpoint.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar\nbaz\n')
+    arguments: [str] = ['…', '-i', str(tmp_path / 'foo.log'), '--checkpoint', str(tmp_path / 'checkpoint.json'), '--jobs', str(jobs), 'foo %{0}']
+
+    for (data, output) in [['', 'foo bar\n'], ['foo qux\n', 'foo qux\n'], ['', '']]:
+        with open(tmp_path / 'foo.log', 'a') as file:
+            file.write(data)
+
+        (in_stream, out_stream, err_stream) = streams()
+        code: int = Cli().run(arguments, in_stream, out_stream, err_stream)
+
+        assert code == 0
+        assert StreamUtility.data(out_stream) == output
+
+
+def test_cli_run_checkpoint_error(tmp_path):
+    """
+    Cli must not save the checkpoint when the run fails, matches not written yet must be matched again by the next run.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar\n')
+    arguments: [str] = ['…', '-i', str(tmp_path / 'foo.log'), '--checkpoint', str(tmp_path / 'checkpoint.json'), 'foo %{0}']
+
+    (in_stream, out_stream, err_stream) = streams()
+    assert Cli().run(arguments[:3] + ['-i', str(tmp_path / 'bar.log')] + arguments[3:], in_stream, out_stream, err_stream) == 2
+    assert StreamUtility.data(out_stream) == ''
+
+    (in_stream, out_stream, err_stream) = streams()
+    assert Cli().run(arguments, in_stream, out_stream, err_stream) == 0
+    assert StreamUtility.data(out_stream) == 'foo bar\n'
+
+
+@mark.parametrize('jobs', [1, 2])
+def test_cli_run_checkpoint_max_count(jobs: int, tmp_path):
+    """
+    Cli must keep lines after the last match written for the next run with the checkpoint when matching stops early.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar\nfoo baz\nqux\nfoo fex\n')
+    arguments: [str] = ['…', '-i', str(tmp_path / 'foo.log'), '--checkpoint', str(tmp_path / 'checkpoint.json'), '--jobs', str(jobs), '-m', '1', 'foo %{0}']
+
+    for output in ['foo bar\n', 'foo baz\n', 'foo fex\n', '']:
+        (in_stream, out_stream, err_stream) = streams()
+        Cli().run(arguments, in_stream, out_stream, err_stream)
+
+        assert StreamUtility.data(out_stream) == output
+
+
+def test_cli_run_follow(tmp_path):
+    """
+    Cli must write matches of followed files right away and require input files for following.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar\nbaz\nfoo qux\n')
+
+    (in_stream, out_stream, err_stream) = streams()
+    code: int = Cli().run(['…', '-i', str(tmp_path / 'foo.log'), '--follow', '--interval', '0', '-m', '2', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 0
+    assert StreamUtility.data(out_stream) == 'foo bar\nfoo qux\n'
+
+    (in_stream, out_stream, err_stream) = streams()
+    code = Cli().run(['…', '--follow', 'foo %{0}'], in_stream, out_stream, err_stream)
+
+    assert code == 2
+    assert 'need input files' in StreamUtility.data(err_stream)
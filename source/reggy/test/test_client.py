@@ -0,0 +1,56 @@
+import os
+from io import BytesIO
+from typing import Optional, Tuple
+
+from pytest import mark
+
+from reggy import client
+from reggy.client import ERR, FRAME, OUT, STATUS, read_frame
+from reggy.test import StreamUtility
+from reggy.test.test_cli import streams
+from reggy.test.test_server import serve
+
+
+@mark.parametrize('data, frames', [
+    (FRAME.pack(OUT, 3) + b'foo' + FRAME.pack(ERR, 0) + FRAME.pack(STATUS, 1) + b'0', [(OUT, b'foo'), (ERR, b''), (STATUS, b'0')]),
+    (FRAME.pack(OUT, 3) + b'fo', [None]),
+    (FRAME.pack(OUT, 3)[:2], [None]),
+    (b'', [None]),
+])
+def test_read_frame(data: bytes, frames: [Optional[Tuple[bytes, bytes]]]):
+    """
+    Frames must be read one by one, incomplete ones mean the connection got closed.
+    """
+
+    stream: BytesIO = BytesIO(data)
+    assert [read_frame(stream) for _ in frames] == frames
+
+
+def test_main_without_server(tmp_path, monkeypatch):
+    """
+    Commands must run in the client process when no server is listening.
+    """
+
+    monkeypatch.setattr(client, 'DEFAULT_PATH', str(tmp_path / 'reggy.sock'))
+
+    (in_stream, out_stream, err_stream) = streams('foo bar\nbaz\n')
+    assert client.main(['reggy', 'foo %{0}'], in_stream, out_stream, err_stream) == 0
+    assert StreamUtility.data(out_stream) == 'foo bar\n'
+
+
+def test_main_with_foreign_server(tmp_path, monkeypatch):
+    """
+    Commands must run in the client process when the server socket belongs to another user, nothing must be sent to it.
+    """
+
+    path: str = str(tmp_path / 'reggy.sock')
+    monkeypatch.setattr(client, 'DEFAULT_PATH', path)
+
+    with serve(path) as server:
+        monkeypatch.setattr(os, 'getuid', lambda: os.stat(path).st_uid + 1)
+
+        (in_stream, out_stream, err_stream) = streams('foo bar\nbaz\n')
+        assert client.main(['reggy', 'foo %{0}'], in_stream, out_stream, err_stream) == 0
+        assert StreamUtility.data(out_stream) == 'foo bar\n'
+        assert StreamUtility.data(err_stream).startswith('reggy: warning: not using the server: ')
+        assert server.cache.misses == 0
@@ -0,0 +1,181 @@
+import gzip
+import json
+import os
+
+from reggy.follow import Checkpoint, FollowReader
+
+
+def read(reader: FollowReader) -> [bytes]:
+    return [bytes(buffer[start:end]) for (buffer, start, end) in reader]
+
+
+def test_follow_reader_checkpoint(tmp_path):
+    """
+    Reader must read only complete lines appended since the last run and persist positions in the checkpoint.
+    """
+
+    path: str = str(tmp_path / 'foo.log')
+    checkpoint_path: str = str(tmp_path / 'checkpoint.json')
+
+    with open(path, 'wb') as file:
+        file.write(b'foo\nbar\nba')
+
+    checkpoint: Checkpoint = Checkpoint(checkpoint_path)
+    assert read(FollowReader([path], checkpoint)) == [b'foo', b'bar']
+    checkpoint.save()
+
+    with open(path, 'ab') as file:
+        file.write(b'z\nqux\n')
+
+    checkpoint = Checkpoint(checkpoint_path)
+    assert read(FollowReader([path], checkpoint)) == [b'baz', b'qux']
+    checkpoint.save()
+
+    checkpoint = Checkpoint(checkpoint_path)
+    assert checkpoint.offsets[os.path.abspath(path)][:3] == (os.stat(path).st_dev, os.stat(path).st_ino, 16)
+    assert read(FollowReader([path], checkpoint)) == []
+
+
+def test_follow_reader_rotation_and_truncation(tmp_path):
+    """
+    Reader must start over with rotated and truncated files and read compressed files only when they change.
+    """
+
+    (path, compressed_path) = (str(tmp_path / 'foo.log'), str(tmp_path / 'foo.log.1.gz'))
+    checkpoint: Checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+
+    (tmp_path / 'foo.log').write_bytes(b'foo\nbar\n')
+    (tmp_path / 'foo.log.1.gz').write_bytes(gzip.compress(b'baz\n'))
+
+    assert read(FollowReader([str(tmp_path / 'foo.log*')], checkpoint)) == [b'foo', b'bar', b'baz']
+    assert read(FollowReader([str(tmp_path / 'foo.log*')], checkpoint)) == []
+
+    # Rotation replaces the file with a new one, which can be even larger than the old one.
+    os.rename(path, str(tmp_path / 'foo.log.2'))
+    (tmp_path / 'foo.log').write_bytes(b'qux\nfex\nnit\n')
+
+    assert read(FollowReader([path], checkpoint)) == [b'qux', b'fex', b'nit']
+
+    with open(path, 'r+b') as file:
+        file.truncate(4)
+
+    assert read(FollowReader([path], checkpoint)) == [b'qux']
+
+    (tmp_path / 'foo.log.1.gz').write_bytes(gzip.compress(b'baz\nmeh\n'))
+    assert read(FollowReader([compressed_path], checkpoint)) == [b'baz', b'meh']
+
+
+def test_follow_reader_follow(tmp_path):
+    """
+    Reader must keep polling followed files, pick up new files and finish reading rotated files before switching to new ones.
+    """
+
+    path: str = str(tmp_path / 'foo.log')
+    (tmp_path / 'foo.log').write_bytes(b'foo\n')
+
+    reader: FollowReader = FollowReader([str(tmp_path / '*.log')], follow=True, interval=0)
+    buffers = reader.buffers()
+
+    assert next(buffers) == (path, b'foo\n')
+
+    with open(path, 'ab') as file:
+        file.write(b'bar\nba')
+
+    (tmp_path / 'qux.log').write_bytes(b'qux\n')
+
+    assert next(buffers) == (path, b'bar\n')
+    assert next(buffers) == (str(tmp_path / 'qux.log'), b'qux\n')
+
+    # The rest of the rotated file is read before the new file, including the trailing line.
+    with open(path, 'ab') as file:
+        file.write(b'z')
+
+    os.rename(path, str(tmp_path / 'foo.log.1'))
+    (tmp_path / 'foo.log').write_bytes(b'fex\n')
+
+    assert next(buffers) == (path, b'baz')
+    assert next(buffers) == (path, b'fex\n')
+
+    buffers.close()
+
+
+def test_follow_reader_rotated_path(tmp_path):
+    """
+    Reader must read the rotated file found at another path from where it was left off, both between runs and when following.
+    """
+
+    (path, rotated_path) = (str(tmp_path / 'foo.log'), str(tmp_path / 'foo.log.1'))
+    checkpoint: Checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+
+    (tmp_path / 'foo.log').write_bytes(b'foo\nbar\n')
+    assert read(FollowReader([str(tmp_path / 'foo.log*')], checkpoint)) == [b'foo', b'bar']
+
+    with open(path, 'ab') as file:
+        file.write(b'baz\n')
+
+    os.rename(path, rotated_path)
+    (tmp_path / 'foo.log').write_bytes(b'qux\n')
+
+    assert read(FollowReader([str(tmp_path / 'foo.log*')], checkpoint)) == [b'qux', b'baz']
+    assert read(FollowReader([str(tmp_path / 'foo.log*')], checkpoint)) == []
+
+    reader: FollowReader = FollowReader([str(tmp_path / 'foo.log*')], follow=True, interval=0)
+    buffers = reader.buffers()
+
+    assert [next(buffers) for _ in range(2)] == [(path, b'qux\n'), (rotated_path, b'foo\nbar\nbaz\n')]
+
+    os.rename(rotated_path, str(tmp_path / 'foo.log.2'))
+    os.rename(path, rotated_path)
+    (tmp_path / 'foo.log').write_bytes(b'fex\n')
+
+    assert next(buffers) == (path, b'fex\n')
+
+    with open(path, 'ab') as file:
+        file.write(b'nit\n')
+
+    assert next(buffers) == (path, b'nit\n')
+
+    buffers.close()
+
+
+def test_follow_reader_stopped_iteration(tmp_path):
+    """
+    Reader must keep lines not iterated over for the next run, even when they're in the same chunk as lines iterated over.
+    """
+
+    (tmp_path / 'foo.log').write_bytes(b'foo\nbar\nbaz')
+    checkpoint: Checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+
+    lines = iter(FollowReader([str(tmp_path / 'foo.log')], checkpoint))
+    (buffer, start, end) = next(lines)
+    assert buffer[start:end] == b'foo'
+    lines.close()
+
+    assert read(FollowReader([str(tmp_path / 'foo.log')], checkpoint)) == [b'bar']
+
+
+def test_follow_reader_stale_positions(tmp_path):
+    """
+    Reader must not take over positions of deleted files or of files with different content and must start over with rewritten files.
+    """
+
+    (path, checkpoint_path) = (str(tmp_path / 'foo.log'), str(tmp_path / 'checkpoint.json'))
+    (tmp_path / 'foo.log').write_bytes(b'foo 1\nfoo 2\nfoo 3\n')
+    (tmp_path / 'bar.log').write_bytes(b'')
+    status: os.stat_result = os.stat(path)
+
+    # Inodes of deleted files get reused and the one of an existing file can be the same as in the checkpoint, unless the content differs.
+    positions: dict = {str(tmp_path / 'gone.log'): [status.st_dev, status.st_ino, 12, FollowReader.fingerprint(b'foo 1\n')],
+                       str(tmp_path / 'bar.log'): [status.st_dev, status.st_ino, 6, FollowReader.fingerprint(b'bar\n')]}
+    (tmp_path / 'checkpoint.json').write_text(json.dumps(positions))
+
+    checkpoint: Checkpoint = Checkpoint(checkpoint_path)
+    assert list(checkpoint.offsets) == [str(tmp_path / 'bar.log')]
+    assert read(FollowReader([path], checkpoint)) == [b'foo 1', b'foo 2', b'foo 3']
+
+    # Files truncated and written again in place keep the inode, but not the content.
+    with open(path, 'r+b') as file:
+        file.truncate(0)
+        file.write(b'qux 1\nqux 2\nqux 3\nqux 4\n')
+
+    assert read(FollowReader([path], checkpoint)) == [b'qux 1', b'qux 2', b'qux 3', b'qux 4']
@@ -0,0 +1,70 @@
+import mmap
+
+from pytest import mark
+
+from reggy.index import LiteralIndex
+from reggy.matcher import Matcher, PatternSet
+
+__patterns = [
+    'foo %{0} baz %{1}',
+    'foo %{0} qux',
+    '%{0} baz %{1} qux',
+    '%{0} fex',
+    '%{0}',
+    'foo',
+    '',
+]
+
+__candidates_test_data = [
+    ['foo bar baz qux', [0, 1, 2, 4]],
+    ['foo bar qux', [1, 4]],
+    ['bar baz fex', [3, 4]],
+    ['bar qux', [4]],
+    ['foo', [4, 5]],
+    ['', [4]],
+]
+
+
+@mark.parametrize(['string', 'candidates'], __candidates_test_data)
+def test_literal_index_candidates(string: str, candidates: [int]):
+    """
+    Index must pick only patterns whose leading, trailing and inner literals are all found in the string.
+    """
+
+    matcher: Matcher = Matcher()
+    index: LiteralIndex = LiteralIndex([matcher.compile(pattern).literals if pattern else None for pattern in __patterns])
+
+    assert index.candidates(string) == candidates
+
+
+@mark.parametrize('string', ['foo bar baz qux', 'foo bar qux', 'bar baz fex', 'bar qux', 'foo', ''])
+def test_pattern_set_prefilter(string: str):
+    """
+    Pattern set with the prefilter must produce the same results as without it.
+    """
+
+    assert PatternSet(__patterns, prefilter=True).match(string) == PatternSet(__patterns, prefilter=False).match(string)
+
+
+def mapped(data: bytes) -> mmap.mmap:
+    buffer: mmap.mmap = mmap.mmap(-1, len(data))
+    buffer.write(data)
+    return buffer
+
+
+@mark.parametrize('engine', Matcher.engines)
+@mark.parametrize('buffer_type', [bytes, bytearray, mapped])
+def test_pattern_set_prefilter_buffers(engine: str, buffer_type: type):
+    """
+    Pattern set with the prefilter must match lines of bytearrays and memory-mapped files same as of bytes, including exact literals.
+    """
+
+    strings: [bytes] = [b'foo bar baz qux', b'foo bar qux', b'bar baz fex', b'bar qux', b'foo', b'']
+    data: bytes = b'\n'.join(strings)
+    buffer = buffer_type(data)
+    pattern_set: PatternSet = PatternSet(__patterns, Matcher(engine=engine), prefilter=True, binary=True)
+    start: int = 0
+
+    for string in strings:
+        assert pattern_set.match(buffer, start, start + len(string)) == pattern_set.match(string)
+        start += len(string) + 1
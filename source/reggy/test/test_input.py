@@ -0,0 +1,110 @@
+import bz2
+import gzip
+import lzma
+from io import StringIO
+
+from pytest import mark, raises
+
+from reggy.input import LineReader, MappedFile, FileReader
+
+
+@mark.parametrize(['is_tty', 'lines'], [[False, ['foo', '', 'bar']], [True, ['foo']]])
+def test_line_reader(is_tty: bool, lines: [str]):
+    """
+    Reader must strip line breaks, count lines and stop at the first empty line in a tty mode.
+    """
+
+    reader: LineReader = LineReader(StringIO('foo\n\nbar'), is_tty)
+
+    assert list(reader) == lines
+    assert reader.count == len(lines)
+
+
+@mark.parametrize(['data', 'lines'], [[b'', []], [b'foo', [b'foo']], [b'foo\n\nbar\n', [b'foo', b'', b'bar']], [b'\xff\nbar', [b'\xff', b'bar']]])
+def test_mapped_file_spans(data: bytes, lines: [bytes], tmp_path):
+    """
+    Mapped file must yield spans of lines without line breaks.
+    """
+
+    (tmp_path / 'foo.log').write_bytes(data)
+
+    with MappedFile(str(tmp_path / 'foo.log')) as file:
+        assert [file.buffer[start:end] for (start, end) in file.spans()] == lines
+
+
+@mark.parametrize('size', [1, 2, 5, 100])
+def test_mapped_file_chunks(size: int, tmp_path):
+    """
+    Mapped file must split into line-aligned chunks covering the whole file.
+    """
+
+    data: bytes = b'foo\nbar baz\n\nqux'
+    (tmp_path / 'foo.log').write_bytes(data)
+
+    with MappedFile(str(tmp_path / 'foo.log')) as file:
+        chunks: [bytes] = [file.buffer[start:end] for (start, end) in file.chunks(size)]
+
+    assert b''.join(chunks) == data
+    assert all(chunk.endswith(b'\n') for chunk in chunks[:-1])
+
+
+def test_mapped_file_reader(tmp_path):
+    """
+    Reader must iterate over lines of all files and count them.
+    """
+
+    (tmp_path / 'foo.log').write_bytes(b'foo\nbar\n')
+    (tmp_path / 'bar.log').write_bytes(b'baz')
+
+    reader: FileReader = FileReader([str(tmp_path / 'foo.log'), str(tmp_path / 'bar.log')])
+
+    assert [buffer[start:end] for (buffer, start, end) in reader] == [b'foo', b'bar', b'baz']
+    assert reader.count == 3
+
+
+@mark.parametrize('prefetch', [False, True])
+@mark.parametrize('buffer_size', [1, 3, 1 << 20])
+@mark.parametrize(['name', 'compress'], [['foo.log.gz', gzip.compress], ['foo.log.bz2', bz2.compress], ['foo.log.xz', lzma.compress]])
+def test_file_reader_compressed(name: str, compress, buffer_size: int, prefetch: bool, tmp_path):
+    """
+    Reader must decompress files by their extension and yield the same lines regardless of the buffer size, plain files included.
+    """
+
+    (tmp_path / name).write_bytes(compress(b'foo\n\nbar baz\nqux\n'))
+    (tmp_path / 'bar.log').write_bytes(b'fex')
+    (tmp_path / 'baz.gz').write_bytes(gzip.compress(b''))
+
+    reader: FileReader = FileReader([str(tmp_path / name), str(tmp_path / 'bar.log'), str(tmp_path / 'baz.gz')], buffer_size, prefetch)
+    lines: [tuple] = [(reader.path, bytes(buffer[start:end])) for (buffer, start, end) in reader]
+
+    assert lines == [(str(tmp_path / name), line) for line in [b'foo', b'', b'bar baz', b'qux']] + [(str(tmp_path / 'bar.log'), b'fex')]
+    assert reader.count == 5
+
+
+def test_file_reader_globs(tmp_path):
+    """
+    Reader must expand glob patterns in sorted order and keep patterns matching nothing.
+    """
+
+    for name in ['b.log', 'a.log', 'c.txt']:
+        (tmp_path / name).write_bytes(b'')
+
+    reader: FileReader = FileReader([str(tmp_path / '*.log'), str(tmp_path / 'c.txt'), str(tmp_path / '*.gz')])
+
+    assert reader.paths == [str(tmp_path / name) for name in ['a.log', 'b.log', 'c.txt', '*.gz']]
+
+
+def test_file_reader_prefetch_stops(tmp_path):
+    """
+    Reader must stop prefetching when iteration stops early and propagate reading errors.
+    """
+
+    (tmp_path / 'foo.gz').write_bytes(gzip.compress(b'foo\n' * 1000))
+    (tmp_path / 'bar.gz').write_bytes(b'garbage')
+
+    lines = iter(FileReader([str(tmp_path / 'foo.gz')], buffer_size=4, prefetch=True))
+    assert next(lines)[0] == b'foo\n'
+    lines.close()
+
+    with raises(OSError):
+        list(FileReader([str(tmp_path / 'bar.gz')], prefetch=True))
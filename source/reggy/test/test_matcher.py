@@ -1,6 +1,8 @@
-from pytest import mark
+import random
 
-from reggy.matcher import Matcher
+from pytest import mark, raises
+
+from reggy.matcher import LiteralPattern, Matcher, MatchResult, PatternSet
 
 __match_test_data = [
 
@@ -29,24 +31,279 @@ __match_test_data = [
 ]
 
 
+@mark.parametrize('engine', Matcher.engines)
 @mark.parametrize(['pattern', 'string', 'result'], __match_test_data)
-def test_match(pattern: str, string: str, result: {int: [str]}):
+def test_match(pattern: str, string: str, result: {int: [str]}, engine: str):
     """
     Matcher can match tokens in the string using valid patterns.
     """
 
-    assert Matcher().match(pattern, string) == result
+    assert Matcher(engine=engine).match(pattern, string) == result
 
 
-def test_match_with_invalid_input():
+@mark.parametrize('engine', Matcher.engines)
+def test_match_with_invalid_input(engine: str):
     """
     Matcher must not fail with invalid input.
     """
 
-    matcher: Matcher = Matcher()
+    matcher: Matcher = Matcher(engine=engine)
 
     # Empty pattern must not result in an error…
     assert matcher.match('', '') is None
 
     # …so is pattern without a token capture.
     assert matcher.match('foo', 'foo') == {}
+
+
+@mark.parametrize('engine', Matcher.engines)
+@mark.parametrize(['pattern', 'string', 'result'], __match_test_data)
+def test_match_result(pattern: str, string: str, result: {int: [str]}, engine: str):
+    """
+    Match result must produce the same tokens as matcher, sliced from the string by their spans.
+    """
+
+    match_result: MatchResult = Matcher(engine=engine).match_result(pattern, string)
+
+    assert match_result.dict() == result
+    assert all(match_result[rule_index] == tokens for (rule_index, tokens) in result.items())
+    assert all(string[start:end] == match_result.token(rule_index, occurrence) == tokens[occurrence]
+               for (rule_index, tokens) in result.items() for occurrence in range(len(tokens))
+               for (start, end) in [match_result.span(rule_index, occurrence)])
+
+
+def test_match_result_access():
+    """
+    Match result must expose token spans and fail on missing tokens.
+    """
+
+    match_result: MatchResult = Matcher().match_result('foo %{5} baz %{3} fex %{5}', 'foo bar baz qux fex pao')
+
+    assert (match_result.span(5), match_result.span(3), match_result.span(5, 1)) == ((4, 7), (12, 15), (20, 23))
+    assert 3 in match_result and 0 not in match_result
+    assert Matcher().match_result('foo %{0}', 'bar') is None
+
+    for access in [lambda: match_result[0], lambda: match_result.span(5, 2), lambda: match_result.token(0)]:
+        with raises(KeyError):
+            access()
+
+
+@mark.parametrize('prefilter', [False, True])
+def test_pattern_set_match_result(prefilter: bool):
+    """
+    Pattern set must produce match results same as matches.
+    """
+
+    pattern_set: PatternSet = PatternSet(['qux %{0}', 'foo %{1} baz %{0G}', 'foo'], prefilter=prefilter)
+
+    for string in ['foo bar baz baz qux', 'qux foo', 'foo', 'bar']:
+        result = pattern_set.match_result(string)
+        assert ((result[0], result[1].dict()) if result is not None else None) == pattern_set.match(string)
+
+
+@mark.parametrize('prefilter', [False, True])
+@mark.parametrize('engine', Matcher.engines)
+def test_pattern_set_first(prefilter: bool, engine: str):
+    """
+    Pattern set must find the index of the first matching pattern same as matches.
+    """
+
+    pattern_set: PatternSet = PatternSet(['qux %{0}', '', 'foo %{1} baz %{0G}', 'foo %{0}'], Matcher(engine=engine), prefilter=prefilter, max_length=12)
+
+    for string in ['foo bar baz qux', 'qux foo', 'foo bar', 'bar', 'qux foo bar baz qux']:
+        result = pattern_set.match(string)
+        assert pattern_set.first(string) == (result[0] if result is not None else None)
+
+    assert pattern_set.skipped == 4
+
+
+@mark.parametrize(['pattern', 'string', 'result'], __match_test_data)
+def test_compile(pattern: str, string: str, result: {int: [str]}):
+    """
+    Compiled pattern must produce the same results as matcher and be reusable.
+    """
+
+    compiled = Matcher().compile(pattern)
+
+    assert compiled.match(string) == result
+    assert compiled.match(string) == result
+    assert isinstance(compiled.rule_indices, tuple)
+
+
+@mark.parametrize('pattern', ['foo %{0} baz %{1G}', b'foo %{0S1} baz %{1}'])
+def test_compile_parsed(pattern):
+    """
+    Matcher must compile patterns from saved parse results the same as from scratch.
+    """
+
+    parsed = Matcher().parse(pattern)
+    string = pattern.replace(b'%{0S1}', b'bar qux') if isinstance(pattern, bytes) else pattern.replace('%{0}', 'bar').replace('%{1G}', 'qux')
+    compiled = Matcher().compile(pattern, parsed)
+
+    assert parsed == Matcher().parse(pattern)
+    assert compiled.source == parsed[0]
+    assert compiled.match(string) == Matcher().compile(pattern).match(string) is not None
+
+
+def test_compile_cache():
+    """
+    Matcher must cache compiled patterns and keep the cache bounded.
+    """
+
+    matcher: Matcher = Matcher(cache_size=2)
+
+    assert matcher.compile('foo %{0}') is matcher.compile('foo %{0}')
+    assert (matcher.cache.hits, matcher.cache.misses) == (1, 1)
+
+    matcher.match('bar %{0}', 'bar baz')
+    matcher.match('baz %{0}', 'baz qux')
+
+    # The least recently used pattern must be evicted.
+    assert len(matcher.cache) == 2
+    assert 'foo %{0}' not in matcher.cache
+
+
+__pattern_set_test_data = [
+
+    # Must report the first matching pattern.
+    [['foo %{0} baz', 'foo %{0}'], 'foo bar baz', (0, {0: ['bar']})],
+    [['foo %{0}', 'foo %{0} baz'], 'foo bar baz', (0, {0: ['bar baz']})],
+    [['qux %{0}', 'foo %{1} baz %{0G}'], 'foo bar baz baz qux', (1, {1: ['bar'], 0: ['baz qux']})],
+
+    # Must map capture groups of each pattern independently.
+    [['foo %{0S4} %{1}', 'foo %{1} baz %{2} fex %{0}'], 'foo bar baz qux fex pao', (1, {1: ['bar'], 2: ['qux'], 0: ['pao']})],
+
+    # Must skip empty patterns and match plain ones.
+    [['', 'foo'], 'foo', (1, {})],
+    [['', 'foo'], '', None],
+    [[], 'foo', None],
+]
+
+
+@mark.parametrize(['patterns', 'string', 'result'], __pattern_set_test_data)
+def test_pattern_set_match(patterns: [str], string: str, result):
+    """
+    Pattern set must find the first matching pattern and its tokens.
+    """
+
+    assert PatternSet(patterns).match(string) == result
+
+
+@mark.parametrize(['pattern', 'string', 'result'], __match_test_data[:6] + __match_test_data[9:])
+def test_compile_bytes(pattern: str, string: str, result: {int: [str]}):
+    """
+    Bytes patterns must match bytes and produce bytes tokens.
+    """
+
+    result = {rule: [token.encode() for token in tokens] for (rule, tokens) in result.items()}
+
+    assert Matcher().compile(pattern.encode()).match(string.encode()) == result
+    assert Matcher().compile(pattern.encode()).match(b'_' + string.encode() + b'_', 1, len(string) + 1) == result
+
+
+@mark.parametrize('prefilter', [False, True])
+def test_pattern_set_binary(prefilter: bool):
+    """
+    Binary pattern set must match the part of the bytes-like object limited by positions.
+    """
+
+    pattern_set: PatternSet = PatternSet(['foo %{0}', 'bar %{0S1} \xe9'], prefilter=prefilter, binary=True)
+    buffer: bytes = 'foo baz\nbar baz qux é'.encode()
+
+    assert pattern_set.match(buffer, 0, 7) == (0, {0: [b'baz']})
+    assert pattern_set.match(buffer, 8) == (1, {0: [b'baz qux']})
+    assert pattern_set.match(buffer) is None
+
+
+__match_many_test_data = [
+    ['foo %{0}', ['foo bar', 'baz', 'foo qux'], [(0, {0: ['bar']}), (2, {0: ['qux']})]],
+    [['foo %{0}', 'baz %{0}'], ['foo bar', 'qux', 'baz qux'], [(0, {0: ['bar']}), (2, {0: ['qux']})]],
+    [PatternSet(['foo %{0}', 'foo %{1}']), ['foo bar'], [(0, {0: ['bar']})]],
+    ['', ['foo', ''], []],
+]
+
+
+@mark.parametrize(['patterns', 'lines', 'result'], __match_many_test_data)
+def test_match_many(patterns, lines: [str], result):
+    """
+    Matcher must lazily match lines in batch and yield indices of matched ones with tokens.
+    """
+
+    assert list(Matcher().match_many(patterns, iter(lines))) == result
+
+
+@mark.parametrize(['patterns', 'lines', 'result'], __match_many_test_data)
+def test_filter_lines(patterns, lines: [str], result):
+    """
+    Matcher must lazily match lines in batch and yield indices of matched ones.
+    """
+
+    assert list(Matcher().filter_lines(patterns, iter(lines))) == [index for (index, _) in result]
+
+
+def test_literal_engine():
+    """
+    Literal engine must be used for patterns without space limitation modifiers and produce the same results as the regex one.
+    """
+
+    matcher: Matcher = Matcher(engine='literal')
+
+    assert isinstance(matcher.compile('foo %{0G} baz %{1}'), LiteralPattern)
+    assert not isinstance(matcher.compile('foo %{0S1} baz %{1}'), LiteralPattern)
+
+    generator: random.Random = random.Random(0)
+    regex_matcher: Matcher = Matcher()
+
+    # Small alphabet of characters shared between literals and strings produces lots of ambiguous matches, line breaks force the fallback.
+    for _ in range(5000):
+        literals: [str] = [''.join(generator.choices('ab ', k=generator.randint(0, 2))) for _ in range(generator.randint(1, 5))]
+        pattern: str = literals[0] + ''.join(f'%{{{generator.randint(0, 2)}{generator.choice(["", "G"])}}}{literal}' for literal in literals[1:])
+        string: str = ''.join(generator.choices('ab \n', weights=[10, 10, 10, 1], k=generator.randint(0, 10)))
+
+        assert matcher.compile(pattern).match(string) == regex_matcher.compile(pattern).match(string), (pattern, string)
+        assert matcher.compile(pattern).match('_' + string + '_', 1, len(string) + 1) == regex_matcher.compile(pattern).match(string), (pattern, string)
+        assert matcher.compile(pattern).matches(string) == regex_matcher.compile(pattern).matches(string), (pattern, string)
+
+        result: MatchResult = matcher.compile(pattern).match_result(string)
+        regex_result: MatchResult = regex_matcher.compile(pattern).match_result(string)
+        assert (result.spans if result else None) == (regex_result.spans if regex_result else None), (pattern, string)
+
+
+__analyze_test_data = [
+    ['regex', 'foo %{0} baz %{1}', False, []],
+    ['regex', 'foo %{0}%{1}', False, ['captures %{0} and %{1} are adjacent']],
+    ['regex', 'the %{0S1} %{1} ran away', False, ['captures %{0} and %{1} are separated only by whitespace']],
+    ['regex', 'the %{0} %{1} ran away', False, []],
+    ['regex', 'foo %{0} baz %{1} qux %{2}', False, []],
+    ['regex', 'foo %{0} baz %{1} qux %{2}', True, ['3 captures can make the regex backtrack polynomially on long lines, consider the literal engine']],
+    ['literal', 'foo %{0} baz %{1} qux %{2}', True, []],
+    ['literal', 'foo %{0S1} baz %{1} qux %{2}', True, ['3 captures can make the regex backtrack polynomially on long lines, consider fewer captures']],
+    ['regex', '', True, []],
+]
+
+
+@mark.parametrize(['engine', 'pattern', 'backtracking', 'warnings'], __analyze_test_data)
+def test_analyze(engine: str, pattern: str, backtracking: bool, warnings: [str]):
+    """
+    Matcher must warn about ambiguous pattern shapes and about backtracking-prone ones only when asked.
+    """
+
+    result: [str] = Matcher(engine=engine).analyze(pattern, backtracking)
+
+    assert len(result) == len(warnings)
+    assert all(warning.startswith(prefix) for (warning, prefix) in zip(result, warnings))
+
+
+@mark.parametrize('prefilter', [False, True])
+def test_pattern_set_max_length(prefilter: bool):
+    """
+    Pattern set must skip and count strings over the length limit.
+    """
+
+    pattern_set: PatternSet = PatternSet(['foo %{0}'], prefilter=prefilter, max_length=7)
+
+    assert pattern_set.match('foo bar') == (0, {0: ['bar']})
+    assert pattern_set.match('foo barbaz') is None
+    assert pattern_set.matches('_foo bar_', 1, 8)
+    assert not pattern_set.matches('foo barbaz')
+    assert pattern_set.skipped == 2
@@ -0,0 +1,66 @@
+import mmap
+
+from pytest import mark
+
+from reggy.matcher import Matcher, PatternSet
+from reggy.memo import MemoizingPatternSet
+
+patterns: [str] = ['qux %{0}', '', 'foo %{1} baz %{0G}', 'foo %{0}']
+strings: [str] = ['foo bar baz qux', 'qux foo', 'foo bar', 'bar', 'foo bar baz qux', 'bar', 'qux foo', 'foo bar baz qux qux foo bar']
+
+
+@mark.parametrize('prefilter', [False, True])
+@mark.parametrize('engine', Matcher.engines)
+@mark.parametrize('cache_policy', ['lru', 'fifo'])
+def test_memoizing_pattern_set(prefilter: bool, engine: str, cache_policy: str):
+    """
+    Memoizing pattern set must produce the same results as the plain one, matching repeated lines only against the remembered pattern.
+    """
+
+    pattern_set: PatternSet = PatternSet(patterns, Matcher(engine=engine), prefilter=prefilter)
+    memoizing_set: MemoizingPatternSet = MemoizingPatternSet(patterns, Matcher(engine=engine), prefilter=prefilter, cache_size=2,
+                                                             cache_policy=cache_policy)
+
+    for string in strings:
+        assert memoizing_set.matches(string) == pattern_set.matches(string)
+        assert memoizing_set.match(string) == pattern_set.match(string)
+
+        result = memoizing_set.match_result(string)
+        assert ((result[0], result[1].dict()) if result is not None else None) == pattern_set.match(string)
+
+    # Every string is looked up three times, only the first lookup of each distinct string within the cache size is a miss.
+    assert memoizing_set.cache.hits + memoizing_set.cache.misses == len(strings) * 3
+    assert memoizing_set.cache.hits >= len(strings) * 2
+
+
+def test_memoizing_pattern_set_binary():
+    """
+    Memoizing pattern set must key lines of the buffer on their content regardless of their position and skip long lines without caching.
+    """
+
+    memoizing_set: MemoizingPatternSet = MemoizingPatternSet(['foo %{0}'], binary=True, max_length=7)
+    buffer: bytes = b'foo bar\nfoo baz\nfoo bar\nfoo barbaz\nfoo bar'
+    spans: [(int, int)] = [(0, 7), (8, 15), (16, 23), (24, 34), (35, 42)]
+
+    assert [memoizing_set.match(buffer, start, end) for (start, end) in spans] == [(0, {0: [b'bar']}), (0, {0: [b'baz']}), (0, {0: [b'bar']}),
+                                                                                    None, (0, {0: [b'bar']})]
+    assert (memoizing_set.cache.hits, memoizing_set.cache.misses, memoizing_set.skipped) == (2, 2, 1)
+    assert len(memoizing_set.cache) == 2
+
+
+def test_memoizing_pattern_set_mapped():
+    """
+    Memoizing pattern set must key lines spanning the whole memory map on their content and not keep the map itself in the cache.
+    """
+
+    memoizing_set: MemoizingPatternSet = MemoizingPatternSet(['foo %{0}'], binary=True)
+
+    for _ in range(2):
+        buffer: mmap.mmap = mmap.mmap(-1, 7)
+        buffer.write(b'foo bar')
+
+        assert memoizing_set.match(buffer, 0, len(buffer)) == (0, {0: [b'bar']})
+        buffer.close()
+
+    assert memoizing_set.match(bytearray(b'foo bar')) == (0, {0: [b'bar']})
+    assert (memoizing_set.cache.hits, memoizing_set.cache.misses) == (2, 1)
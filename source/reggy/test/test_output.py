@@ -0,0 +1,117 @@
+import os
+from io import StringIO
+from typing import AnyStr, Optional
+
+from pytest import mark, raises
+
+from reggy.matcher import PatternSet
+from reggy.output import LineWriter, MatchFormatter, replaced_file
+
+
+class FlushCountingStream(StringIO):
+    flush_count: int = 0
+
+    def flush(self):
+        self.flush_count += 1
+        super().flush()
+
+
+@mark.parametrize(['flush', 'writes', 'flushes'], [['line', ['foo\n', 'bar\n', 'baz\n'], 4], ['batch', ['foo\nbar\n', 'baz\n'], 2], ['end', ['foo\nbar\n', 'baz\n'], 1]])
+def test_line_writer(flush: str, writes: [str], flushes: int):
+    """
+    Writer must batch lines and flush the stream according to the policy.
+    """
+
+    stream: FlushCountingStream = FlushCountingStream()
+    stream.write = lambda data, write=stream.write: (writes.remove(data), write(data))
+    writer: LineWriter = LineWriter(stream, batch_size=2, flush=flush)
+
+    for line in ['foo', 'bar', 'baz']:
+        writer.write(line)
+
+    writer.close()
+
+    assert writes == []
+    assert stream.getvalue() == 'foo\nbar\nbaz\n'
+    assert stream.flush_count == flushes
+
+
+def test_line_writer_with_invalid_policy():
+    """
+    Writer must reject unknown flush policies.
+    """
+
+    with raises(ValueError):
+        LineWriter(StringIO(), flush='never')
+
+
+@mark.parametrize(['format', 'string', 'output'], [
+    ['line', 'foo bar baz', 'foo bar baz'],
+    ['line', b'foo bar baz', 'foo bar baz'],
+    ['json', 'foo "bar" baz', '{"pattern": 0, "tokens": {"0": ["\\"bar\\""], "1": ["baz"]}, "line": "foo \\"bar\\" baz"}'],
+    ['json', b'foo \xffbar baz', '{"pattern": 0, "tokens": {"0": ["�bar"], "1": ["baz"]}, "line": "foo �bar baz"}'],
+    ['tsv', 'foo bar\tbaz qux', '0\tbar\\tbaz\tqux'],
+    ['tsv', 'foo bar\\ baz', '0\tbar\\\\\tbaz'],
+    ['tsv', 'quux', None],
+])
+def test_match_formatter(format: str, string: AnyStr, output: Optional[str]):
+    """
+    Formatter must format matched lines and escape tokens according to the format.
+    """
+
+    pattern_set: PatternSet = PatternSet(['foo %{0} %{1}'], binary=isinstance(string, bytes))
+    assert MatchFormatter(format).match(pattern_set, string) == output
+
+
+def test_match_formatter_with_positions():
+    """
+    Formatter must match and format only the part of the string within positions.
+    """
+
+    pattern_set: PatternSet = PatternSet(['foo %{0}'], binary=True)
+    assert MatchFormatter('tsv').match(pattern_set, b'foo bar\nfoo baz\n', 8, 15) == '0\tbaz'
+
+
+def test_match_formatter_with_invalid_format():
+    """
+    Formatter must reject unknown formats.
+    """
+
+    with raises(ValueError):
+        MatchFormatter('xml')
+
+
+@mark.parametrize(['format', 'output'], [
+    ['line', 'foo\tbar.log:foo bar baz'],
+    ['json', '{"pattern": 0, "tokens": {"0": ["bar"], "1": ["baz"]}, "line": "foo bar baz", "file": "foo\\tbar.log"}'],
+    ['tsv', 'foo\\tbar.log\t0\tbar\tbaz'],
+])
+def test_match_formatter_with_path(format: str, output: str):
+    """
+    Formatter must attribute matched lines to their files according to the format.
+    """
+
+    assert MatchFormatter(format).match(PatternSet(['foo %{0} %{1}']), 'foo bar baz', path='foo\tbar.log') == output
+
+
+def test_replaced_file(tmp_path):
+    """
+    Replaced file must get the new content only once it's completely written and must stay as it was when writing fails.
+    """
+
+    path: str = str(tmp_path / 'foo.txt')
+    (tmp_path / 'foo.txt').write_text('foo')
+
+    with raises(ValueError):
+        with replaced_file(path) as file:
+            file.write('bar')
+            raise ValueError('baz')
+
+    assert (tmp_path / 'foo.txt').read_text() == 'foo'
+
+    with replaced_file(path) as file:
+        file.write('bar')
+        assert (tmp_path / 'foo.txt').read_text() == 'foo'
+
+    assert (tmp_path / 'foo.txt').read_text() == 'bar'
+    assert os.listdir(tmp_path) == ['foo.txt']
@@ -0,0 +1,29 @@
+from pytest import mark
+
+from reggy.parallel import ParallelMatcher
+
+
+@mark.parametrize('chunk_size', [1, 3, 1000])
+def test_parallel_matcher(chunk_size: int):
+    """
+    Parallel matcher must yield matched lines in the input order.
+    """
+
+    lines: [str] = [f'foo {i}' if i % 3 else f'bar {i}' for i in range(50)]
+    matcher: ParallelMatcher = ParallelMatcher(['foo %{0}'], jobs=3, chunk_size=chunk_size)
+
+    assert list(matcher.match(lines)) == [line for line in lines if line.startswith('foo')]
+    assert list(matcher.match([])) == []
+
+
+def test_parallel_matcher_cache():
+    """
+    Parallel matcher must count result cache hits and misses of all workers.
+    """
+
+    lines: [str] = ['foo bar', 'baz'] * 50
+    matcher: ParallelMatcher = ParallelMatcher(['foo %{0}'], jobs=2, chunk_size=10, cache_size=16, cache_policy='fifo')
+
+    assert list(matcher.match(lines)) == ['foo bar'] * 50
+    assert matcher.cache_hits + matcher.cache_misses == 100
+    assert 2 <= matcher.cache_misses <= 4
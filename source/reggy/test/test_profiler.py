@@ -0,0 +1,62 @@
+import json
+from io import StringIO
+
+from pytest import mark
+
+from reggy.matcher import PatternSet
+from reggy.profiler import ProfilingPatternSet
+
+__strings = ['foo bar baz', 'foo qux', 'quux', 'foo bar baz qux fex']
+
+
+@mark.parametrize('prefilter', [False, True])
+def test_profiling_pattern_set(prefilter: bool):
+    """
+    Profiling pattern set must produce the same matches as the plain one and count tries, hits and first matches of every pattern.
+    """
+
+    patterns: [str] = ['foo %{0} baz', 'foo %{0}', '', 'bar %{0}']
+    profile: ProfilingPatternSet = ProfilingPatternSet(patterns, prefilter=prefilter)
+    pattern_set: PatternSet = PatternSet(patterns, prefilter=prefilter)
+
+    for string in __strings:
+        assert profile.match(string) == pattern_set.match(string)
+
+        result = profile.match_result(string)
+        assert ((result[0], result[1].dict()) if result is not None else None) == pattern_set.match(string)
+
+    statistics = [(statistics.hits, statistics.first) for statistics in profile.statistics]
+
+    assert statistics == [(2, 2), (6, 4), (0, 0), (0, 0)]
+    assert all(statistics.total >= statistics.maximum > 0 for statistics in profile.statistics[:2])
+    # Without the prefilter every non-empty pattern is tried on every string, twice as both match methods are used.
+    assert profile.statistics[1].tried == (6 if prefilter else 8)
+    assert profile.statistics[3].tried == (0 if prefilter else 8)
+
+
+@mark.parametrize('format', ProfilingPatternSet.formats)
+def test_profiling_pattern_set_report(format: str):
+    """
+    Profiling pattern set must report statistics of every pattern and the throughput.
+    """
+
+    profile: ProfilingPatternSet = ProfilingPatternSet(['foo %{0}', 'bar %{0}'])
+    stream: StringIO = StringIO()
+
+    for string in __strings:
+        profile.matches(string)
+
+    profile.report(stream, format, len(__strings), 0.5)
+
+    if format == 'json':
+        report: dict = json.loads(stream.getvalue())
+
+        assert (report['lines'], report['wall_time'], report['lines_per_second']) == (4, 0.5, 8.0)
+        assert [(pattern['pattern'], pattern['tried'], pattern['hits'], pattern['first']) for pattern in report['patterns']] == [
+            ('foo %{0}', 4, 3, 3), ('bar %{0}', 4, 0, 0)]
+    else:
+        lines: [str] = stream.getvalue().splitlines()
+
+        assert len(lines) == 4
+        assert lines[1].split()[:4] == ['0', '4', '3', '3'] and lines[1].endswith('foo %{0}')
+        assert lines[3] == 'Processed 4 lines in 0.500 s, 8 lines per second.'
@@ -0,0 +1,179 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, Tuple, Union
+
+from pytest import mark, raises
+
+from reggy.cli import Cli
+from reggy.client import Client
+from reggy.server import Server, ServerCli
+from reggy.test import StreamUtility
+from reggy.test.test_cli import Outputs, streams
+
+
+@contextmanager
+def serve(path: str, **kwargs) -> Iterator[Server]:
+    """
+    Runs the server on a background thread for the duration of the context.
+    """
+
+    server: Server = Server(path, **kwargs)
+    thread: threading.Thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def run(runner: Union[Cli, Client], argv: [str], in_data: str = '', is_out_tty: bool = False) -> Tuple[int, Outputs]:
+    (in_stream, out_stream, err_stream) = streams(in_data, is_out_tty=is_out_tty)
+    status: int = runner.run(argv, in_stream, out_stream, err_stream)
+    return (status, (StreamUtility.data(out_stream), StreamUtility.data(err_stream)))
+
+
+@mark.parametrize('argv, in_data, is_out_tty', [
+    (['reggy', 'foo %{0} baz %{1}'], 'foo bar baz qux\nfoo bar\n', False),
+    (['reggy', 'foo %{0} baz %{1}'], 'foo bar baz qux\nfoo bar\n', True),
+    (['reggy', '--format', 'json', 'foo %{0} baz %{1}', 'qux %{0}'], 'foo bar baz qux\nqux ∑\nbar\n', False),
+    (['reggy', '-c', '--max-line-length', '10', 'foo %{0}'], 'foo bar\nfoo barbazquxfoo\n', False),
+    (['reggy', '-q', 'foo %{0}'], 'bar\n', False),
+    (['reggy', '--cache-size', '4', 'foo %{0}'], 'foo bar\nbaz\nfoo bar\n', False),
+    (['reggy', 'foo %{0} %{1}'], 'foo bar baz\n', False),
+    (['reggy'], '', False),
+    (['reggy', '--unknown'], '', False),
+])
+def test_server_matches_cli(tmp_path, argv: [str], in_data: str, is_out_tty: bool):
+    """
+    Commands run through the server must have the same status, output and errors as run directly, including warnings for cached patterns.
+    """
+
+    expected: Tuple[int, Outputs] = run(Cli(), argv, in_data, is_out_tty)
+
+    with serve(str(tmp_path / 'reggy.sock')) as server:
+        client: Client = Client(server.server_address)
+        assert run(client, argv, in_data, is_out_tty) == expected
+        assert run(client, argv, in_data, is_out_tty) == expected
+
+
+def test_server_caches_patterns(tmp_path):
+    """
+    Server must compile each pattern list once and evict least recently used ones when the cache is full.
+    """
+
+    with serve(str(tmp_path / 'reggy.sock'), cache_size=1) as server:
+        client: Client = Client(server.server_address)
+
+        assert run(client, ['reggy', 'foo %{0}'], 'foo bar\n') == (0, ('foo bar\n', ''))
+        assert run(client, ['reggy', 'foo %{0}'], 'foo baz\n') == (0, ('foo baz\n', ''))
+        assert (server.cache.hits, server.cache.misses) == (1, 1)
+
+        assert run(client, ['reggy', 'bar %{0}'], 'bar baz\n') == (0, ('bar baz\n', ''))
+        assert run(client, ['reggy', 'foo %{0}'], 'foo qux\n') == (0, ('foo qux\n', ''))
+        assert (server.cache.hits, server.cache.misses) == (1, 3)
+
+
+def test_server_pattern_warnings(tmp_path):
+    """
+    Server must write warnings about cached patterns in the detail requested by each command.
+    """
+
+    argvs: [[str]] = [['reggy', 'foo %{0}%{1}'], ['reggy', '--check-patterns', 'foo %{0}%{1}']]
+    expected: [Tuple[int, Outputs]] = [run(Cli(), argv, 'foo bar baz\n') for argv in argvs]
+    assert expected[0] != expected[1]
+
+    with serve(str(tmp_path / 'reggy.sock')) as server:
+        client: Client = Client(server.server_address)
+
+        for _ in range(2):
+            assert [run(client, argv, 'foo bar baz\n') for argv in argvs] == expected
+
+
+def test_server_paths(tmp_path, monkeypatch):
+    """
+    Server must resolve relative paths against the client working directory and keep using catalogs compiled by earlier runs.
+    """
+
+    (tmp_path / 'foo.log').write_text('foo bar\nbaz qux\n')
+    (tmp_path / 'patterns.txt').write_text('baz %{0}\n')
+    monkeypatch.chdir(tmp_path)
+
+    with serve(str(tmp_path / 'reggy.sock')) as server:
+        client: Client = Client(server.server_address)
+
+        for _ in range(2):
+            assert run(client, ['reggy', '-i', 'foo.*', '-f', 'patterns.txt', '--compiled-catalog', 'patterns.compiled']) == (0, ('baz qux\n', ''))
+
+        assert os.path.exists(tmp_path / 'patterns.compiled')
+        assert server.cache.hits == 1
+
+
+def test_server_concurrent_clients(tmp_path):
+    """
+    Concurrent clients sharing compiled patterns must get their own results and counters.
+    """
+
+    argv: [str] = ['reggy', '-c', '--max-line-length', '8', 'foo %{0}']
+
+    with serve(str(tmp_path / 'reggy.sock'), workers=4) as server:
+        def count(index: int) -> Tuple[int, Outputs]:
+            return run(Client(server.server_address), argv, 'foo bar\nfoo barbaz\n' * index)
+
+        with ThreadPoolExecutor(8) as executor:
+            results: [Tuple[int, Outputs]] = list(executor.map(count, range(1, 33)))
+
+    for (index, result) in enumerate(results, 1):
+        assert result == (0, (f'{index}\n', f'reggy: Skipped {index} lines longer than 8.\n'))
+
+
+def test_server_command_error(tmp_path, monkeypatch):
+    """
+    Server must send the error of the failed command to the client along with the status and keep serving other commands.
+    """
+
+    def fail(*_) -> int:
+        raise ValueError('foo')
+
+    with serve(str(tmp_path / 'reggy.sock')) as server:
+        client: Client = Client(server.server_address)
+
+        with monkeypatch.context() as context:
+            context.setattr(ServerCli, 'run', fail)
+            assert run(client, ['reggy', 'foo %{0}'], 'foo bar\n') == (2, ('', 'reggy: error: foo\n'))
+
+        assert run(client, ['reggy', 'foo %{0}'], 'foo bar\n') == (0, ('foo bar\n', ''))
+
+
+def test_server_unsupported(tmp_path):
+    """
+    Server must refuse to follow files, which never finishes, and to listen on the socket of a running server.
+    """
+
+    with serve(str(tmp_path / 'reggy.sock')) as server:
+        (status, (_, err)) = run(Client(server.server_address), ['reggy', '--follow', '-i', 'foo.log', 'foo %{0}'])
+        assert (status, err) == (2, 'reggy: error: following isn\'t supported by the server, run reggy directly\n')
+
+        with raises(OSError):
+            Server(server.server_address)
+
+        assert os.path.exists(server.server_address)
+
+
+def test_server_stale_socket(tmp_path):
+    """
+    Server must replace the socket left by a server that wasn't shut down cleanly and remove its own one when closed.
+    """
+
+    path: str = str(tmp_path / 'reggy.sock')
+    stale: Server = Server(path)
+    stale.socket.close()
+
+    with serve(path) as server:
+        assert run(Client(server.server_address), ['reggy', 'foo %{0}'], 'foo bar\n') == (0, ('foo bar\n', ''))
+
+    assert not os.path.exists(path)
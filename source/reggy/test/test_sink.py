@@ -0,0 +1,168 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from io import StringIO
+
+from pytest import mark, raises
+
+from reggy.sink import QueueSink, TraceRecord, TraceSink
+from reggy.test.test_tracer import Traceable
+from reggy.tracer import Tracer
+
+
+def record(index: int = 0) -> TraceRecord:
+    return TraceRecord(0.0, 'Foo', 'CALL', 'bar', f'with signature: ({index})')
+
+
+@mark.parametrize('is_json', [False, True])
+def test_trace_sink(is_json: bool):
+    """
+    Sink must write records as text or JSON lines.
+    """
+
+    stream: StringIO = StringIO()
+    sink: TraceSink = TraceSink(stream, is_json)
+    sink.write(record())
+    sink.close()
+
+    if is_json:
+        assert json.loads(stream.getvalue()) == {'time': 0.0, 'owner': 'Foo', 'operation': 'CALL', 'function': 'bar', 'details': 'with signature: (0)'}
+    else:
+        assert stream.getvalue().endswith(' Foo CALL bar with signature: (0)\n')
+
+
+@mark.parametrize('policy', QueueSink.policies)
+def test_queue_sink(policy: str):
+    """
+    Queue sink must write all records in the background when the queue doesn't overflow.
+    """
+
+    stream: StringIO = StringIO()
+    sink: QueueSink = QueueSink(stream, is_json=True, batch_size=3, policy=policy)
+
+    for index in range(10):
+        sink.write(record(index))
+
+    sink.flush()
+
+    assert [json.loads(line)['details'] for line in stream.getvalue().splitlines()] == [f'with signature: ({index})' for index in range(10)]
+
+    sink.close()
+
+
+def test_queue_sink_drops_records():
+    """
+    Queue sink with the drop policy must drop and count records when the queue is full.
+    """
+
+    written: threading.Event = threading.Event()
+    released: threading.Event = threading.Event()
+
+    class BlockingStream(StringIO):
+        def write(self, data: str) -> int:
+            written.set()
+            released.wait()
+            return super().write(data)
+
+    stream: BlockingStream = BlockingStream()
+    sink: QueueSink = QueueSink(stream, size=2, policy='drop')
+
+    # The first record gets taken by the background thread, which then blocks on writing it.
+    sink.write(record(0))
+    written.wait()
+
+    for index in range(1, 6):
+        sink.write(record(index))
+
+    released.set()
+    sink.close()
+
+    assert sink.dropped == 3
+    assert len(stream.getvalue().splitlines()) == 3
+
+
+@mark.parametrize('policy', QueueSink.policies)
+def test_queue_sink_failures(policy: str):
+    """
+    Queue sink must keep writing after the stream fails and drop records written after it's closed, flushing and writing must never hang.
+    """
+
+    class FailingStream(StringIO):
+        def write(self, text: str) -> int:
+            if 'signature: (0)' in text:
+                raise OSError('foo')
+
+            return super().write(text)
+
+    stream: StringIO = FailingStream()
+    sink: QueueSink = QueueSink(stream, is_json=True, size=1, batch_size=1, policy=policy)
+
+    for index in range(3):
+        sink.write(record(index))
+        sink.flush()
+
+    assert [json.loads(line)['details'] for line in stream.getvalue().splitlines()] == ['with signature: (1)', 'with signature: (2)']
+
+    sink.close()
+
+    for index in range(3):
+        sink.write(record(index))
+
+    sink.flush()
+    assert sink.dropped == 4
+
+
+def test_queue_sink_with_invalid_policy():
+    """
+    Queue sink must reject unknown policies.
+    """
+
+    with raises(ValueError):
+        QueueSink(policy='never')
+
+
+def test_tracer_sink():
+    """
+    Tracer must write records into the custom sink.
+    """
+
+    stream: StringIO = StringIO()
+    (Tracer.skip, Tracer.quiet, Tracer.sink) = (False, True, QueueSink(stream, is_json=True))
+
+    try:
+        Traceable().foo('bar', 'baz')
+        Tracer.sink.close()
+    finally:
+        (Tracer.skip, Tracer.quiet, Tracer.sink) = (True, False, None)
+
+    assert [(item['owner'], item['operation'], item['function']) for item in map(json.loads, stream.getvalue().splitlines())] == [
+        ('Traceable', 'CALL', 'foo'),
+        ('Traceable', 'EXIT', 'foo'),
+    ]
+
+
+def test_queue_sink_flushes_at_exit():
+    """
+    Queue sink must write all queued records when the process exits without closing it.
+    """
+
+    script: str = """
+import sys
+from reggy.sink import QueueSink
+from reggy.test.test_tracer import Traceable
+from reggy.tracer import Tracer
+
+(Tracer.skip, Tracer.quiet, Tracer.sink) = (False, True, QueueSink(sys.stdout, is_json=True))
+traceable = Traceable()
+
+for _ in range(20000):
+    traceable.foo('bar', 'baz')
+"""
+
+    source: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    process: subprocess.CompletedProcess = subprocess.run([sys.executable, '-c', script], stdout=subprocess.PIPE, universal_newlines=True,
+                                                          cwd=source, check=True)
+
+    assert len(process.stdout.splitlines()) == 40000
@@ -1,10 +1,14 @@
+import os
 import re
+import subprocess
+import sys
 from io import BytesIO, TextIOWrapper
 from typing import Optional
 
 import pytest
 from pytest import mark
 
+from reggy.matcher import Matcher
 from reggy.test import StreamUtility
 from reggy.tracer import Tracer
 
@@ -66,3 +70,126 @@ def test_tracer(skip: bool, quiet: bool, expected_result: str):
     result = re.sub(r'\d\d\d\d\.\d\d\.\d\d-\d\d:\d\d:\d\d\.\d\d\d\d\d\d ', '', result)
 
     assert result == expected_result
+
+
+def test_tracer_skip_on_decoration():
+    """
+    Tracer must leave the function undecorated when tracing is disabled for good.
+    """
+
+    def foo():
+        pass
+
+    assert Tracer.trace(skip=True)(foo) is foo
+    assert Tracer.trace()(foo) is not foo
+
+    Tracer.environment = '0'
+
+    try:
+        assert Tracer.trace()(foo) is foo
+        assert Tracer.trace(skip=False)(foo) is not foo
+    finally:
+        Tracer.environment = ''
+
+
+def test_tracer_hot_functions():
+    """
+    Tracer must leave hot functions undecorated unless tracing is enabled by the environment.
+    """
+
+    def foo():
+        pass
+
+    assert hasattr(Matcher.match, '__wrapped__') == (Tracer.environment in ('1', 'stats'))
+    environment: str = Tracer.environment
+
+    try:
+        Tracer.environment = ''
+        assert Tracer.trace(hot=True)(foo) is foo
+
+        Tracer.environment = 'stats'
+        assert Tracer.trace(hot=True)(foo) is not foo
+    finally:
+        Tracer.environment = environment
+
+
+def test_tracer_owner_name():
+    """
+    Tracer must resolve owner names of methods without the class being available.
+    """
+
+    class Foo:
+        def bar(self):
+            pass
+
+    def baz():
+        pass
+
+    assert Tracer.get_owner_name(Traceable.foo) == 'Traceable'
+    assert Tracer.get_owner_name(Foo.bar) == 'Foo'
+    assert Tracer.get_owner_name(baz) is None
+
+
+@mark.parametrize(['sample_rate', 'samples'], [[1, 10], [3, 3]])
+def test_tracer_statistics(sample_rate: int, samples: int):
+    """
+    Tracer must record call counts and latencies instead of logging calls in statistics mode.
+    """
+
+    Tracer.out_stream = TextIOWrapper(BytesIO(), line_buffering=True)
+    Tracer.statistics = {}
+    (Tracer.skip, Tracer.stats, Tracer.sample_rate) = (False, True, sample_rate)
+
+    try:
+        traceable = Traceable()
+
+        for _ in range(10):
+            assert traceable.foo('bar', 'baz') == 'SUCH FOO!'
+
+        Tracer.report()
+    finally:
+        (Tracer.skip, Tracer.stats, Tracer.sample_rate) = (True, False, 1)
+
+    statistics = Tracer.statistics['Traceable.foo']
+
+    assert (statistics.calls, statistics.samples) == (10, samples)
+    assert 0 < statistics.percentile(50) <= statistics.percentile(99) <= statistics.maximum
+
+    result = StreamUtility.data(Tracer.out_stream)
+
+    assert 'Traceable.foo' in result
+    assert 'CALL' not in result
+
+
+def test_tracer_statistics_invalid_sample_rate():
+    """
+    Tracer must reject sample rates below one.
+    """
+
+    (Tracer.skip, Tracer.stats, Tracer.sample_rate) = (False, True, 0)
+
+    try:
+        with pytest.raises(ValueError):
+            Traceable().foo('bar', 'baz')
+    finally:
+        (Tracer.skip, Tracer.stats, Tracer.sample_rate) = (True, False, 1)
+
+
+@mark.parametrize(['environment', 'output'], [
+    ['1', 'PatternSet CALL matches'],
+    ['stats', 'PatternSet.matches'],
+    ['', ''],
+])
+def test_tracer_environment(environment: str, output: str):
+    """
+    Tracer enabled by the environment must trace the command-line interface and report statistics at exit.
+    """
+
+    source: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    process: subprocess.CompletedProcess = subprocess.run([sys.executable, os.path.join(source, 'reggy.py'), 'foo %{0}'], input='foo bar\n',
+                                                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, cwd=source,
+                                                          env=dict(os.environ, REGGY_TRACE=environment))
+
+    assert process.stdout == 'foo bar\n'
+    assert output in process.stderr
+    assert bool(process.stderr) == bool(output)
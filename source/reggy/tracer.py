@@ -1,38 +1,119 @@
-import datetime
+import atexit
 import functools
-import inspect
+import math
+import os
 import sys
-from typing import Callable, IO, Optional
+import time
+from typing import Callable, Dict, IO, Optional
+
+from reggy.sink import TraceRecord, TraceSink
+
+
+class TraceStatistics:
+    """
+    Call count and latency histogram of a traced function. Latencies are recorded in nanoseconds into logarithmic buckets, four per power
+    of two, so percentiles are approximate within about 20%.
+    """
+
+    # Number of histogram buckets per power of two.
+    resolution: int = 4
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.calls: int = 0
+        self.samples: int = 0
+        self.total: int = 0
+        self.maximum: int = 0
+        self.histogram: Dict[int, int] = {}
+
+    def record(self, latency: int) -> None:
+        """
+        Records the latency of a sampled call in nanoseconds.
+        """
+
+        bucket: int = int(math.log2(latency) * self.resolution) if latency > 0 else 0
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        self.samples += 1
+        self.total += latency
+        self.maximum = max(self.maximum, latency)
+
+    def percentile(self, percent: float) -> int:
+        """
+        Returns the approximate latency in nanoseconds below which the given percent of sampled calls fall.
+        """
+
+        if not self.samples:
+            return 0
+
+        rank: float = self.samples * percent / 100
+        count: int = 0
+
+        for bucket in sorted(self.histogram):
+            count += self.histogram[bucket]
+
+            if count >= rank:
+                return min(int(2 ** ((bucket + 1) / self.resolution)), self.maximum)
+
+        return self.maximum
+
+    def mean(self) -> int:
+        return self.total // self.samples if self.samples else 0
 
 
 class Tracer():
     """
     Provides `trace` decorator for class methods.
+
+    Tracing can be controlled with the `REGGY_TRACE` environment variable, which is read when the decorator gets applied: "0" disables it
+    completely and leaves functions undecorated, "1" enables logging and "stats" enables statistics, which are reported at exit. Hot
+    functions, called for every matched line or string like `Matcher.match`, are decorated only when tracing is enabled by the environment,
+    so they have no overhead by default, enabling tracing with `skip` later doesn't affect them.
     """
 
+    # Tracing mode from the environment.
+    environment: str = os.environ.get('REGGY_TRACE', '')
+
     # Custom output stream, `sys.stderr` is used if not provided.
     out_stream: Optional[IO] = None
 
+    # Custom record sink, records are written synchronously into the output stream if not provided.
+    sink: Optional[TraceSink] = None
+
     # Default trace skip value.
-    skip: bool = True
+    skip: bool = environment not in ('1', 'stats')
 
     # Default trace quiet value.
     quiet: bool = False
 
+    # Whether to record call statistics instead of logging every call.
+    stats: bool = environment == 'stats'
+
+    # Statistics mode records latency of every n-th call, all calls are counted regardless.
+    sample_rate: int = 1
+
+    # Statistics of traced functions by their qualified name.
+    statistics: Dict[str, TraceStatistics] = {}
+
     @classmethod
-    def trace(cls, skip: Optional[bool] = None, quiet: Optional[bool] = None):
+    def trace(cls, skip: Optional[bool] = None, quiet: Optional[bool] = None, hot: bool = False):
         def decorator(decoratee: Callable):
+            # When tracing is disabled for good there's no point in wrapping – undecorated function has no overhead at all.
+            if skip or skip is None and (cls.environment == '0' or hot and cls.environment not in ('1', 'stats')):
+                return decoratee
+
+            # The decorator is applied while the class body is still being executed, so the owner is known only by its name.
+            owner: Optional[str] = cls.get_owner_name(decoratee)
+            name: str = f'{owner}.{decoratee.__name__}' if owner is not None else decoratee.__name__
+
             @functools.wraps(decoratee)
             def wrapper(*args, **kwargs):
                 if cls.skip if skip is None else skip:
                     return decoratee(*args, **kwargs)
 
-                verbose: bool = not (cls.quiet if quiet is None else quiet)
+                if cls.stats:
+                    return cls.measure(name, decoratee, args, kwargs)
 
-                # This is hacky, but does the job. We assume that decorator is used on class methods, but in theory can be applied
-                # on any callable and class will be empty and we won't know who owns the decoratee.
-                decoratee_cls: Optional[type] = cls.get_method_class(decoratee)
-                owner: Optional[str] = decoratee_cls.__name__ if decoratee_cls is not None else None
+                verbose: bool = not (cls.quiet if quiet is None else quiet)
 
                 # When decoratee has a class the first passed argument would be `self`, so we drop it.
                 cls.log_call(owner, decoratee, lambda: ', '.join([f'{arg!r}' for arg in (args if owner is None else args[1:])] + [f'{kw}={arg!r}' for kw, arg in kwargs.items()]), verbose)
@@ -51,44 +132,78 @@ class Tracer():
         return decorator
 
     @classmethod
-    def log(cls, message):
-        print(f'{datetime.datetime.now().strftime("%Y.%m.%d-%H:%M:%S.%f")} {message}', file=cls.out_stream or sys.stderr)
+    def measure(cls, name: str, function: Callable, args: tuple, kwargs: dict) -> any:
+        """
+        Calls the function and records its statistics, only every `sample_rate`-th call is timed.
+        """
+
+        if cls.sample_rate <= 0:
+            raise ValueError(f'Invalid sample rate {cls.sample_rate!r}, expected a positive number.')
+
+        statistics: Optional[TraceStatistics] = cls.statistics.get(name)
+
+        if statistics is None:
+            statistics = cls.statistics.setdefault(name, TraceStatistics(name))
+
+        statistics.calls += 1
+
+        if statistics.calls % cls.sample_rate:
+            return function(*args, **kwargs)
+
+        # Nanosecond counter is available only since Python 3.7.
+        start: float = time.perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            statistics.record(int((time.perf_counter() - start) * 1e9))
+
+    @classmethod
+    def report(cls, stream: Optional[IO] = None) -> None:
+        """
+        Writes collected statistics as a table into the stream, the tracer output stream is used by default.
+        """
+
+        lines: [str] = [f'{"function":<40} {"calls":>10} {"samples":>10} {"mean":>10} {"p50":>10} {"p99":>10} {"max":>10}']
+
+        for statistics in sorted(cls.statistics.values(), key=lambda statistics: statistics.name):
+            lines.append(f'{statistics.name:<40} {statistics.calls:>10} {statistics.samples:>10} {statistics.mean():>10} '
+                         f'{statistics.percentile(50):>10} {statistics.percentile(99):>10} {statistics.maximum:>10}')
+
+        print('\n'.join(lines) + '\nLatencies are in nanoseconds.', file=stream or cls.out_stream or sys.stderr)
 
     @classmethod
     def log_operation(cls, operation: str, owner: any, function: Callable, details: Optional[str]):
-        cls.log('%s%s %s%s' % (f'{owner} ' or '', operation, function.__name__, details or ''))
+        record: TraceRecord = TraceRecord(time.time(), owner, operation, function.__name__, details)
+
+        if cls.sink is not None:
+            cls.sink.write(record)
+        else:
+            print(record.text(), file=cls.out_stream or sys.stderr)
 
     @classmethod
     def log_call(cls, owner: any, function: Callable, signature: Callable[[], str], verbose: bool = True):
         # Signature is a lambda that constructs function signature on demand to eliminate redundant overhead in non-verbose mode.
-        cls.log_operation('CALL', owner, function, f' with signature: ({signature()})' if verbose else None)
+        cls.log_operation('CALL', owner, function, f'with signature: ({signature()})' if verbose else None)
 
     @classmethod
     def log_exit(cls, owner: any, function: Callable, result: any, verbose: bool = True):
-        cls.log_operation('EXIT', owner, function, f' with result: {result!r}' if verbose else None)
+        cls.log_operation('EXIT', owner, function, f'with result: {result!r}' if verbose else None)
 
     @classmethod
     def log_fail(cls, owner: any, function: Callable, exception: Exception, verbose: bool = True):
-        cls.log_operation('FAIL', owner, function, f' with exception: {exception!r}' if verbose else None)
+        cls.log_operation('FAIL', owner, function, f'with exception: {exception!r}' if verbose else None)
 
     @staticmethod
-    def get_method_class(method) -> Optional[type]:
+    def get_owner_name(function: Callable) -> Optional[str]:
         """
-        Returns method's class. All kudos to Yoel – https://stackoverflow.com/a/25959545/458356.
+        Returns the name of the class owning the function based on its qualified name, or `None` if it's not a method.
         """
 
-        if inspect.ismethod(method):
-            for cls in inspect.getmro(method.__self__.__class__):
-                if cls.__dict__.get(method.__name__) is method:
-                    return cls
-
-            # Fallback to __qualname__ parsing.
-            method = method.__func__
+        names: [str] = function.__qualname__.rsplit('.<locals>.', 1)[-1].split('.')
+        return names[-2] if len(names) > 1 else None
 
-        if inspect.isfunction(method):
-            cls = getattr(inspect.getmodule(method), method.__qualname__.split('.<locals>', 1)[0].rsplit('.', 1)[0])
-            if isinstance(cls, type):
-                return cls
 
-        # Handle special descriptor objects.
-        return getattr(method, '__objclass__', None)
+# Statistics enabled by the environment are reported when the process exits, the command-line interface has no other way to report them.
+if Tracer.stats:
+    atexit.register(Tracer.report)